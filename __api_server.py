@@ -1,10 +1,29 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_from_directory
+import json
 import os
+import subprocess
+import sys
+import threading
+import uuid
+from urllib.parse import quote
 from pathlib import Path
 from flask_cors import CORS
+from archive_export import ARCHIVE_FORMATS, stream_archive
+from availability import get_availability
+from camera_catalog import get_catalog
+from constraints import get_engine
+from dir_scaffold import ScaffoldError, create_dirs, plan_dirs
+import manual_index
+from manual_index import DOCS_DIR, get_manual_index
+from menu_tree import MENU_ROOT, load_menu_json, submenu_dir_spec
+from preset_planner import get_planner
+from serving import BlockingTimeout, run_blocking, serve
+from instrumentation import instrument_app, setup_logging, span
+from snapshot_cache import TTLCache
 
 app = Flask(__name__)
 CORS(app)
+instrument_app(app, "dir_api")  # Per-route timing, GET /metrics
 
 @app.route("/api/create_dir", methods=["POST"])
 def create_dir():
@@ -20,12 +39,299 @@ def create_dir():
 
     new_dir_path = Path(parent_path) / dir_name
     try:
-        new_dir_path.mkdir(parents=False, exist_ok=False)
+        with span("mkdir"):
+            run_blocking(new_dir_path.mkdir, parents=False, exist_ok=False)
         return jsonify({"success": True, "path": str(new_dir_path)})
     except FileExistsError:
         return jsonify({"success": False, "error": "Directory already exists"}), 409
+    except BlockingTimeout as e:
+        return jsonify({"success": False, "error": str(e)}), 504
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+GEN_TREE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app", "gen_tree_json.py")
+
+def refresh_tree():
+    """Regenerate tree-data.json once (same script the Node /api/refresh-tree runs)"""
+    subprocess.run([sys.executable, GEN_TREE_SCRIPT], check=True, capture_output=True)
+
+TREE_DATA_PATH = os.path.join(os.path.dirname(GEN_TREE_SCRIPT), "public", "tree-data.json")
+_tree_data = {"stat": None, "tree": None}
+_tree_data_lock = threading.Lock()
+
+def load_tree_data():
+    """Parsed tree-data.json, re-read only when the file changed"""
+    st = os.stat(TREE_DATA_PATH)
+    with _tree_data_lock:
+        if _tree_data["stat"] != (st.st_mtime_ns, st.st_size):
+            with open(TREE_DATA_PATH, "r", encoding="utf-8") as f:
+                _tree_data["tree"] = json.load(f)
+            _tree_data["stat"] = (st.st_mtime_ns, st.st_size)
+        return _tree_data["tree"]
+
+def find_tree_node(tree, rel_path):
+    node = tree
+    for name in [part for part in rel_path.replace("\\", "/").split("/") if part]:
+        node = next((c for c in node.get("children", []) if c["name"] == name), None)
+        if node is None:
+            return None
+    return node
+
+def prune_tree(node, depth):
+    """Copy of `node` with `depth` levels of full subdirectories; deeper ones keep only name, type and hash"""
+    if node.get("type") != "directory":
+        return node
+    if depth < 0:
+        return {key: node[key] for key in ("name", "path", "type", "hash") if key in node}
+    pruned = {key: value for key, value in node.items() if key != "children"}
+    pruned["children"] = [prune_tree(child, depth - 1) for child in node.get("children", [])]
+    return pruned
+
+@app.route("/api/tree", methods=["GET"])
+def tree_node():
+    """
+    One subtree of tree-data.json; the ETag is its Merkle hash plus the depth ("<hash>-full", "<hash>-d0").
+
+    Query: path=<path below public, e.g. α7RV/1 My Menu>  depth=<levels of full subdirectories, default all; 0 = children as stubs>
+    A client that still has the node's hash sends If-None-Match and gets 304;
+    with depth, it can compare the children's hashes and fetch only those that changed.
+    """
+    try:
+        tree = load_tree_data()
+    except (OSError, ValueError) as e:
+        return jsonify({"success": False, "error": f"tree-data.json unavailable: {e}"}), 503
+    node = find_tree_node(tree, request.args.get("path", ""))
+    if node is None:
+        return jsonify({"success": False, "error": "No such node"}), 404
+    depth = request.args.get("depth", type=int)
+    # The ETag names the representation too: a depth=0 answer must not validate a cached full subtree
+    etag = f'{node["hash"]}-{"full" if depth is None else f"d{depth}"}' if node.get("hash") else None
+    if etag and etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    response = jsonify(prune_tree(node, depth) if depth is not None else node)
+    if etag:
+        response.set_etag(etag)
+    return response
+
+@app.route("/api/create_dirs", methods=["POST"])
+def create_dirs_batch():
+    """
+    Create a whole nested directory tree in one request.
+
+    Body: {"parent_path": ..., "spec": {...} | [...]} or
+          {"parent_path": ..., "menu_file": "<submenu JSON file>"}
+    Optional: "exist_ok" (skip directories that already exist),
+              "refresh_tree" (regenerate tree-data.json once at the end).
+
+    Every name is validated before anything is created; if creation fails
+    part-way, the directories made by this request are removed again. If
+    only the refresh fails, the response is still a success with
+    "tree_refreshed": false and a "refresh_error".
+    """
+    data = request.get_json() or {}
+    parent_path = data.get("parent_path")
+    if not parent_path:
+        return jsonify({"success": False, "error": "Missing parent_path"}), 400
+
+    spec = data.get("spec")
+    if spec is None and data.get("menu_file"):
+        try:
+            spec = submenu_dir_spec(load_menu_json(data["menu_file"]))
+        except (OSError, ValueError) as e:
+            return jsonify({"success": False, "error": f"Could not read menu_file: {e}"}), 400
+    if spec is None:
+        return jsonify({"success": False, "error": "Missing spec or menu_file"}), 400
+
+    try:
+        paths = plan_dirs(parent_path, spec, exist_ok=bool(data.get("exist_ok")))
+        # No timeout here: a 504 while the mkdirs carried on would misreport what was created
+        with span("mkdir_batch"):
+            created = create_dirs(paths)
+    except ScaffoldError as e:
+        return jsonify({"success": False, "error": str(e), "problems": e.problems}), e.status
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    result = {"success": True, "created": [str(p) for p in created], "tree_refreshed": False}
+    if data.get("refresh_tree") and created:
+        # The directories exist either way; a failed refresh is reported, not turned into an error
+        try:
+            with span("refresh_tree"):
+                run_blocking(refresh_tree)
+            result["tree_refreshed"] = True
+        except (BlockingTimeout, subprocess.CalledProcessError, OSError) as e:
+            app.logger.warning(f"tree-data.json refresh failed: {e}")
+            result["refresh_error"] = str(e)
+    return jsonify(result)
+
+# Prepared exports: id -> (paths, format, download name); a link stays valid for 10 minutes
+exports = TTLCache(ttl=600, max_entries=64)
+
+# Only paths below these folders can be exported (EXPORT_ROOTS, separated by os.pathsep)
+EXPORT_ROOTS = [os.path.realpath(p) for p in os.environ.get("EXPORT_ROOTS", MENU_ROOT).split(os.pathsep) if p]
+
+def resolve_export_path(path):
+    """Real path of `path` if it lies inside one of EXPORT_ROOTS, else None"""
+    real = os.path.realpath(path)
+    for root in EXPORT_ROOTS:
+        if real == root or real.startswith(root.rstrip(os.sep) + os.sep):
+            return real
+    return None
+
+@app.route("/api/exports", methods=["POST"])
+def prepare_export():
+    """
+    Register an archive export and return its download URL.
+
+    Body: {"paths": [...], "format": "zip" | "tar", "name": "optional base name"}
+    The archive itself is built while GET /api/exports/<id> streams it.
+    """
+    data = request.get_json() or {}
+    paths = data.get("paths") or []
+    fmt = data.get("format", "zip")
+    if fmt not in ARCHIVE_FORMATS:
+        return jsonify({"success": False, "error": f"Unsupported format: {fmt}"}), 400
+    if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+        return jsonify({"success": False, "error": "paths must be a list of strings"}), 400
+    resolved = [resolve_export_path(p) for p in paths]
+    outside = [p for p, real in zip(paths, resolved) if real is None]
+    if outside:
+        return jsonify({"success": False, "error": "Paths outside the export roots", "outside": outside}), 400
+    missing = [p for p, real in zip(paths, resolved) if not os.path.exists(real)]
+    if not paths or missing:
+        return jsonify({"success": False, "error": "Missing or nonexistent paths", "missing": missing}), 400
+    paths = resolved
+    name = data.get("name") or (os.path.basename(paths[0].rstrip("/\\")) if len(paths) == 1 else "export")
+    export_id = uuid.uuid4().hex
+    exports.put(export_id, (paths, fmt, name))
+    return jsonify({"success": True, "id": export_id, "url": f"/api/exports/{export_id}"})
+
+@app.route("/api/exports/<export_id>", methods=["GET"])
+def download_export(export_id):
+    """Stream the archive for a prepared export (no temp file, bounded memory)"""
+    export = exports.get(export_id)
+    if export is None:
+        return jsonify({"success": False, "error": "Unknown or expired export"}), 404
+    paths, fmt, name = export
+    mimetype, ext = ARCHIVE_FORMATS[fmt]
+    workers = int(os.environ.get("EXPORT_WORKERS", 4))
+    return Response(stream_archive(paths, fmt, workers=workers), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(name + ext)}"})
+
+@app.route("/api/availability", methods=["GET"])
+def availability():
+    """
+    Settings available in the given modes, from the precomputed availability matrix.
+
+    Query: modes=photo,video  match=all|any  option=Manual  tab=Stills  page=1_Shooting/PAGE_1
+           refresh=1 rebuilds the matrix after the menu tree changed
+    """
+    args = request.args
+    modes = [m for m in args.get("modes", "").split(",") if m.strip()]
+    try:
+        matrix = get_availability(refresh=args.get("refresh") == "1")
+        mask = matrix.filter(modes=modes, match=args.get("match", "all"), option=args.get("option") or None,
+                             tab=args.get("tab") or None, page=args.get("page") or None)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "modes": matrix.modes, "total": len(matrix), "settings": matrix.rows(mask)})
+
+@app.route("/api/validate_preset", methods=["POST"])
+def validate_preset():
+    """
+    Check a preset against the setting dependencies in the menu JSON.
+
+    Body: {"preset": {"Setting": "Value", ...} or [["Setting", "Value"], ...], "complete": false}
+    With "complete": true, missing prerequisites are filled in and returned as "changes".
+    """
+    data = request.get_json() or {}
+    preset = data.get("preset")
+    if not isinstance(preset, (dict, list)):
+        return jsonify({"success": False, "error": "preset must be an object or a list of pairs"}), 400
+    try:
+        report = get_engine().validate(preset, complete=bool(data.get("complete")))
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": f"Invalid preset: {e}"}), 400
+    return jsonify({
+        "success": True,
+        "ok": report.ok,
+        "conflicts": [{"setting": c.setting, "value": c.value, "required": c.required, "message": c.message,
+                       "source": c.rule.source} for c in report.conflicts],
+        "changes": [{"setting": c.setting, "value": c.value, "message": c.message, "source": c.rule.source}
+                    for c in report.changes],
+        "preset": report.preset,
+        "unknown": [list(pair) for pair in report.unknown],
+    })
+
+@app.route("/api/plan_preset", methods=["POST"])
+def plan_preset():
+    """
+    Minimal changes to apply a preset, grouped by menu screen in menu order.
+
+    Body: {"current": {"Setting": "Value", ...}, "target": {...}}
+    """
+    data = request.get_json() or {}
+    current, target = data.get("current") or {}, data.get("target")
+    if not isinstance(current, dict) or not isinstance(target, dict):
+        return jsonify({"success": False, "error": "current and target must be objects"}), 400
+    plan = get_planner().plan(current, target)
+    return jsonify({
+        "success": True,
+        "changes": len(plan.steps),
+        "unchanged": plan.unchanged,
+        "unknown": plan.unknown,
+        "groups": [{"group": group, "steps": [step._asdict() for step in steps]} for group, steps in plan.groups],
+    })
+
+@app.route("/api/manual_pages", methods=["GET"])
+def manual_pages():
+    """Pages of the α7R V manual PDF that mention ?q= (e.g. a setting name)"""
+    phrase = request.args.get("q", "").strip()
+    if not phrase:
+        return jsonify({"success": False, "error": "Missing q"}), 400
+    try:
+        # The first call may build the index (a few seconds); later ones are dict lookups
+        index = run_blocking(get_manual_index, timeout=120)
+    except BlockingTimeout as e:
+        return jsonify({"success": False, "error": str(e)}), 504
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    pdf_url = f"{docs_origin()}/docs/{quote(os.path.basename(manual_index.MANUAL_PDF))}"
+    pages = index.pages_for(phrase)
+    return jsonify({"success": True, "q": phrase,
+                    "pages": [{"page": n, "url": f"{pdf_url}#page={n}"} for n in pages]})
+
+def docs_origin():
+    """Where /docs is served: DOCS_ORIGIN (e.g. the tree-view app, http://localhost:3000) or this server"""
+    return (os.environ.get("DOCS_ORIGIN") or request.host_url).rstrip("/")
+
+@app.route("/docs/<path:name>", methods=["GET"])
+def docs_file(name):
+    """Files of tree-view-app/public/docs (the manual PDF), as the tree-view app serves them"""
+    return send_from_directory(DOCS_DIR, name)
+
+@app.route("/api/catalog", methods=["GET"])
+def catalog():
+    """
+    Camera bodies in the catalog; with ?q=, the bodies whose settings or options match every word.
+
+    Query: q=Dynamic SteadyShot  body=α7RV  refresh=1 rebuilds after a body folder changed
+    """
+    args = request.args
+    catalog = get_catalog(refresh=args.get("refresh") == "1")
+    query = args.get("q", "").strip()
+    if not query:
+        return jsonify({"success": True, "bodies": sorted(catalog.bodies), "stats": catalog.stats()})
+    body = args.get("body") or None
+    if body is not None and body not in catalog.bodies:
+        return jsonify({"success": False, "error": f"Unknown body: {body}"}), 404
+    matches = catalog.find(query, body=body)
+    return jsonify({"success": True, "q": query, "bodies": sorted({m.body for m in matches}),
+                    "matches": [m._asdict() for m in matches]})
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    setup_logging()
+    # Threaded production server; SERVER_MODE=dev for the Flask debug server
+    serve(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5001)))
@@ -0,0 +1,332 @@
+"""
+Streaming zip/tar export of selected files and folders.
+
+`stream_archive(paths, "zip")` returns a generator of byte chunks that form a
+complete archive, so a web response can send hundreds of MB without a temp
+file or the whole archive in memory:
+
+- files are read in `chunk_size` pieces; only small files (up to
+  `inline_limit`) are held in memory at once, and at most a few per worker
+- in zip exports, worker threads read, CRC and deflate the next files while
+  the current one is being sent
+- already-compressed formats (PNG, JPEG, ...) are stored, not deflated
+
+Zip entries are written with the sizes in the local header when the worker
+already knows them, otherwise with a data descriptor after the data, so
+the output never has to be seeked. Zip64 records are added only when an
+archive or entry passes 4 GiB.
+"""
+
+import os
+import struct
+import tarfile
+import time
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+ARCHIVE_FORMATS = {
+    "zip": ("application/zip", ".zip"),
+    "tar": ("application/x-tar", ".tar"),
+}
+
+# Deflating these gains nothing and costs CPU
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".gz", ".bz2", ".xz", ".7z", ".mp4", ".mov"}
+
+CHUNK_SIZE = 256 * 1024
+INLINE_LIMIT = 1024 * 1024
+
+Entry = namedtuple("Entry", ["path", "arcname", "is_dir", "size", "mtime"])
+
+
+def _unique_name(name, used):
+    if name not in used:
+        return name
+    stem, ext = os.path.splitext(name)
+    n = 2
+    while f"{stem} ({n}){ext}" in used:
+        n += 1
+    return f"{stem} ({n}){ext}"
+
+
+def iter_entries(paths):
+    """
+    Yield Entry tuples for the selected paths, walking directories.
+
+    Each selection is archived under its own base name. Files reached through
+    more than one selection (a folder and a file inside it) are added once;
+    two selections with the same base name get " (2)" appended. Symlinks
+    found while walking a folder are skipped, so a link can't pull a file
+    from outside the selection into the archive.
+    """
+    seen = set()
+    used_roots = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        if path in seen or not os.path.exists(path):
+            continue
+        root_name = _unique_name(os.path.basename(path.rstrip(os.sep)) or "root", used_roots)
+        used_roots.add(root_name)
+        if not os.path.isdir(path):
+            seen.add(path)
+            st = os.stat(path)
+            yield Entry(path, root_name, False, st.st_size, st.st_mtime)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort(key=str.lower)
+            rel = os.path.relpath(dirpath, path)
+            arcdir = root_name if rel == "." else f"{root_name}/{rel.replace(os.sep, '/')}"
+            if dirpath not in seen:
+                seen.add(dirpath)
+                yield Entry(dirpath, arcdir + "/", True, 0, os.stat(dirpath).st_mtime)
+            for filename in sorted(filenames, key=str.lower):
+                file_path = os.path.join(dirpath, filename)
+                if file_path in seen or os.path.islink(file_path) or not os.path.isfile(file_path):
+                    continue
+                seen.add(file_path)
+                st = os.stat(file_path)
+                yield Entry(file_path, f"{arcdir}/{filename}", False, st.st_size, st.st_mtime)
+
+
+def _read_chunks(path, chunk_size):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def should_store(name):
+    return os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+
+
+# --- zip -------------------------------------------------------------------
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = 0xFFFFFFFF
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+# Result of preparing one entry in a worker: data is None when the file is
+# too big to hold and will be streamed by the writer instead.
+_Prepared = namedtuple("_Prepared", ["entry", "method", "crc", "size", "data"])
+
+
+def _dos_datetime(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+def _prepare(entry, level, inline_limit):
+    """Worker job: read, CRC and compress a small file; leave big files to the writer"""
+    if entry.is_dir:
+        return _Prepared(entry, ZIP_STORED, 0, 0, b"")
+    if entry.size > inline_limit:
+        return _Prepared(entry, ZIP_STORED if should_store(entry.arcname) else ZIP_DEFLATED, None, None, None)
+    with open(entry.path, "rb") as f:
+        raw = f.read()
+    crc = zlib.crc32(raw)
+    if not should_store(entry.arcname):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        packed = compressor.compress(raw) + compressor.flush()
+        if len(packed) < len(raw):
+            return _Prepared(entry, ZIP_DEFLATED, crc, len(raw), packed)
+    return _Prepared(entry, ZIP_STORED, crc, len(raw), raw)
+
+
+class _ZipWriter:
+    """Builds zip records; tracks the offset and central directory as it goes"""
+
+    def __init__(self):
+        self.offset = 0
+        self.central = []
+
+    def _emit(self, data):
+        self.offset += len(data)
+        return data
+
+    def local_header(self, entry, method, crc, csize, usize):
+        """Header for an entry; crc None means sizes follow in a data descriptor"""
+        name = entry.arcname.encode("utf-8")
+        dos_time, dos_date = _dos_datetime(entry.mtime)
+        flags = FLAG_UTF8
+        extra = b""
+        streamed = crc is None
+        if streamed:
+            flags |= FLAG_DATA_DESCRIPTOR
+            zip64 = entry.size >= ZIP64_LIMIT
+            crc, csize, usize = 0, 0, 0
+            if zip64:
+                extra = struct.pack("<HHQQ", 1, 16, 0, 0)
+                csize = usize = ZIP64_LIMIT
+        else:
+            zip64 = csize >= ZIP64_LIMIT or usize >= ZIP64_LIMIT
+            if zip64:
+                extra = struct.pack("<HHQQ", 1, 16, usize, csize)
+                csize = usize = ZIP64_LIMIT
+        record = {"entry": entry, "method": method, "flags": flags, "time": dos_time,
+                  "date": dos_date, "offset": self.offset, "zip64": zip64}
+        header = struct.pack("<IHHHHHIIIHH", 0x04034b50, 45 if zip64 else 20, flags, method,
+                             dos_time, dos_date, crc, csize, usize, len(name), len(extra))
+        return record, self._emit(header + name + extra)
+
+    def data(self, chunk):
+        return self._emit(chunk)
+
+    def finish_entry(self, record, crc, csize, usize):
+        """Record the final sizes; return the data descriptor if one is needed"""
+        record.update(crc=crc, csize=csize, usize=usize)
+        self.central.append(record)
+        if not record["flags"] & FLAG_DATA_DESCRIPTOR:
+            return b""
+        if record["zip64"]:
+            return self._emit(struct.pack("<IIQQ", 0x08074b50, crc, csize, usize))
+        return self._emit(struct.pack("<IIII", 0x08074b50, crc, csize, usize))
+
+    def central_directory(self):
+        start = self.offset
+        parts = []
+        for r in self.central:
+            name = r["entry"].arcname.encode("utf-8")
+            csize, usize, offset = r["csize"], r["usize"], r["offset"]
+            extra_values = []
+            if usize >= ZIP64_LIMIT:
+                extra_values.append(usize)
+                usize = ZIP64_LIMIT
+            if csize >= ZIP64_LIMIT:
+                extra_values.append(csize)
+                csize = ZIP64_LIMIT
+            if offset >= ZIP64_LIMIT:
+                extra_values.append(offset)
+                offset = ZIP64_LIMIT
+            extra = b""
+            if extra_values:
+                extra = struct.pack(f"<HH{len(extra_values)}Q", 1, 8 * len(extra_values), *extra_values)
+            if r["entry"].is_dir:
+                attrs = (0o40755 << 16) | 0x10
+            else:
+                attrs = 0o100644 << 16
+            version = 45 if extra_values or r["zip64"] else 20
+            parts.append(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | version, version,
+                                     r["flags"], r["method"], r["time"], r["date"], r["crc"],
+                                     csize, usize, len(name), len(extra), 0, 0, 0, attrs, offset))
+            parts.append(name + extra)
+        directory = self._emit(b"".join(parts))
+        size = len(directory)
+        count = len(self.central)
+        tail = b""
+        if count >= 0xFFFF or size >= ZIP64_LIMIT or start >= ZIP64_LIMIT:
+            zip64_end = self.offset
+            tail += struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0, count, count, size, start)
+            tail += struct.pack("<IIQI", 0x07064b50, 0, zip64_end, 1)
+            count, size, start = min(count, 0xFFFF), min(size, ZIP64_LIMIT), min(start, ZIP64_LIMIT)
+        tail += struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, count, count, size, start, 0)
+        return directory + self._emit(tail)
+
+
+def stream_zip(entries, workers=4, level=6, chunk_size=CHUNK_SIZE, inline_limit=INLINE_LIMIT):
+    """
+    Generator of zip archive chunks for `entries` (see iter_entries).
+
+    Up to 2 * workers files are prepared ahead of the one being written, so
+    memory stays around 2 * workers * inline_limit at most.
+    """
+    writer = _ZipWriter()
+    entries = iter(entries)
+    window = max(1, 2 * workers)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="zip-export") as pool:
+        def fill():
+            while len(pending) < window:
+                entry = next(entries, None)
+                if entry is None:
+                    return
+                pending.append(pool.submit(_prepare, entry, level, inline_limit))
+
+        try:
+            fill()
+            while pending:
+                prepared = pending.popleft().result()
+                fill()
+                yield from _write_prepared(writer, prepared, level, chunk_size)
+        finally:
+            for future in pending:
+                future.cancel()
+    yield writer.central_directory()
+
+
+def _write_prepared(writer, prepared, level, chunk_size):
+    entry = prepared.entry
+    if prepared.data is not None:
+        record, header = writer.local_header(entry, prepared.method, prepared.crc, len(prepared.data), prepared.size)
+        yield header
+        if prepared.data:
+            yield writer.data(prepared.data)
+        writer.finish_entry(record, prepared.crc, len(prepared.data), prepared.size)
+        return
+
+    # Large file: stream it through, sizes go in the data descriptor
+    record, header = writer.local_header(entry, prepared.method, None, None, None)
+    yield header
+    crc = 0
+    usize = csize = 0
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15) if prepared.method == ZIP_DEFLATED else None
+    for chunk in _read_chunks(entry.path, chunk_size):
+        crc = zlib.crc32(chunk, crc)
+        usize += len(chunk)
+        if compressor:
+            chunk = compressor.compress(chunk)
+            if not chunk:
+                continue
+        csize += len(chunk)
+        yield writer.data(chunk)
+    if compressor:
+        tail = compressor.flush()
+        csize += len(tail)
+        yield writer.data(tail)
+    yield writer.finish_entry(record, crc, csize, usize)
+
+
+# --- tar -------------------------------------------------------------------
+
+def stream_tar(entries, chunk_size=CHUNK_SIZE):
+    """Generator of uncompressed tar chunks for `entries` (PAX headers for long/UTF-8 names)"""
+    for entry in entries:
+        info = tarfile.TarInfo(entry.arcname.rstrip("/"))
+        info.mtime = int(entry.mtime)
+        if entry.is_dir:
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+            yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            continue
+        info.mode = 0o644
+        info.size = entry.size
+        yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        # The header promised entry.size bytes; pad or truncate if the file changed since
+        remaining = entry.size
+        for chunk in _read_chunks(entry.path, chunk_size):
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+            if remaining == 0:
+                break
+        if remaining:
+            yield b"\0" * remaining
+        if entry.size % tarfile.BLOCKSIZE:
+            yield b"\0" * (tarfile.BLOCKSIZE - entry.size % tarfile.BLOCKSIZE)
+    yield b"\0" * (2 * tarfile.BLOCKSIZE)
+
+
+def stream_archive(paths, fmt="zip", workers=4):
+    """Chunks of a `fmt` ("zip" or "tar") archive of the selected paths"""
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+    entries = iter_entries(paths)
+    if fmt == "zip":
+        return stream_zip(entries, workers=workers)
+    return stream_tar(entries)
@@ -0,0 +1,203 @@
+"""
+Settings × shooting modes availability matrix for the α7RV menu tree.
+
+`AvailabilityMatrix.build()` walks the menu JSON once. Each setting file is a
+row and each mode in modes.json is a column. The row also records the
+setting's tab and menu page and which option labels it offers. Everything is
+stored as NumPy arrays, so a filter such as "settings available in both Photo
+and Movie that offer [Manual]" is a few vectorized boolean operations rather
+than a scan of the files:
+
+    matrix = get_availability()
+    mask = matrix.filter(modes=["photo", "video"], option="Manual")
+    for row in matrix.rows(mask): ...
+
+The menu files spell modes inconsistently ("movie", "stills"); they are mapped
+onto the keys of modes.json. A file without a "modes" list is treated as
+available in every mode, and a "mode" list in its condition narrows that.
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+
+from menu_tree import MENU_ROOT, load_menu_json
+
+MODE_ALIASES = {"movie": "video", "stills": "photo", "still": "photo", "s_and_q": "s&q", "sq": "s&q"}
+
+PAGE_RE = re.compile(r"^PAGE_\d+$")
+PAGE_FILE_RE = re.compile(r"^PAGE_\d+\.json$", re.IGNORECASE)
+
+
+def normalize_mode(mode, known=None):
+    mode = str(mode).strip().lower()
+    mode = MODE_ALIASES.get(mode, mode)
+    if known is not None and mode not in known:
+        raise ValueError(f"Unknown mode: {mode}")
+    return mode
+
+
+def normalize_option(label):
+    return " ".join(str(label).lower().split())
+
+
+def load_modes(root=MENU_ROOT):
+    """Mode keys in modes.json order, e.g. ["photo", "video", "s&q"]"""
+    return list(load_menu_json(os.path.join(root, "modes.json")).keys())
+
+
+def setting_location(rel_path):
+    """(tab, page) for a setting file path relative to the menu root"""
+    parts = rel_path.replace("\\", "/").split("/")
+    tab = parts[0] if len(parts) > 1 else ""
+    page = next((p for p in parts[1:-1] if PAGE_RE.match(p)), "")
+    # The menu page is the first PAGE_N under the section folder (e.g. 1_Shooting/PAGE_1)
+    if len(parts) > 3 and page:
+        page = f"{parts[1]}/{page}"
+    return tab, page
+
+
+class AvailabilityMatrix:
+    """
+    Precomputed availability of every setting in every mode.
+
+    Arrays (one row per setting):
+      modes_mask  bool  [settings, modes]
+      declared    bool  [settings]   the file lists its modes explicitly
+      options     bool  [settings, option labels]
+      tab_codes, page_codes  int32 indexes into `tabs` / `pages`
+    """
+
+    def __init__(self, modes, paths, names, modes_mask, declared, option_labels, options, tabs, tab_codes,
+                 pages, page_codes):
+        self.modes = modes
+        self.paths = paths
+        self.names = names
+        self.modes_mask = modes_mask
+        self.declared = declared
+        self.option_labels = option_labels
+        self.options = options
+        self.tabs = tabs
+        self.tab_codes = tab_codes
+        self.pages = pages
+        self.page_codes = page_codes
+        self._mode_index = {mode: i for i, mode in enumerate(modes)}
+        self._option_index = {label: i for i, label in enumerate(option_labels)}
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def build(cls, root=MENU_ROOT):
+        modes = load_modes(root)
+        known = set(modes)
+        paths, names, mode_rows, declared, option_rows, locations = [], [], [], [], [], []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort(key=str.lower)
+            for filename in sorted(filenames, key=str.lower):
+                if not filename.endswith(".json") or filename == "modes.json" or PAGE_FILE_RE.match(filename):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    menu = load_menu_json(path)
+                except (OSError, ValueError):
+                    continue
+                if "menu" not in menu:
+                    continue  # submenu index files only group the settings below them
+                listed = {normalize_mode(m) for m in menu.get("modes") or []} & known
+                condition = menu.get("condition")
+                required = condition.get("mode") if isinstance(condition, dict) else None
+                if isinstance(required, list):
+                    required = {normalize_mode(m) for m in required} & known
+                    listed = (listed & required) or required
+                paths.append(path)
+                names.append(menu["menu"])
+                declared.append(bool(listed))
+                mode_rows.append(listed or known)
+                option_rows.append({normalize_option(item["label"]) for item in menu.get("items", [])
+                                    if isinstance(item, dict) and item.get("label")})
+                locations.append(setting_location(os.path.relpath(path, root)))
+
+        option_labels = sorted(set().union(*option_rows)) if option_rows else []
+        option_index = {label: i for i, label in enumerate(option_labels)}
+        modes_mask = np.zeros((len(paths), len(modes)), dtype=bool)
+        options = np.zeros((len(paths), len(option_labels)), dtype=bool)
+        for row, (row_modes, row_options) in enumerate(zip(mode_rows, option_rows)):
+            modes_mask[row, [modes.index(m) for m in row_modes]] = True
+            options[row, [option_index[label] for label in row_options]] = True
+        tabs = sorted({tab for tab, _ in locations})
+        pages = sorted({page for _, page in locations})
+        tab_codes = np.array([tabs.index(tab) for tab, _ in locations], dtype=np.int32)
+        page_codes = np.array([pages.index(page) for _, page in locations], dtype=np.int32)
+        return cls(modes, paths, names, modes_mask, np.array(declared, dtype=bool), option_labels, options,
+                   tabs, tab_codes, pages, page_codes)
+
+    def _mode_columns(self, modes):
+        try:
+            return [self._mode_index[normalize_mode(m, self._mode_index)] for m in modes]
+        except ValueError as e:
+            raise ValueError(f"{e} (known: {', '.join(self.modes)})") from None
+
+    def mode_filter(self, modes, match="all"):
+        """Rows available in all (or any) of `modes`"""
+        if not modes:
+            return np.ones(len(self), dtype=bool)
+        columns = self.modes_mask[:, self._mode_columns(modes)]
+        return columns.all(axis=1) if match == "all" else columns.any(axis=1)
+
+    def option_filter(self, option, exact=False):
+        """Rows offering an option whose label equals (or contains) `option`, case-insensitively"""
+        needle = normalize_option(option)
+        if exact:
+            index = self._option_index.get(needle)
+            return self.options[:, index].copy() if index is not None else np.zeros(len(self), dtype=bool)
+        columns = [i for i, label in enumerate(self.option_labels) if needle in label]
+        return self.options[:, columns].any(axis=1)
+
+    def filter(self, modes=(), match="all", option=None, exact_option=False, tab=None, page=None,
+               declared_only=False):
+        """Boolean row mask combining all given criteria"""
+        mask = self.mode_filter(list(modes), match)
+        if option:
+            mask &= self.option_filter(option, exact_option)
+        if tab:
+            mask &= self.tab_codes == (self.tabs.index(tab) if tab in self.tabs else -1)
+        if page:
+            mask &= self.page_codes == (self.pages.index(page) if page in self.pages else -1)
+        if declared_only:
+            mask &= self.declared
+        return mask
+
+    def rows(self, mask=None):
+        """Dicts describing the selected rows, in tree order"""
+        indexes = np.flatnonzero(mask) if mask is not None else range(len(self))
+        result = []
+        for i in indexes:
+            result.append({
+                "name": self.names[i],
+                "path": self.paths[i],
+                "modes": [m for m, on in zip(self.modes, self.modes_mask[i]) if on],
+                "declared": bool(self.declared[i]),
+                "tab": self.tabs[self.tab_codes[i]],
+                "page": self.pages[self.page_codes[i]],
+            })
+        return result
+
+    def counts(self):
+        """{mode: number of settings available in it}"""
+        return dict(zip(self.modes, self.modes_mask.sum(axis=0).tolist()))
+
+
+_availability = None
+_availability_lock = threading.Lock()
+
+
+def get_availability(refresh=False):
+    """Process-wide matrix for MENU_ROOT; `refresh=True` rebuilds it after the tree changed"""
+    global _availability
+    with _availability_lock:
+        if _availability is None or refresh:
+            _availability = AvailabilityMatrix.build()
+        return _availability
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Load-test / benchmark harness for the Python HTTP APIs.
+
+Starts camera_api_server.py and __api_server.py in-process on free ports, on
+the server serving.serve() would pick (waitress when it is installed), with
+a fake camera window provider and the synthetic capture source, then
+drives each endpoint with a configurable number of concurrent clients and
+reports p50/p95/p99 latency and requests per second.
+
+    python bench_api.py                       # run all scenarios
+    python bench_api.py -c 16 -n 2000 camera_info
+    python bench_api.py --server pooled       # werkzeug pool instead of waitress
+    python bench_api.py --save                # write bench_baseline.json
+    python bench_api.py --compare             # fail if slower than the baseline
+
+--compare exits with status 1 when a scenario's throughput drops, or its p95
+latency grows, by more than --tolerance (default 25%) against the baseline.
+"""
+
+import argparse
+import http.client
+import importlib
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from serving import ServerThread, server_backend
+from camera_windows import FakeWindowProvider, WindowInfo
+from screen_capture import SyntheticCaptureSource
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+@contextmanager
+def camera_app():
+    """camera_api_server's app with a fake window and synthetic frames; its registry and snapshots are put back after"""
+    camera_api_server = importlib.import_module("camera_api_server")
+    with camera_api_server._registry_lock:
+        old_registry, old_snapshots = camera_api_server.registry, camera_api_server.snapshots
+    bench_registry = camera_api_server.init_registry(
+        FakeWindowProvider([WindowInfo(1001, "Camera", -3300, 550, 1475, 905)]), start=False)
+    camera_api_server.init_snapshots(SyntheticCaptureSource(), ttl=0.5)
+    try:
+        yield camera_api_server.app
+    finally:
+        with camera_api_server._registry_lock:
+            camera_api_server.registry, camera_api_server.snapshots = old_registry, old_snapshots
+        bench_registry.stop()
+
+
+@contextmanager
+def dir_api_app():
+    yield importlib.import_module("__api_server").app
+
+
+def _scenarios(tmp_dir):
+    def create_dir_body():
+        return json.dumps({"parent_path": tmp_dir, "dir_name": uuid.uuid4().hex})
+
+    return {
+        "camera_info": (camera_app, "GET", "/api/get_camera_info", None),
+        "camera_snapshot": (camera_app, "GET", "/api/camera_snapshot?left=0&top=0&width=320&height=240", None),
+        "create_dir": (dir_api_app, "POST", "/api/create_dir", create_dir_body),
+    }
+
+
+def run_load(port, method, path, body_fn, requests, concurrency):
+    """Send `requests` requests from `concurrency` keep-alive clients; return stats"""
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    def client(count):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        latencies, errors = [], 0
+        headers = {"Content-Type": "application/json"}
+        for _ in range(count):
+            body = body_fn() if body_fn else None
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 400:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            latencies.append(time.perf_counter() - started)
+        conn.close()
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(client, per_client))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    return {
+        "requests": len(latencies),
+        "errors": sum(e for _, e in results),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run_benchmarks(names=None, requests=500, concurrency=8, workers=None, warmup=20, backend=None):
+    """Run the selected scenarios and return {name: stats}; `backend` is "waitress" or "pooled" (default: as serve())"""
+    tmp_dir = tempfile.mkdtemp(prefix="bench_api_")
+    try:
+        scenarios = _scenarios(tmp_dir)
+        results = {}
+        for name in names or scenarios:
+            app_factory, method, path, body_fn = scenarios[name]
+            with app_factory() as app, ServerThread(app, workers or max(concurrency, 4), backend) as server:
+                if warmup:
+                    run_load(server.port, method, path, body_fn, warmup, 1)
+                results[name] = run_load(server.port, method, path, body_fn, requests, concurrency)
+        return results
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty when within tolerance)"""
+    problems = []
+    for name, stats in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if stats["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {stats['rps']} req/s < baseline {base['rps']} req/s")
+        if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {stats['p95_ms']} ms > baseline {base['p95_ms']} ms")
+    return problems
+
+
+def print_table(results):
+    print(f"{'scenario':<18}{'req':>7}{'err':>5}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in results.items():
+        print(f"{name:<18}{s['requests']:>7}{s['errors']:>5}{s['concurrency']:>6}"
+              f"{s['rps']:>10}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python HTTP APIs in-process.")
+    parser.add_argument("scenarios", nargs="*", help="camera_info, camera_snapshot, create_dir (default: all)")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Server worker threads")
+    parser.add_argument("--server", choices=["waitress", "pooled"], default=server_backend(),
+                        help="Server to run the apps on (default: the one serving.serve picks)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--save", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # Per-request access logging would dominate the numbers
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    results = run_benchmarks(args.scenarios or None, args.requests, args.concurrency, args.workers,
+                             backend=args.server)
+    print(f"server: {args.server}")
+    print_table(results)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "machine": platform.platform(),
+                       "python": platform.python_version(),
+                       "server": args.server,
+                       "results": results}, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save first")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("server", "pooled") != args.server:
+            print(f"\nBaseline was measured on {baseline.get('server', 'pooled')}, this run on {args.server}")
+        problems = compare(results, baseline, args.tolerance)
+        if problems:
+            print("\nRegressions:")
+            for p in problems:
+                print(f"  {p}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
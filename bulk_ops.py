@@ -0,0 +1,228 @@
+"""
+Selection model and parallel bulk file operations for dev_app.py.
+
+`Selection` is an insertion-ordered set of paths with O(1) membership, plus
+"select subtree". `BulkJob` runs one operation (copy, move, delete,
+re-optimize) over many paths on a thread pool in the background, so a
+Streamlit rerun only has to read its progress. Each path gets its own
+ItemResult; one failure never stops the rest.
+"""
+
+import os
+import shutil
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from screenshot_archive import transcode
+
+ItemResult = namedtuple("ItemResult", ["path", "ok", "detail"])
+
+
+class Selection:
+    """Ordered set of selected file/folder paths"""
+
+    def __init__(self, paths=()):
+        self._items = dict.fromkeys(os.path.normpath(p) for p in paths)
+
+    def __contains__(self, path):
+        return os.path.normpath(path) in self._items
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, path):
+        self._items[os.path.normpath(path)] = None
+
+    def discard(self, path):
+        self._items.pop(os.path.normpath(path), None)
+
+    def toggle(self, path):
+        if path in self:
+            self.discard(path)
+        else:
+            self.add(path)
+
+    def clear(self):
+        self._items.clear()
+
+    def add_subtree(self, root):
+        """Select `root` and everything below it; return how many paths were added"""
+        before = len(self._items)
+        self.add(root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in dirnames + filenames:
+                self.add(os.path.join(dirpath, name))
+        return len(self._items) - before
+
+    def discard_subtree(self, root):
+        root = os.path.normpath(root)
+        prefix = root + os.sep
+        for path in [p for p in self._items if p == root or p.startswith(prefix)]:
+            del self._items[path]
+
+    def top_level(self):
+        """Selected paths without those inside another selected folder"""
+        result = []
+        for path in self._items:
+            parent = os.path.dirname(path)
+            while parent and parent not in self._items and os.path.dirname(parent) != parent:
+                parent = os.path.dirname(parent)
+            if parent not in self._items:
+                result.append(path)
+        return result
+
+
+# --- operations: each takes one path and returns a short detail string ----
+
+def _destination(path, dest_dir):
+    target = os.path.join(dest_dir, os.path.basename(path))
+    if os.path.exists(target):
+        raise FileExistsError(f"{target} already exists")
+    return target
+
+
+def copy_item(path, dest_dir):
+    target = _destination(path, dest_dir)
+    if os.path.isdir(path):
+        shutil.copytree(path, target)
+    else:
+        shutil.copy2(path, target)
+    return target
+
+
+def move_item(path, dest_dir):
+    return shutil.move(path, _destination(path, dest_dir))
+
+
+def delete_item(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+    return "deleted"
+
+
+def optimize_png(path):
+    """
+    Re-encode a PNG in place with screenshot_archive.transcode (PNG only).
+
+    The new file is written only if it is smaller and decodes to the same
+    pixels. Metadata is carried over. Modes that can't be verified (16-bit,
+    CMYK, ...) are left as they are.
+    """
+    st = os.stat(path)
+    result = transcode(path, os.path.splitext(path)[0], webp=False)
+    if os.path.abspath(result["output"]) != os.path.abspath(path):
+        # transcode names its output .png; keep the file's own spelling (e.g. .PNG)
+        os.replace(result["output"], path)
+    if result["status"] != "transcoded":
+        return "already optimal"
+    os.chmod(path, st.st_mode)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return f"{result['source_size']} -> {result['size']} bytes"
+
+
+def png_files(paths):
+    """Expand selected files/folders to the PNG files they contain"""
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for name in sorted(filenames):
+                    if name.lower().endswith(".png"):
+                        seen.add(os.path.join(dirpath, name))
+        elif path.lower().endswith(".png"):
+            seen.add(path)
+    return sorted(seen)
+
+
+OPERATIONS = {
+    "copy": copy_item,
+    "move": move_item,
+    "delete": delete_item,
+    "optimize": optimize_png,
+}
+
+
+def plan_operation(name, selection):
+    """Paths the operation will visit: PNG files for "optimize", otherwise top-level items"""
+    if name == "optimize":
+        return png_files(selection.top_level())
+    return selection.top_level()
+
+
+def run_item(fn, path, *args):
+    try:
+        return ItemResult(path, True, str(fn(path, *args)))
+    except Exception as e:
+        return ItemResult(path, False, f"{type(e).__name__}: {e}")
+
+
+class BulkJob:
+    """
+    Run fn(path, *args) for every path on a thread pool in a background thread.
+
+    `done`, `total`, `results` and `finished` can be read at any time from
+    another thread (e.g. a Streamlit rerun); `cancel()` skips paths that have
+    not started yet.
+    """
+
+    def __init__(self, fn, paths, args=(), workers=8, name=None):
+        self.fn = fn
+        self.paths = list(paths)
+        self.args = tuple(args)
+        self.workers = workers
+        self.name = name or getattr(fn, "__name__", "bulk")
+        self.results = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._thread = None
+
+    @property
+    def total(self):
+        return len(self.paths)
+
+    @property
+    def done(self):
+        with self._lock:
+            return len(self.results)
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    @property
+    def errors(self):
+        with self._lock:
+            return [r for r in self.results if not r.ok]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"bulk-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _item(self, path):
+        if self._cancel.is_set():
+            return ItemResult(path, False, "cancelled")
+        return run_item(self.fn, path, *self.args)
+
+    def _run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"bulk-{self.name}") as pool:
+                futures = [pool.submit(self._item, path) for path in self.paths]
+                for future in as_completed(futures):
+                    with self._lock:
+                        self.results.append(future.result())
+        finally:
+            self._finished.set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
@@ -1,39 +1,69 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import logging
+import threading
 import traceback
 import os
 import sys
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from camera_windows import CameraWindowRegistry, Win32WindowProvider, change_to_dict
+from snapshot_cache import SnapshotService
+from frame_stream import FrameBroadcaster, mjpeg_chunks
+from serving import BlockingTimeout, run_blocking, serve
+from instrumentation import instrument_app, setup_logging
+import screen_capture
+
+# Set up logging (records are written by a background queue listener)
+setup_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
+instrument_app(app, "camera_api")  # Per-route timing, GET /metrics
+
+# Camera window registry, created on first use. Tests can install one backed
+# by a FakeWindowProvider with init_registry().
+registry = None
+_registry_lock = threading.RLock()
+
+def init_registry(provider, start=True, **kwargs):
+    """Install a CameraWindowRegistry for `provider` and (optionally) start its poller"""
+    global registry
+    new_registry = CameraWindowRegistry(provider, **kwargs)
+    new_registry.refresh()
+    if start:
+        new_registry.start()
+    with _registry_lock:
+        old, registry = registry, new_registry
+    if old:
+        old.stop()
+    return new_registry
+
+def get_registry():
+    """Return the window registry, creating the Win32-backed one if needed"""
+    if registry is not None:
+        return registry
+    with _registry_lock:
+        if registry is None:
+            # Raises ImportError when pygetwindow/pywin32 are missing
+            init_registry(Win32WindowProvider())
+        return registry
 
 @app.route('/api/get_camera_info', methods=['GET'])
 def get_camera_info():
     try:
-        # Check if we're on Windows
+        # Check if we're on Windows (a test registry works on any platform)
         is_windows = sys.platform == 'win32'
-        logger.info(f"System platform: {sys.platform}")
-        logger.info(f"Is Windows: {is_windows}")
-        
-        if not is_windows:
+        if not is_windows and registry is None:
             return jsonify({
                 "success": False,
                 "message": "Camera window detection is only available on Windows platforms. Your system is detected as: " + sys.platform,
                 "cameraWindows": []
             })
 
-        # Try to import the required modules
         try:
-            logger.info("Attempting to import pygetwindow and win32gui")
-            import pygetwindow as gw
-            import win32gui
-            logger.info("Successfully imported pygetwindow and win32gui")
+            camera_registry = get_registry()
         except ImportError as e:
             logger.error(f"Required modules not available: {str(e)}")
             return jsonify({
@@ -43,47 +73,8 @@ def get_camera_info():
                 "cameraWindows": []
             })
 
-        # Find camera windows
-        camera_windows = []
-        
-        # Get all windows with "Camera" in the title
-        windows = gw.getWindowsWithTitle("Camera")
-        if not windows:
-            logger.info("Camera app not found. Make sure it's running.")
-            return jsonify({
-                "success": False,
-                "message": "No camera windows found",
-                "cameraWindows": []
-            })
-
-        for window in windows:
-            if window.title.lower().startswith("camera"):
-                hwnd = window._hWnd
-                rect = win32gui.GetWindowRect(hwnd)
-                x, y, right, bottom = rect
-                width = right - x
-                height = bottom - y
-
-                logger.info(f"Window Handle (HWND): {hwnd}")
-                logger.info(f"Title: {window.title}")
-                logger.info(f"Position: ({x}, {y})")
-                logger.info(f"Size: {width} x {height}")
-                
-                # Add camera window info to results array
-                camera_windows.append({
-                    "hwnd": str(hwnd),
-                    "title": window.title,
-                    "position": {
-                        "left": x,
-                        "top": y
-                    },
-                    "size": {
-                        "width": width,
-                        "height": height
-                    }
-                })
-
-        # Return the results
+        # Answer from the cached registry; the background poller keeps it fresh
+        camera_windows = camera_registry.payload()
         if camera_windows:
             return jsonify({
                 "success": True,
@@ -93,10 +84,10 @@ def get_camera_info():
         else:
             return jsonify({
                 "success": False,
-                "message": "No camera windows found with expected title",
+                "message": "No camera windows found",
                 "cameraWindows": []
             })
-            
+
     except Exception as e:
         logger.error(f"CAMERA DETECTION ERROR: {str(e)}")
         logger.error(traceback.format_exc())
@@ -105,8 +96,132 @@ def get_camera_info():
             "error": str(e)
         }), 500
 
+@app.route('/api/camera_events', methods=['GET'])
+def camera_events():
+    """Window change events (added/removed/moved/resized) newer than ?since=<seq>"""
+    if registry is None:
+        return jsonify({"success": False, "message": "Camera window registry is not running", "events": []})
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({"success": False, "error": "since must be an integer"}), 400
+    return jsonify({
+        "success": True,
+        "seq": registry.seq,
+        "events": [change_to_dict(e) for e in registry.events_since(since)]
+    })
+
+# Snapshot service, created on first use. CAMERA_CAPTURE=synthetic draws test
+# frames instead of grabbing the screen (useful off Windows and in tests).
+snapshots = None
+
+def init_snapshots(capture=None, ttl=None):
+    """Install a SnapshotService; capture defaults to a real (monitor-aware) screen grab"""
+    global snapshots
+    if capture is None:
+        if os.environ.get('CAMERA_CAPTURE') == 'synthetic':
+            capture = screen_capture.SyntheticCaptureSource()
+        else:
+            capture = screen_capture.grab
+    if ttl is None:
+        ttl = float(os.environ.get('SNAPSHOT_TTL', 0.5))
+    snapshots = SnapshotService(capture, ttl=ttl)
+    return snapshots
+
+def get_snapshots():
+    with _registry_lock:
+        if snapshots is None:
+            init_snapshots()
+        return snapshots
+
+def snapshot_bbox(args):
+    """Resolve ?region=<name> or ?left&top&width&height (defaults from snap_config.json)"""
+    regions = screen_capture.load_snap_regions()
+    region = args.get('region')
+    if region:
+        if region not in regions:
+            raise ValueError(f"Unknown region: {region}. Available: {', '.join(regions)}")
+        return regions[region]
+    left, top, right, bottom = regions['camera_snap']
+    left = int(args.get('left', left))
+    top = int(args.get('top', top))
+    width = int(args.get('width', right - left))
+    height = int(args.get('height', bottom - top))
+    if width <= 0 or height <= 0:
+        raise ValueError("width and height must be positive")
+    return (left, top, left + width, top + height)
+
+@app.route('/api/camera_snapshot', methods=['GET'])
+def camera_snapshot():
+    """
+    PNG snapshot of a screen region. Identical concurrent requests share one
+    capture and results are reused for SNAPSHOT_TTL seconds; clients can send
+    If-None-Match with the returned ETag to get a 304.
+    """
+    try:
+        bbox = snapshot_bbox(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        service = get_snapshots()
+        # Capture + PNG encode run on the bounded blocking executor
+        snapshot = run_blocking(service.get, bbox)
+    except BlockingTimeout as e:
+        logger.error(f"CAMERA SNAPSHOT TIMEOUT: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 504
+    except Exception as e:
+        logger.error(f"CAMERA SNAPSHOT ERROR: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    max_age = max(0, int(service.cache.ttl))
+    headers = {"ETag": f'"{snapshot.etag}"', "Cache-Control": f"private, max-age={max_age}"}
+    if snapshot.etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+    return Response(snapshot.png, mimetype='image/png', headers=headers)
+
+# One broadcaster (capture loop) per streamed region, shared by all viewers;
+# dropped again when its last viewer leaves, so one-off regions don't pile up
+broadcasters = {}
+
+def get_broadcaster(bbox):
+    """(broadcaster, subscription) for a region, subscribed under the registry lock"""
+    bbox = tuple(bbox)
+    with _registry_lock:
+        broadcaster = broadcasters.get(bbox)
+        if broadcaster is None:
+            fps = float(os.environ.get('CAMERA_STREAM_FPS', 10))
+            broadcaster = FrameBroadcaster(get_snapshots().capture, bbox, fps=fps, on_idle=drop_broadcaster)
+            broadcasters[bbox] = broadcaster
+        # Subscribing before the lock is released means drop_broadcaster can't
+        # remove the entry between lookup and subscription
+        return broadcaster, broadcaster.subscribe()
+
+def drop_broadcaster(broadcaster):
+    with _registry_lock:
+        # A viewer may have joined since it went idle
+        if broadcaster.subscriber_count == 0 and broadcasters.get(broadcaster.bbox) is broadcaster:
+            del broadcasters[broadcaster.bbox]
+
+@app.route('/api/camera_stream', methods=['GET'])
+def camera_stream():
+    """
+    Live MJPEG (multipart/x-mixed-replace) stream of a screen region, taking
+    the same region parameters as /api/camera_snapshot. All viewers of a region
+    share one capture loop; slow viewers skip frames.
+    """
+    try:
+        bbox = snapshot_bbox(request.args)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    broadcaster, sub = get_broadcaster(bbox)
+    return Response(mjpeg_chunks(broadcaster, sub=sub),
+                    mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={"Cache-Control": "no-store"})
+
 if __name__ == '__main__':
     # Get port from environment variable or use default
     port = int(os.environ.get('PORT', 3003))
-    app.run(host='0.0.0.0', port=port, debug=True)
     print(f"Server running on http://localhost:{port}")
+    # Threaded production server; SERVER_MODE=dev for the Flask debug server
+    serve(app, host='0.0.0.0', port=port)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Menu trees of several camera bodies with shared setting records.
+
+Every body folder under tree-view-app/public with a modes.json (α7RV, and
+whatever is captured next) is added to one `CameraCatalog`:
+
+  records  content hash -> menu JSON, stored once however many bodies or
+           paths use it
+  bodies   body -> {"base", "entries", "removed"}: the first body maps every
+           path to a record hash; later bodies keep only the paths whose
+           record differs from their base body, plus the paths they lack
+
+So a second body that shares most menus with the first costs only its
+differences, in memory and in the saved catalog. One index over the
+(setting, option) pairs of all records answers cross-body questions:
+
+    catalog = get_catalog()
+    catalog.bodies_with("Dynamic SteadyShot")     # ["α7RV", ...]
+    catalog.find("SteadyShot Type")               # [Match(body, path, setting, option), ...]
+
+    python camera_catalog.py "Dynamic SteadyShot"
+    python camera_catalog.py --save catalog.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+from menu_tree import MENU_ROOT, load_menu_json
+
+PUBLIC_ROOT = os.path.dirname(MENU_ROOT)
+
+CATALOG_VERSION = 1
+
+Match = namedtuple("Match", ["body", "path", "setting", "option"])
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+_INDEX_SKIP_RE = re.compile(r"^(PAGE_\d+|modes)\.json$", re.IGNORECASE)
+
+
+def tokenize(text):
+    return WORD_RE.findall(str(text).lower())
+
+
+def record_hash(menu):
+    """Content address of a menu JSON object (key order and whitespace ignored)"""
+    text = json.dumps(menu, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def discover_bodies(public_root=PUBLIC_ROOT):
+    """Body folders (those with a modes.json) under `public_root`, sorted"""
+    return sorted(name for name in os.listdir(public_root)
+                  if os.path.isfile(os.path.join(public_root, name, "modes.json")))
+
+
+def read_body(root):
+    """{relative path: menu JSON} for every JSON file of one body's tree"""
+    menus = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                menus[os.path.relpath(path, root).replace(os.sep, "/")] = load_menu_json(path)
+            except (OSError, ValueError):
+                continue
+    return menus
+
+
+def menu_facts(menu):
+    """(setting, option) pairs of one menu record; option is None for the setting itself"""
+    facts = []
+    if menu.get("menu"):
+        facts.append((menu["menu"], None))
+        for item in menu.get("items") or []:
+            if isinstance(item, dict) and item.get("label"):
+                facts.append((menu["menu"], item["label"]))
+    for setting in (menu.get("submenu") or {}).get("settings", []):
+        if setting.get("name"):
+            facts.append((setting["name"], None))
+            facts.extend((setting["name"], str(option)) for option in setting.get("options") or [])
+        facts.extend(menu_facts(setting))  # nested submenus
+    return list(dict.fromkeys(facts))
+
+
+class CameraCatalog:
+    def __init__(self, records=None, bodies=None):
+        self.records = records if records is not None else {}
+        self.bodies = bodies if bodies is not None else {}
+        self._entries = {}          # body -> resolved {path: hash}
+        self._facts = []            # (record hash, setting, option)
+        self._postings = {}         # token -> set of fact ids
+        self._indexed = set()       # record hashes already in the index
+        self._record_paths = None   # record hash -> [(body, path)]
+        for body in self.bodies:
+            self._index_body(body)
+
+    @classmethod
+    def build(cls, public_root=PUBLIC_ROOT, bodies=None):
+        catalog = cls()
+        for body in bodies or discover_bodies(public_root):
+            catalog.add_body(body, os.path.join(public_root, body))
+        return catalog
+
+    def add_body(self, body, root, base=None):
+        """
+        Add (or replace) `body` from the tree at `root`.
+
+        It is stored as an overlay on `base` (default: the first body in the
+        catalog) holding only the paths whose record differs.
+        """
+        if base is None:
+            base = next((name for name in self.bodies if name != body), None)
+        if base is not None and base not in self.bodies:
+            raise ValueError(f"Unknown base body: {base}")
+        dependents = [name for name, spec in self.bodies.items() if spec["base"] == body]
+        if dependents:
+            raise ValueError(f"{body} is the base of {', '.join(dependents)}")
+        entries = {}
+        for path, menu in read_body(root).items():
+            digest = record_hash(menu)
+            self.records.setdefault(digest, menu)
+            entries[path] = digest
+        if base is None:
+            self.bodies[body] = {"base": None, "entries": entries, "removed": []}
+        else:
+            inherited = self.entries(base)
+            self.bodies[body] = {
+                "base": base,
+                "entries": {path: digest for path, digest in entries.items() if inherited.get(path) != digest},
+                "removed": sorted(path for path in inherited if path not in entries),
+            }
+        self._entries.clear()
+        self._index_body(body)
+
+    def entries(self, body):
+        """{path: record hash} for `body`, with its base bodies' entries applied"""
+        resolved = self._entries.get(body)
+        if resolved is None:
+            spec = self.bodies.get(body)
+            if spec is None:
+                raise KeyError(f"Unknown body: {body}")
+            resolved = dict(self.entries(spec["base"])) if spec["base"] else {}
+            for path in spec.get("removed", []):
+                resolved.pop(path, None)
+            resolved.update(spec["entries"])
+            self._entries[body] = resolved
+        return resolved
+
+    def menu(self, body, path):
+        """Menu JSON at `path` (relative to the body folder) for `body`"""
+        return self.records[self.entries(body)[path]]
+
+    def _index_body(self, body):
+        for path, digest in self.entries(body).items():
+            if digest in self._indexed or _INDEX_SKIP_RE.match(path.rsplit("/", 1)[-1]):
+                continue
+            self._indexed.add(digest)
+            for setting, option in menu_facts(self.records[digest]):
+                fact_id = len(self._facts)
+                self._facts.append((digest, setting, option))
+                for token in set(tokenize(setting)) | set(tokenize(option or "")):
+                    self._postings.setdefault(token, set()).add(fact_id)
+        self._record_paths = None
+
+    def _paths_of(self, digest):
+        if self._record_paths is None:
+            record_paths = {}
+            for body in self.bodies:
+                for path, record in self.entries(body).items():
+                    record_paths.setdefault(record, []).append((body, path))
+            self._record_paths = record_paths
+        return self._record_paths.get(digest, [])
+
+    def find(self, query, body=None):
+        """
+        Settings and options matching every word of `query`, in all bodies (or one).
+
+        "Dynamic SteadyShot" matches the option "Dynamic" of "SteadyShot Type".
+        """
+        tokens = tokenize(query)
+        postings = [self._postings.get(token) for token in tokens]
+        if not tokens or not all(postings):
+            return []
+        fact_ids = set(min(postings, key=len)).intersection(*postings)
+        matches = set()
+        for fact_id in fact_ids:
+            digest, setting, option = self._facts[fact_id]
+            for match_body, path in self._paths_of(digest):
+                if body is None or match_body == body:
+                    matches.add(Match(match_body, path, setting, option))
+        return sorted(matches, key=lambda m: (m.body, m.path, m.setting, m.option or ""))
+
+    def bodies_with(self, query):
+        """Bodies with a setting or option matching `query`"""
+        return sorted({match.body for match in self.find(query)})
+
+    def stats(self):
+        """Sizes showing how much the bodies share"""
+        return {
+            "bodies": len(self.bodies),
+            "records": len(self.records),
+            "paths": sum(len(self.entries(body)) for body in self.bodies),
+            "stored_entries": sum(len(spec["entries"]) + len(spec.get("removed", [])) for spec in self.bodies.values()),
+        }
+
+    def to_dict(self):
+        # Only records some body still uses
+        used = {digest for body in self.bodies for digest in self.entries(body).values()}
+        return {"version": CATALOG_VERSION, "bodies": self.bodies,
+                "records": {digest: menu for digest, menu in self.records.items() if digest in used}}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != CATALOG_VERSION:
+            raise ValueError(f"Unsupported catalog version: {data.get('version')}")
+        return cls(data["records"], data["bodies"])
+
+    def save(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(refresh=False):
+    """Process-wide catalog of the bodies under PUBLIC_ROOT"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None or refresh:
+            _catalog = CameraCatalog.build()
+        return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the menu trees of all camera bodies")
+    parser.add_argument("query", nargs="*", help="Setting or option to look for, e.g. Dynamic SteadyShot")
+    parser.add_argument("--root", default=PUBLIC_ROOT, help="Folder holding one subfolder per body")
+    parser.add_argument("--load", help="Read a saved catalog instead of the body folders")
+    parser.add_argument("--save", help="Write the catalog (shared records + per-body overlays) to this file")
+    args = parser.parse_args()
+
+    catalog = CameraCatalog.load(args.load) if args.load else CameraCatalog.build(args.root)
+    if args.save:
+        catalog.save(args.save)
+    if args.query:
+        for match in catalog.find(" ".join(args.query)):
+            option = f" = {match.option}" if match.option is not None else ""
+            print(f"{match.body}: {match.setting}{option}  ({match.path})")
+    else:
+        print(", ".join(f"{key}: {value}" for key, value in catalog.stats().items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Cached registry of Camera app windows.
+
+`CameraWindowRegistry` keeps the last known geometry of every window whose
+title starts with "Camera". A background poller refreshes it from a window
+provider, polling quickly while windows are moving and backing off while they
+are still. Each move, resize, appearance or disappearance is recorded as a
+change event and passed to listeners, so request handlers can answer from
+memory instead of enumerating windows on every call.
+
+Providers only need a `list_windows()` method returning WindowInfo tuples;
+`FakeWindowProvider` lets the cache be exercised on Linux.
+"""
+
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+WindowInfo = namedtuple("WindowInfo", ["hwnd", "title", "left", "top", "width", "height"])
+
+# kind is one of "added", "removed", "moved", "resized"; previous is None for "added"
+WindowChange = namedtuple("WindowChange", ["seq", "kind", "window", "previous", "timestamp"])
+
+
+def window_to_dict(window):
+    """JSON shape used by /api/get_camera_info"""
+    return {
+        "hwnd": str(window.hwnd),
+        "title": window.title,
+        "position": {"left": window.left, "top": window.top},
+        "size": {"width": window.width, "height": window.height},
+    }
+
+
+def change_to_dict(change):
+    return {
+        "seq": change.seq,
+        "kind": change.kind,
+        "timestamp": change.timestamp,
+        "window": window_to_dict(change.window),
+        "previous": window_to_dict(change.previous) if change.previous else None,
+    }
+
+
+class Win32WindowProvider:
+    """Enumerates Camera windows with pygetwindow/win32gui (Windows only)"""
+
+    def __init__(self, title_prefix="Camera"):
+        # Import once here instead of on every request; raises ImportError
+        # when the Windows packages are missing.
+        import pygetwindow
+        import win32gui
+        self._gw = pygetwindow
+        self._win32gui = win32gui
+        self.title_prefix = title_prefix
+
+    def list_windows(self):
+        windows = []
+        for window in self._gw.getWindowsWithTitle(self.title_prefix):
+            if window.title.lower().startswith(self.title_prefix.lower()):
+                hwnd = window._hWnd
+                x, y, right, bottom = self._win32gui.GetWindowRect(hwnd)
+                windows.append(WindowInfo(hwnd, window.title, x, y, right - x, bottom - y))
+        return windows
+
+
+class FakeWindowProvider:
+    """In-memory window provider for tests and non-Windows development"""
+
+    def __init__(self, windows=None):
+        self._windows = list(windows or [])
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def set_windows(self, windows):
+        with self._lock:
+            self._windows = list(windows)
+
+    def list_windows(self):
+        with self._lock:
+            self.calls += 1
+            return list(self._windows)
+
+
+class CameraWindowRegistry:
+    """
+    Camera window geometry cache with change detection.
+
+    `windows()` and `payload()` never touch the provider; they return the
+    snapshot taken by the last `refresh()`. `start()` runs `refresh()` on a
+    daemon thread whose interval halves back to `min_interval` whenever
+    something changed and doubles up to `max_interval` while nothing does.
+    """
+
+    def __init__(self, provider, min_interval=0.1, max_interval=2.0, history=256):
+        self.provider = provider
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._payload = []
+        self._events = deque(maxlen=history)
+        self._seq = 0
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_refresh = None
+        self.last_error = None
+
+    def add_listener(self, callback):
+        """Register callback(change) to be called for every WindowChange"""
+        self._listeners.append(callback)
+
+    def windows(self):
+        with self._lock:
+            return list(self._windows.values())
+
+    def payload(self):
+        """Pre-built JSON-ready list of camera windows"""
+        with self._lock:
+            return self._payload
+
+    def events_since(self, seq=0):
+        """Change events with a sequence number greater than `seq`"""
+        with self._lock:
+            return [e for e in self._events if e.seq > seq]
+
+    @property
+    def seq(self):
+        with self._lock:
+            return self._seq
+
+    def refresh(self):
+        """Poll the provider once; return the list of WindowChange events produced"""
+        with span("window_enumeration"):
+            current = {w.hwnd: w for w in self.provider.list_windows()}
+        now = time.time()
+        changes = []
+        with self._lock:
+            previous = self._windows
+            for hwnd, window in current.items():
+                old = previous.get(hwnd)
+                if old is None:
+                    changes.append(self._record("added", window, None, now))
+                    continue
+                if (old.width, old.height) != (window.width, window.height):
+                    changes.append(self._record("resized", window, old, now))
+                elif (old.left, old.top) != (window.left, window.top):
+                    changes.append(self._record("moved", window, old, now))
+            for hwnd, old in previous.items():
+                if hwnd not in current:
+                    changes.append(self._record("removed", old, old, now))
+            if changes or self.last_refresh is None:
+                self._windows = current
+                self._payload = [window_to_dict(w) for w in current.values()]
+            self.last_refresh = now
+        for change in changes:
+            logger.debug(f"Camera window {change.kind}: {change.window.title} "
+                        f"({change.window.left}, {change.window.top}) "
+                        f"{change.window.width} x {change.window.height}")
+            for callback in self._listeners:
+                try:
+                    callback(change)
+                except Exception:
+                    logger.exception("Camera window listener failed")
+        return changes
+
+    def _record(self, kind, window, previous, timestamp):
+        self._seq += 1
+        change = WindowChange(self._seq, kind, window, previous, timestamp)
+        self._events.append(change)
+        return change
+
+    def _next_interval(self, changed):
+        if changed:
+            return self.min_interval
+        return min(self.interval * 2, self.max_interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                changed = bool(self.refresh())
+                self.last_error = None
+            except Exception as e:
+                logger.error(f"Camera window refresh failed: {e}")
+                self.last_error = str(e)
+                changed = False
+            self.interval = self._next_interval(changed)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the background poller (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="camera-window-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
@@ -1,7 +1,8 @@
 import os
 import streamlit as st
-from include.tree import build_tree, render_tree
+from include.tree import build_allowed_tree, build_tree, render_tree
 from include.search_bar import render_search_bar
+from include.mode_filter import render_mode_filter
 from include.chat import render_chat
 
 # --- Main App ---
@@ -27,6 +28,7 @@ if "filter" not in st.session_state:
 
 # --- Render search bar ---
 filter_value, search_clicked, reset_clicked = render_search_bar()
+allowed_paths = render_mode_filter()
 
 # Handle reset button click
 if reset_clicked:
@@ -69,7 +71,13 @@ elif search_clicked and filter_value.strip():
     st.session_state["search_active"] = True
     st.session_state["search_filter"] = filter_value.strip()
 
-if st.session_state["search_active"] and st.session_state["search_filter"]:
+if allowed_paths is not None:
+    # Mode/option filter: only settings available in the chosen modes
+    if st.session_state["search_active"] and st.session_state["search_filter"]:
+        needle = st.session_state["search_filter"].lower()
+        allowed_paths = {p for p in allowed_paths if needle in os.path.basename(p).lower()}
+    tree = build_allowed_tree(root_path, allowed_paths)
+elif st.session_state["search_active"] and st.session_state["search_filter"]:
     tree = build_filtered_tree(root_path, st.session_state["search_filter"])
 else:
     tree = build_tree(root_path)
@@ -152,6 +160,10 @@ if st.session_state.get("selected"):
         selected_name = os.path.basename(selected_path)
         # Add to chat queue
         st.session_state["chat_selection_queue"].append(selected_name)
+        # Full path goes into the LLM context (see include/chat.py)
+        context_paths = st.session_state.setdefault("chat_context_paths", [])
+        if selected_path not in context_paths:
+            context_paths.append(selected_path)
         # Mark that we've processed this selection
         st.session_state["last_render_selection"] = st.session_state["selected"]
 
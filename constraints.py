@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Setting dependencies of the α7RV menu, compiled for fast preset validation.
+
+The menu JSON states dependencies in prose and in a few structured
+"condition" objects, e.g.
+
+    "Sets the focal length ... when [SteadyShot Adjust.] is set to [Manual]."
+    "You cannot select the folder when [Folder Name] ... is set to [Date Form]"
+    "[HLG Still Image] is fixed to [Off]: [JPEG/HEIF Switch] is set to [JPEG] ..."
+    "In [Pixel Shift Multi Shoot.], some settings are locked as follows: ..."
+
+`extract_rules()` turns these into `Rule`s. Each rule reads "when <trigger> has
+one of these values, <effect> must have one of those". A "requires" rule says
+that a setting only takes effect if a prerequisite holds. A "forces" rule
+says that a setting is pinned while another setting has a given value.
+
+`ConstraintEngine` compiles the rules once into integer arrays. Checking a
+preset of hundreds of (setting, value) pairs is then a handful of NumPy
+indexing operations:
+
+    engine = get_engine()
+    report = engine.validate({"Focal Length": "50mm", "SteadyShot Adjust.": "Auto"})
+    report.conflicts   # Focal Length needs SteadyShot Adjust. = Manual
+    engine.validate({"Focal Length": "50mm"}, complete=True).changes
+
+    python constraints.py                # list the extracted rules
+"""
+
+import argparse
+import os
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from menu_tree import MENU_ROOT, MOVIE_TAB, load_menu_json, menu_tab, tab_name
+
+# kind: "requires" (target only applies when setting is in values) or
+#       "forces" (while setting is in values, target is pinned to target_values)
+# target_values None means "any value other than Off"
+# Conflicts for a value of the other tab's same-named setting carry a "value" rule
+Rule = namedtuple("Rule", ["kind", "target", "target_values", "setting", "values", "negate", "source", "text"])
+
+# A problem found in a preset; value is the preset's value for `setting`
+Conflict = namedtuple("Conflict", ["setting", "value", "required", "rule", "message"])
+Change = namedtuple("Change", ["setting", "value", "rule", "message"])
+Report = namedtuple("Report", ["ok", "conflicts", "changes", "preset", "unknown"])
+
+OFF_VALUES = {"off"}
+
+NAME = r"\[([^\]]+)\](?:\s+under\s+\[[^\]]+\])?"
+VALUES = r"((?:\[[^\]]+\])(?:\s*(?:,|or)\s*\[[^\]]+\])*)"
+IS_SET_RE = re.compile(NAME + r"\s+is set to\s+" + VALUES)
+WHEN_SET_RE = re.compile(r"\bwhen\s+" + NAME + r"\s+is set to\s+" + VALUES, re.IGNORECASE)
+CANNOT_WHEN_RE = re.compile(r"\bYou cannot [^\[\].]*?\bwhen\s+" + NAME + r"\s+is set to\s+" + VALUES)
+UNAVAILABLE_RE = re.compile(NAME + r"\s+is unavailable in the following situations:")
+FIXED_RE = re.compile(NAME + r"\s+is fixed to\s+\[([^\]]+)\]:")
+LOCKED_RE = re.compile(r"In\s+\[([^\]]+)\],\s+some settings are locked as follows:")
+LOCKED_ITEM_RE = re.compile(r"\s*" + NAME + r":\s*\[([^\]]+)\]")
+SITUATION_RE = re.compile(r"[\s.]*" + IS_SET_RE.pattern + r"\.?")
+
+
+def normalize(name):
+    """Comparison key for setting names and values: case, spacing, brackets and a trailing dot ignored"""
+    return " ".join(str(name).strip().strip("[]").lower().split()).rstrip(".").strip()
+
+
+def split_values(text):
+    return re.findall(r"\[([^\]]+)\]", text)
+
+
+def _texts(menu):
+    """Prose fields of a menu JSON object"""
+    texts = [menu.get(key) for key in ("description", "note", "hint")]
+    texts.extend(item.get("description") for item in menu.get("items", []) if isinstance(item, dict))
+    condition = menu.get("condition")
+    if isinstance(condition, dict) and isinstance(condition.get("condition"), str):
+        texts.append(condition["condition"])
+    return [t for t in texts if isinstance(t, str) and t]
+
+
+def _quote(values):
+    return " or ".join(f"[{v}]" for v in values)
+
+
+def _situations(text, pos):
+    """(setting, values) for each "[A] is set to [B]" listed from `pos` on"""
+    found = []
+    while True:
+        match = SITUATION_RE.match(text, pos)
+        if not match:
+            return found
+        found.append((match.group(1), split_values(match.group(2))))
+        pos = match.end()
+
+
+def rules_for_menu(menu, source=""):
+    """Rules stated by one menu JSON object (a leaf setting file)"""
+    owner = menu.get("menu")
+    if not owner:
+        return []
+    rules = []
+    description = menu.get("description") or ""
+    if description.startswith("Sets"):
+        match = WHEN_SET_RE.search(description)
+        if match:
+            rules.append(Rule("requires", owner, None, match.group(1), tuple(split_values(match.group(2))),
+                              False, source, match.group(0)))
+    for text in _texts(menu):
+        for match in CANNOT_WHEN_RE.finditer(text):
+            rules.append(Rule("requires", owner, None, match.group(1), tuple(split_values(match.group(2))),
+                              True, source, match.group(0)))
+        for match in UNAVAILABLE_RE.finditer(text):
+            for setting, values in _situations(text, match.end()):
+                rules.append(Rule("requires", match.group(1), None, setting, tuple(values), True, source,
+                                  f"{match.group(0)} [{setting}] is set to {_quote(values)}"))
+        for match in FIXED_RE.finditer(text):
+            for setting, values in _situations(text, match.end()):
+                rules.append(Rule("forces", match.group(1), (match.group(2),), setting, tuple(values), False,
+                                  source, f"{match.group(0)} [{setting}] is set to {_quote(values)}"))
+        for match in LOCKED_RE.finditer(text):
+            pos = match.end()
+            while True:
+                item = LOCKED_ITEM_RE.match(text, pos)
+                if not item:
+                    break
+                rules.append(Rule("forces", item.group(1), (item.group(2),), match.group(1), ("Off",), True,
+                                  source, f"{match.group(0)} {item.group(0).strip()}"))
+                pos = item.end()
+
+    condition = menu.get("condition")
+    if isinstance(condition, dict):
+        for entry in condition.get("settings") or []:
+            setting = split_values(entry.get("setting", ""))
+            if setting:
+                rules.append(Rule("requires", owner, None, setting[0], tuple(split_values(entry.get("value", ""))),
+                                  False, source, condition.get("condition") or ""))
+        for key, value in condition.items():
+            # {"file_format": {"not": "JPEG"}}: keys naming another setting
+            if isinstance(value, dict) and set(value) == {"not"}:
+                rules.append(Rule("requires", owner, None, key.replace("_", " "), (str(value["not"]),), True,
+                                  source, f"{key} not {value['not']}"))
+    return rules
+
+
+def mentioned_values(menu):
+    """{setting: [values]} for every "[A] is set to [B]" in the prose, to learn values of settings without a file"""
+    found = {}
+    for text in _texts(menu):
+        for match in IS_SET_RE.finditer(text):
+            found.setdefault(match.group(1), []).extend(split_values(match.group(2)))
+    return found
+
+
+def extract_rules(root=MENU_ROOT):
+    """
+    (rules, domains) from the menu tree; domains maps setting name -> known
+    values in menu order.
+
+    A name used by both a stills and a movie setting (the two [File Format]
+    menus) becomes two settings: the movie one is named "Movie/File Format",
+    and names in a movie menu's rules and prose refer to it.
+    """
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort(key=str.lower)
+        for filename in sorted(filenames, key=str.lower):
+            if not filename.endswith(".json") or filename == "modes.json":
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                menu = load_menu_json(path)
+            except (OSError, ValueError):
+                continue
+            if menu.get("menu"):
+                found.append((os.path.relpath(path, root), menu, menu_tab(menu)))
+
+    tabs = {}
+    for _, menu, tab in found:
+        tabs.setdefault(normalize(menu["menu"]), set()).add(tab)
+    shared = {key for key, found_in in tabs.items() if len(found_in) > 1}
+
+    def scoped(name, tab):
+        return tab_name(name, MOVIE_TAB) if tab == MOVIE_TAB and normalize(name) in shared else name
+
+    rules = []
+    domains = {}
+    for source, menu, tab in found:
+        labels = [item["label"] for item in menu.get("items", []) if isinstance(item, dict) and item.get("label")]
+        domains.setdefault(scoped(menu["menu"], tab), []).extend(labels)
+        for setting, values in mentioned_values(menu).items():
+            domains.setdefault(scoped(setting, tab), []).extend(values)
+        rules.extend(rule._replace(target=scoped(rule.target, tab), setting=scoped(rule.setting, tab))
+                     for rule in rules_for_menu(menu, source))
+    return rules, domains
+
+
+class ConstraintEngine:
+    """
+    Rules compiled to arrays. Every rule becomes "if state[trigger] is in
+    trigger_mask then state[effect] must be in effect_mask"; a preset is a
+    vector of value indexes (-1 = not set), so checking all rules at once is
+    array indexing.
+    """
+
+    def __init__(self, rules, domains):
+        self.rules = []
+        names = {}       # normalized -> display name
+        values = {}      # normalized setting -> {normalized value: display value}
+
+        def add_setting(name):
+            key = normalize(name)
+            names.setdefault(key, name.strip().strip("[]"))
+            return values.setdefault(key, {})
+
+        def add_values(name, vals):
+            domain = add_setting(name)
+            for value in vals:
+                domain.setdefault(normalize(value), value)
+
+        for name, vals in domains.items():
+            add_values(name, vals)
+        for rule in rules:
+            add_values(rule.setting, rule.values)
+            add_values(rule.target, rule.target_values or ())
+
+        self.settings = list(names)
+        self.display = names
+        self._setting_index = {key: i for i, key in enumerate(self.settings)}
+        self.values = [list(values[key]) for key in self.settings]
+        self.value_display = [list(values[key].values()) for key in self.settings]
+        self._value_index = [{v: i for i, v in enumerate(vals)} for vals in self.values]
+        # One column per known value plus a last one for values the menu doesn't list (e.g. "50mm")
+        self.other = max([len(v) for v in self.values] + [0])
+        width = self.other + 1
+
+        seen = set()
+        trigger, effect, trigger_mask, effect_mask = [], [], [], []
+        for rule in rules:
+            target = self._setting_index[normalize(rule.target)]
+            setting = self._setting_index[normalize(rule.setting)]
+            cond = np.zeros(width, dtype=bool)
+            cond[[self._value_index[setting][normalize(v)] for v in rule.values]] = True
+            if rule.negate:
+                cond = ~cond
+            pinned = np.zeros(width, dtype=bool)
+            if rule.target_values is None:
+                pinned[:len(self.values[target])] = [v not in OFF_VALUES for v in self.values[target]]
+                pinned[self.other] = True
+            else:
+                pinned[[self._value_index[target][normalize(v)] for v in rule.target_values]] = True
+            if rule.kind == "requires":
+                row = (target, pinned, setting, cond)
+            else:
+                row = (setting, cond, target, pinned)
+            key = (row[0], row[1].tobytes(), row[2], row[3].tobytes())
+            if key in seen or row[0] == row[2]:
+                continue
+            seen.add(key)
+            self.rules.append(rule)
+            trigger.append(row[0])
+            trigger_mask.append(row[1])
+            effect.append(row[2])
+            effect_mask.append(row[3])
+
+        self.trigger = np.array(trigger, dtype=np.intp)
+        self.effect = np.array(effect, dtype=np.intp)
+        self.trigger_mask = np.array(trigger_mask, dtype=bool).reshape(len(self.rules), width)
+        self.effect_mask = np.array(effect_mask, dtype=bool).reshape(len(self.rules), width)
+        # Only listed values can be filled in when completing a preset
+        self._fillable = self.effect_mask.copy()
+        self._fillable[:, self.other] = False
+        for r, setting in enumerate(self.effect):
+            self._fillable[r, len(self.values[setting]):] = False
+        self._rows = np.arange(len(self.rules))
+
+        # Values of the same-named setting in the other tab, e.g. [XAVC HS 8K] given for the stills [File Format]
+        self._elsewhere = {}
+        prefix = normalize(tab_name("", MOVIE_TAB))
+        for key in self.settings:
+            other = self._setting_index.get(key[len(prefix):]) if key.startswith(prefix) else None
+            if other is None:
+                continue
+            movie = self._setting_index[key]
+            for index, sibling in ((movie, other), (other, movie)):
+                self._elsewhere.setdefault(index, {}).update(
+                    (value, self.display[self.settings[sibling]])
+                    for value in self.values[sibling] if value not in self._value_index[index])
+
+    @classmethod
+    def from_tree(cls, root=MENU_ROOT):
+        return cls(*extract_rules(root))
+
+    def encode(self, preset):
+        """
+        (state vector, unlisted values, unknown entries) for a {setting: value}
+        dict or (setting, value) pairs. A known setting with a value the menu
+        doesn't list is kept as "other" and its text returned in `unlisted`.
+        """
+        items = preset.items() if isinstance(preset, dict) else preset
+        state = np.full(len(self.settings), -1, dtype=np.intp)
+        unlisted = {}
+        unknown = []
+        for name, value in items:
+            index = self._setting_index.get(normalize(name))
+            if index is None:
+                unknown.append((name, value))
+                continue
+            value_index = self._value_index[index].get(normalize(value))
+            if value_index is None:
+                value_index = self.other
+                unlisted[index] = value
+            state[index] = value_index
+        return state, unlisted, unknown
+
+    def _value_name(self, setting, value, unlisted):
+        return unlisted.get(setting, "") if value == self.other else self.value_display[setting][value]
+
+    def decode(self, state, unlisted=None):
+        unlisted = unlisted or {}
+        return {self.display[self.settings[i]]: self._value_name(i, v, unlisted) for i, v in enumerate(state) if v >= 0}
+
+    def _evaluate(self, state):
+        """(rules violated, rules whose effect setting is missing) for a state vector"""
+        trigger_value = state[self.trigger]
+        effect_value = state[self.effect]
+        active = (trigger_value >= 0) & self.trigger_mask[self._rows, trigger_value]
+        satisfied = self.effect_mask[self._rows, effect_value]
+        violated = active & (effect_value >= 0) & ~satisfied
+        missing = active & (effect_value < 0)
+        return violated, missing
+
+    def _allowed(self, rule_index):
+        setting = self.effect[rule_index]
+        return [self.value_display[setting][v] for v in np.flatnonzero(self._fillable[rule_index])]
+
+    def _describe(self, rule_index, state, unlisted):
+        trigger = self.trigger[rule_index]
+        trigger_value = self._value_name(trigger, state[trigger], unlisted)
+        return f"[{self.display[self.settings[trigger]]}] = [{trigger_value}] (rule: {self.rules[rule_index].text})"
+
+    def _fill(self, rule_indexes):
+        """{setting: value index} satisfying all the given missing rules where possible"""
+        chosen = {}
+        for setting in dict.fromkeys(self.effect[rule_indexes].tolist()):
+            rows = rule_indexes[self.effect[rule_indexes] == setting]
+            both = self._fillable[rows].all(axis=0)
+            # Rules disagree: take the first rule's choice and let the next pass report the conflict
+            options = both if both.any() else self._fillable[rows[0]]
+            if options.any():
+                chosen[setting] = (int(options.argmax()), int(rows[0]))
+        return chosen
+
+    def validate(self, preset, complete=False):
+        """
+        Check a preset against every rule.
+
+        A value that belongs to the same-named setting of the other tab
+        (a movie [File Format] given for the stills one) is a conflict.
+        With complete=True, settings the rules require but the preset leaves
+        out are filled in (listed in `changes`) until nothing is missing;
+        `preset` in the report is then the completed preset.
+        """
+        state, unlisted, unknown = self.encode(preset)
+        changes = []
+        violated, missing = self._evaluate(state)
+        while complete and missing.any():
+            chosen = self._fill(np.flatnonzero(missing))
+            if not chosen:
+                break
+            for setting, (value, r) in chosen.items():
+                state[setting] = value
+                changes.append(Change(self.display[self.settings[setting]], self.value_display[setting][value],
+                                      self.rules[r], f"needed because {self._describe(r, state, unlisted)}"))
+            violated, missing = self._evaluate(state)
+
+        conflicts = []
+        for setting, value in unlisted.items():
+            owner = self._elsewhere.get(setting, {}).get(normalize(value))
+            if owner is not None:
+                name = self.display[self.settings[setting]]
+                allowed = list(self.value_display[setting])
+                rule = Rule("value", name, tuple(allowed), owner, (value,), False, "", f"[{value}] is a value of [{owner}]")
+                conflicts.append(Conflict(name, value, allowed, rule, f"must be one of {allowed} because {rule.text}"))
+        for r in np.flatnonzero(violated):
+            setting = self.effect[r]
+            conflicts.append(Conflict(self.display[self.settings[setting]],
+                                      self._value_name(setting, state[setting], unlisted), self._allowed(r),
+                                      self.rules[r],
+                                      f"must be one of {self._allowed(r)} because {self._describe(r, state, unlisted)}"))
+        for r in np.flatnonzero(missing):
+            # Without completion (or when no listed value fits) a missing prerequisite is a required change
+            setting = self.effect[r]
+            allowed = self._allowed(r)
+            changes.append(Change(self.display[self.settings[setting]], allowed[0] if allowed else None,
+                                  self.rules[r], f"required because {self._describe(r, state, unlisted)}"))
+        ok = not conflicts and not missing.any()
+        return Report(ok, conflicts, changes, self.decode(state, unlisted), unknown)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(refresh=False):
+    """Process-wide engine compiled from MENU_ROOT"""
+    global _engine
+    with _engine_lock:
+        if _engine is None or refresh:
+            _engine = ConstraintEngine.from_tree()
+        return _engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the setting dependencies extracted from the menu JSON")
+    parser.add_argument("--root", default=MENU_ROOT)
+    args = parser.parse_args()
+    engine = ConstraintEngine.from_tree(args.root)
+    for rule in engine.rules:
+        values = " / ".join(rule.values)
+        condition = f"[{rule.setting}] {'is not' if rule.negate else 'is'} {values}"
+        if rule.kind == "requires":
+            print(f"[{rule.target}] requires {condition}   ({rule.source})")
+        else:
+            print(f"[{rule.target}] = {' / '.join(rule.target_values)} while {condition}   ({rule.source})")
+    print(f"{len(engine.rules)} rules over {len(engine.settings)} settings")
+
+
+if __name__ == "__main__":
+    main()
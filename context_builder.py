@@ -0,0 +1,321 @@
+"""
+Token-budgeted LLM context for nodes selected in the capp.py tree.
+
+`build_context(paths, budget, query)` expands the selected files and folders
+(menu JSON, modes.json, screenshots), turns each file into a compact
+summary, and packs as many as fit into `budget` tokens. When a large subtree
+does not fit, the settings most relevant to `query` go first and the rest are
+only listed by name.
+
+Summaries and their token counts are cached by content hash in
+CONTEXT_CACHE_PATH, so unchanged files are never re-read or re-counted after
+the first time, even across restarts. The least recently used entries are
+dropped beyond CONTEXT_CACHE_MAX_ENTRIES.
+"""
+
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import threading
+from collections import namedtuple
+
+from menu_tree import MENU_ROOT, parse_menu_json
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Bump when the summary format changes so cached entries are rebuilt
+SUMMARY_VERSION = 1
+
+CONTEXT_CACHE_PATH = os.environ.get(
+    "CONTEXT_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "context_cache.json"))
+CONTEXT_CACHE_MAX_ENTRIES = int(os.environ.get("CONTEXT_CACHE_MAX_ENTRIES", 5000))
+
+DESCRIPTION_CHARS = 240
+MAX_ITEMS = 12
+
+Summary = namedtuple("Summary", ["path", "title", "text", "tokens"])
+Context = namedtuple("Context", ["text", "tokens", "included", "omitted"])
+
+_encoding = None
+
+
+def count_tokens(text):
+    """Token count with tiktoken when installed, otherwise ~4 characters per token"""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _clip(text, limit=DESCRIPTION_CHARS):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def summarize_menu(data):
+    """(title, text) for one menu JSON object"""
+    if "submenu" in data:
+        title = data.get("name", "")
+        lines = [f"Submenu: {title}"]
+        for setting in data["submenu"].get("settings", []):
+            options = setting.get("options") or []
+            line = f"- {setting.get('name', '')}"
+            if options:
+                line += f" [{' / '.join(map(str, options))}]"
+            if setting.get("description"):
+                line += f": {_clip(setting['description'], 120)}"
+            lines.append(line)
+        return title, "\n".join(lines)
+    if "menu" in data:
+        title = data["menu"]
+        lines = [f"Setting: {title}"]
+        if data.get("navigation"):
+            lines.append(f"Navigation: {data['navigation']}")
+        if data.get("modes"):
+            lines.append(f"Modes: {', '.join(data['modes'])}")
+        if data.get("condition"):
+            lines.append(f"Condition: {json.dumps(data['condition'], ensure_ascii=False)}")
+        if data.get("description"):
+            lines.append(f"Description: {_clip(data['description'])}")
+        items = data.get("items", [])
+        for item in items[:MAX_ITEMS]:
+            line = f"- {item.get('label', '')}"
+            if item.get("value"):
+                line += f" = {item['value']}"
+            if item.get("description"):
+                line += f": {_clip(item['description'], 120)}"
+            lines.append(line)
+        if len(items) > MAX_ITEMS:
+            lines.append(f"- … {len(items) - MAX_ITEMS} more options")
+        if data.get("note"):
+            lines.append(f"Note: {_clip(data['note'], 160)}")
+        return title, "\n".join(lines)
+    # modes.json and other keyed documents: one line per top-level entry
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            name = value.get("mode_name") or value.get("name") or key
+            lines.append(f"- {key} ({name}): {_clip(value.get('description', ''), 160)}")
+        else:
+            lines.append(f"- {key}: {_clip(value, 160)}")
+    return "", "\n".join(lines)
+
+
+def summarize_file(path, content):
+    """(title, text) for a file given its bytes"""
+    ext = os.path.splitext(path)[1].lower()
+    name = os.path.basename(path)
+    if ext == ".json":
+        try:
+            title, text = summarize_menu(parse_menu_json(content.decode("utf-8")))
+            return title or os.path.splitext(name)[0], text
+        except ValueError:
+            pass
+    if ext in (".png", ".jpg", ".jpeg"):
+        size = ""
+        if Image is not None:
+            try:
+                with Image.open(io.BytesIO(content)) as img:
+                    size = f" ({img.width}x{img.height})"
+            except Exception:
+                pass
+        return name, f"Screenshot: {name}{size}"
+    return name, _clip(content.decode("utf-8", "replace"), 600)
+
+
+class SummaryCache:
+    """Content-hash -> {"title", "text", "tokens"} map, persisted as JSON, least recently used last out"""
+
+    def __init__(self, path=CONTEXT_CACHE_PATH, max_entries=CONTEXT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._stat = {}  # path -> (mtime, size, key), only for this process
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+            self._evict()
+
+    def _evict(self):
+        # Dicts keep insertion order and hits move their entry to the end, so the front is least recently used
+        while self.max_entries and len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+            self._dirty = True
+
+    def _use(self, key):
+        entry = self._entries.pop(key)
+        self._entries[key] = entry
+        self.hits += 1
+        return entry
+
+    def summary(self, path):
+        st = os.stat(path)
+        with self._lock:
+            known = self._stat.get(path)
+            if known and known[:2] == (st.st_mtime, st.st_size) and known[2] in self._entries:
+                return self._make(path, self._use(known[2]))
+        with open(path, "rb") as f:
+            content = f.read()
+        key = f"{SUMMARY_VERSION}:{hashlib.sha1(content).hexdigest()}"
+        with self._lock:
+            self._stat[path] = (st.st_mtime, st.st_size, key)
+            if key in self._entries:
+                return self._make(path, self._use(key))
+        title, text = summarize_file(path, content)
+        entry = {"title": title, "text": text, "tokens": count_tokens(text)}
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+            self.misses += 1
+            self._evict()
+        return self._make(path, entry)
+
+    @staticmethod
+    def _make(path, entry):
+        return Summary(path, entry["title"], entry["text"], entry["tokens"])
+
+    def save(self):
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            data = json.dumps(self._entries, ensure_ascii=False)
+            self._dirty = False
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SummaryCache()
+        return _default_cache
+
+
+def expand_paths(paths):
+    """Selected files plus every file under selected folders, without duplicates"""
+    seen = set()
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort(key=str.lower)
+                for name in sorted(filenames, key=str.lower):
+                    files.append(os.path.join(dirpath, name))
+        elif os.path.isfile(path):
+            files.append(path)
+    result = []
+    for path in files:
+        path = os.path.abspath(path)
+        if path not in seen:
+            seen.add(path)
+            result.append(path)
+    return result
+
+
+def _words(text):
+    return set(w for w in re.findall(r"[a-z0-9]+", text.lower()) if len(w) > 2)
+
+
+def relevance(summary, query_words):
+    """How many query words appear in the summary (title and path words count double)"""
+    if not query_words:
+        return 0
+    title_words = _words(summary.title) | _words(os.path.basename(os.path.dirname(summary.path)))
+    return len(query_words & _words(summary.text)) + 2 * len(query_words & title_words)
+
+
+def _kind_rank(summary):
+    # Setting text first, then modes/other JSON, screenshots last
+    if summary.text.startswith(("Setting:", "Submenu:")):
+        return 0
+    if summary.text.startswith("Screenshot:"):
+        return 2
+    return 1
+
+
+def build_context(paths, budget=2000, query="", root=MENU_ROOT, cache=None):
+    """
+    Pack summaries of `paths` into at most `budget` tokens.
+
+    Returns Context(text, tokens, included, omitted) where included/omitted
+    are lists of file paths.
+    """
+    cache = cache or get_summary_cache()
+    summaries = [cache.summary(path) for path in expand_paths(paths)]
+    cache.save()
+    query_words = _words(query)
+
+    def rel(path):
+        try:
+            return os.path.relpath(path, root)
+        except ValueError:
+            return path
+
+    header = "Selected camera menu context:"
+    used = count_tokens(header)
+    costs = [s.tokens + count_tokens(rel(s.path)) + 4 for s in summaries]
+    if used + sum(costs) <= budget:
+        candidates = list(range(len(summaries)))
+    else:
+        # Too big: leave out screenshots, and keep only the settings matching
+        # the question when there are any; most relevant first
+        scores = [relevance(s, query_words) for s in summaries]
+        candidates = [i for i in range(len(summaries)) if _kind_rank(summaries[i]) < 2]
+        if any(scores[i] for i in candidates):
+            candidates = [i for i in candidates if scores[i] > 0]
+        candidates.sort(key=lambda i: (-scores[i], _kind_rank(summaries[i]), i))
+    chosen = set()
+    for i in candidates:
+        if used + costs[i] <= budget:
+            chosen.add(i)
+            used += costs[i]
+
+    blocks = [header]
+    for i in sorted(chosen):
+        blocks.append(f"## {rel(summaries[i].path)}\n{summaries[i].text}")
+    omitted = [summaries[i] for i in range(len(summaries)) if i not in chosen]
+    if omitted:
+        # Name what was left out, as far as the remaining budget allows
+        settings = [s for s in omitted if _kind_rank(s) < 2]
+        prefix = f"(Also selected, not shown: {len(settings)} settings, {len(omitted) - len(settings)} screenshots"
+        names = []
+        cost = count_tokens(prefix) + 2
+        for s in settings:
+            if s.title in names:
+                continue
+            cost += count_tokens(s.title) + 1
+            if used + cost > budget:
+                break
+            names.append(s.title)
+        line = prefix + (": " + ", ".join(names) if names else "") + ")"
+        if used + count_tokens(line) + 2 <= budget:
+            blocks.append(line)
+    text = "\n\n".join(blocks)
+    return Context(text, count_tokens(text), [summaries[i].path for i in sorted(chosen)], [s.path for s in omitted])
@@ -3,6 +3,16 @@ import os
 import pathlib
 from typing import List, Dict, Any, Optional, Tuple
 import json
+import time
+import urllib.request
+from bulk_ops import OPERATIONS, BulkJob, Selection, plan_operation
+
+# __api_server.py, which streams archive exports
+DIR_API_URL = os.environ.get("DIR_API_URL", "http://localhost:5001")
+
+MAX_LISTED_ITEMS = 200
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", 8))
+BULK_LABELS = {"copy": "Copy", "move": "Move", "delete": "Delete", "optimize": "Re-optimize PNGs"}
 
 def get_file_icon(filename):
     """Return an appropriate icon based on file extension"""
@@ -38,6 +48,20 @@ def render_file_content(file_path: str) -> None:
     except Exception as e:
         st.error(f"Error displaying file: {str(e)}")
 
+def prepare_export(paths: List[str], fmt: str) -> str:
+    """Register an export with the directory API and return its download URL"""
+    body = json.dumps({"paths": paths, "format": fmt}).encode("utf-8")
+    req = urllib.request.Request(f"{DIR_API_URL}/api/exports", data=body,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        result = json.load(resp)
+    return DIR_API_URL + result["url"]
+
+def selection_checkbox(path: str, key: str) -> None:
+    """Checkbox bound to the selection set (kept in sync when "Select subtree" changes it)"""
+    st.session_state[key] = path in st.session_state.selected_items
+    st.checkbox("", key=key, on_change=st.session_state.selected_items.toggle, args=(path,))
+
 def build_tree(path, level=0, expanded_key_prefix="", is_root=False, prefix_lines=""):
     """Build a nested tree structure for the sidebar"""
     path_obj = pathlib.Path(path)
@@ -104,15 +128,13 @@ def build_tree(path, level=0, expanded_key_prefix="", is_root=False, prefix_line
                         st.session_state.history.append(str(dir_path))
                         st.session_state.history_index = len(st.session_state.history) - 1
                         st.rerun()
+                with col1:
+                    if st.button("Select subtree", key=f"subtree_{expanded_key}"):
+                        st.session_state.selected_items.add_subtree(str(dir_path))
+                        st.rerun()
                 with col3:
                     # Add checkbox for selection
-                    is_selected = str(dir_path) in st.session_state.selected_items
-                    if st.checkbox("", key=f"select_dir_{expanded_key}", value=is_selected):
-                        if str(dir_path) not in st.session_state.selected_items:
-                            st.session_state.selected_items.append(str(dir_path))
-                    else:
-                        if str(dir_path) in st.session_state.selected_items:
-                            st.session_state.selected_items.remove(str(dir_path))
+                    selection_checkbox(str(dir_path), f"select_dir_{expanded_key}")
                 
                 # Recursively build tree for subdirectories
                 build_tree(dir_path, level + 1, expanded_key, False, new_prefix)
@@ -141,17 +163,57 @@ def build_tree(path, level=0, expanded_key_prefix="", is_root=False, prefix_line
                     st.session_state.viewing_file = str(file_path)
             with col3:
                 # Add checkbox for selection
-                is_selected = str(file_path) in st.session_state.selected_items
-                if st.checkbox("", key=f"select_file_{expanded_key_prefix}_{file_name}", value=is_selected):
-                    if str(file_path) not in st.session_state.selected_items:
-                        st.session_state.selected_items.append(str(file_path))
-                else:
-                    if str(file_path) in st.session_state.selected_items:
-                        st.session_state.selected_items.remove(str(file_path))
+                selection_checkbox(str(file_path), f"select_file_{expanded_key_prefix}_{file_name}")
     
     except (PermissionError, FileNotFoundError) as e:
         st.error(f"Error accessing {path}: {str(e)}")
 
+def render_bulk_operations() -> None:
+    """Start a bulk copy/move/delete/re-optimize and show the running job's progress"""
+    st.header("Bulk Operations")
+    job = st.session_state.bulk_job
+    if job is None or job.finished:
+        col_op, col_dest = st.columns([1, 2])
+        with col_op:
+            op_name = st.selectbox("Operation", list(OPERATIONS), format_func=BULK_LABELS.get)
+        dest_dir = None
+        with col_dest:
+            if op_name in ("copy", "move"):
+                dest_dir = st.text_input("Destination folder:", value=st.session_state.current_dir)
+            elif op_name == "delete":
+                confirmed = st.checkbox("Yes, permanently delete the selected items")
+        if st.button("Run"):
+            paths = plan_operation(op_name, st.session_state.selected_items)
+            if dest_dir is not None and not os.path.isdir(dest_dir):
+                st.error(f"Not a valid directory: {dest_dir}")
+            elif op_name == "delete" and not confirmed:
+                st.warning("Tick the confirmation box to delete.")
+            elif not paths:
+                st.warning("Nothing to do for the current selection.")
+            else:
+                args = (dest_dir,) if dest_dir is not None else ()
+                st.session_state.bulk_job = BulkJob(OPERATIONS[op_name], paths, args, workers=BULK_WORKERS, name=op_name).start()
+                if op_name in ("move", "delete"):
+                    st.session_state.selected_items.clear()
+                st.rerun()
+
+    if job is not None:
+        st.progress(job.done / job.total if job.total else 1.0,
+                    text=f"{BULK_LABELS[job.name]}: {job.done} / {job.total}")
+        if not job.finished:
+            if st.button("Cancel"):
+                job.cancel()
+        else:
+            errors = job.errors
+            if errors:
+                st.error(f"{len(errors)} of {job.total} items failed")
+                st.dataframe([{"path": r.path, "error": r.detail} for r in errors])
+            else:
+                st.success(f"{BULK_LABELS[job.name]} finished for {job.total} items")
+            if st.button("Dismiss"):
+                st.session_state.bulk_job = None
+                st.rerun()
+
 def main():
     st.set_page_config(layout="wide", page_title="Directory Explorer")
     st.title("Directory Explorer")
@@ -164,11 +226,13 @@ def main():
     if 'history_index' not in st.session_state:
         st.session_state.history_index = 0
     if 'selected_items' not in st.session_state:
-        st.session_state.selected_items = []
+        st.session_state.selected_items = Selection()
     if 'instructions' not in st.session_state:
         st.session_state.instructions = ""
     if 'viewing_file' not in st.session_state:
         st.session_state.viewing_file = None
+    if 'bulk_job' not in st.session_state:
+        st.session_state.bulk_job = None
     
     # Navigation controls
     col_nav1, col_nav2, col_nav3, col_nav4 = st.columns([1, 1, 2, 1])
@@ -242,7 +306,13 @@ def main():
         
         # Show selected items with option to view/remove
         if st.session_state.selected_items:
-            for i, item_path in enumerate(st.session_state.selected_items):
+            # Folders stand for their selected contents; long selections are cut off
+            shown = st.session_state.selected_items.top_level()
+            st.caption(f"{len(st.session_state.selected_items)} selected")
+            if st.button("Clear selection"):
+                st.session_state.selected_items.clear()
+                st.rerun()
+            for i, item_path in enumerate(shown[:MAX_LISTED_ITEMS]):
                 col_sel_item, col_view, col_remove = st.columns([3, 1, 1])
                 
                 item_name = os.path.basename(item_path)
@@ -258,8 +328,10 @@ def main():
                 
                 with col_remove:
                     if st.button("Remove", key=f"remove_{i}"):
-                        st.session_state.selected_items.remove(item_path)
+                        st.session_state.selected_items.discard_subtree(item_path)
                         st.rerun()
+            if len(shown) > MAX_LISTED_ITEMS:
+                st.write(f"... and {len(shown) - MAX_LISTED_ITEMS} more")
         else:
             st.info("No items selected. Use the checkboxes in the directory structure to select files or folders.")
         
@@ -268,6 +340,27 @@ def main():
             st.subheader(f"Preview: {os.path.basename(st.session_state.viewing_file)}")
             render_file_content(st.session_state.viewing_file)
         
+        # Export section: the archive is streamed by __api_server.py, so even a
+        # whole tab of screenshots never has to fit in this process's memory
+        if st.session_state.selected_items:
+            st.header("Export")
+            col_fmt, col_export = st.columns([1, 2])
+            with col_fmt:
+                export_format = st.radio("Format", ["zip", "tar"], horizontal=True)
+            with col_export:
+                if st.button("Prepare download"):
+                    try:
+                        st.session_state.export_url = prepare_export(list(st.session_state.selected_items), export_format)
+                    except Exception as e:
+                        st.session_state.export_url = None
+                        st.error(f"Export failed (is __api_server.py running at {DIR_API_URL}?): {str(e)}")
+                if st.session_state.get("export_url"):
+                    st.link_button(f"⬇️ Download .{export_format}", st.session_state.export_url)
+
+        # Bulk operations run in a background BulkJob; reruns just show its progress
+        if st.session_state.selected_items or st.session_state.bulk_job:
+            render_bulk_operations()
+
         # Instructions section
         st.header("Instructions")
         instructions = st.text_area("Enter your instructions here:", 
@@ -288,6 +381,12 @@ def main():
             else:
                 st.warning("Please enter instructions first.")
 
+    # Keep refreshing while a bulk operation is running so its progress bar moves
+    job = st.session_state.bulk_job
+    if job is not None and not job.finished:
+        time.sleep(0.5)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
     
@@ -0,0 +1,126 @@
+"""
+All-or-nothing creation of nested directory trees.
+
+A spec is a nested structure of directory names:
+
+    {"PAGE_1": {"1 SteadyShot": {}, "2 SteadyShot Adjust.": {}}, "PAGE_2": None}
+    ["PAGE_1", {"name": "PAGE_2", "children": ["1 Focal Length"]}]
+
+`plan_dirs` flattens and validates the whole spec before anything touches the
+disk; `create_dirs` then creates every directory and removes the ones it made
+if any step fails.
+"""
+
+import os
+from pathlib import Path
+
+# Characters Windows refuses in file names, plus path separators
+INVALID_CHARS = set('<>:"|?*/\\')
+
+
+class ScaffoldError(Exception):
+    """Raised with an HTTP-style status and a list of per-path problems"""
+
+    def __init__(self, message, status=400, problems=None):
+        super().__init__(message)
+        self.status = status
+        self.problems = problems or []
+
+
+def name_problem(name):
+    """Return why `name` is not a valid single directory name, or None"""
+    if not isinstance(name, str) or not name.strip():
+        return "empty name"
+    if name in (".", ".."):
+        return "relative path component"
+    bad = sorted(INVALID_CHARS.intersection(name))
+    if bad:
+        return f"invalid character(s): {' '.join(bad)}"
+    if any(ord(c) < 32 for c in name):
+        return "control character"
+    return None
+
+
+def flatten_spec(spec, prefix=()):
+    """Yield relative paths (as tuples of names), parents before children"""
+    if spec is None:
+        return
+    if isinstance(spec, dict):
+        items = spec.items()
+    elif isinstance(spec, list):
+        items = []
+        for entry in spec:
+            if isinstance(entry, dict) and "name" in entry:
+                items.append((entry["name"], entry.get("children")))
+            elif isinstance(entry, dict):
+                items.extend(entry.items())
+            else:
+                items.append((entry, None))
+    else:
+        raise ScaffoldError(f"Unsupported spec entry under {'/'.join(prefix) or 'root'}: {spec!r}")
+    for name, children in items:
+        path = prefix + (name,)
+        yield path
+        yield from flatten_spec(children, path)
+
+
+def plan_dirs(parent_path, spec, exist_ok=False):
+    """
+    Validate `spec` under `parent_path` and return the Paths to create, in order.
+
+    Raises ScaffoldError (400) for bad names or a missing parent, and (409) for
+    directories that already exist when `exist_ok` is False.
+    """
+    parent = Path(parent_path)
+    if not parent.is_dir():
+        raise ScaffoldError(f"Parent directory does not exist: {parent_path}")
+    paths = list(flatten_spec(spec))
+    if not paths:
+        raise ScaffoldError("Directory spec is empty")
+
+    problems = []
+    seen = set()
+    for rel in paths:
+        problem = name_problem(rel[-1])
+        if problem is None and rel in seen:
+            problem = "listed twice"
+        if problem:
+            problems.append({"path": "/".join(map(str, rel)), "error": problem})
+        else:
+            seen.add(rel)
+    if problems:
+        raise ScaffoldError("Invalid directory names", 400, problems)
+
+    to_create = []
+    conflicts = []
+    for rel in paths:
+        target = parent.joinpath(*rel)
+        if target.exists():
+            if exist_ok and target.is_dir():
+                continue
+            conflicts.append({"path": "/".join(rel), "error": "already exists"})
+        else:
+            to_create.append(target)
+    if conflicts:
+        raise ScaffoldError("Some directories already exist", 409, conflicts)
+    return to_create
+
+
+def create_dirs(paths, mkdir=os.mkdir):
+    """
+    Create `paths` in order. If one fails, remove the directories created so
+    far (deepest first) and re-raise.
+    """
+    created = []
+    try:
+        for path in paths:
+            mkdir(path)
+            created.append(path)
+    except BaseException:
+        for path in reversed(created):
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        raise
+    return created
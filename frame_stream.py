@@ -0,0 +1,170 @@
+"""
+Live JPEG frame fan-out for the camera stream endpoint.
+
+A `FrameBroadcaster` runs one capture loop for a screen region and hands each
+encoded frame to every subscriber. Subscribers only keep the latest frame: a
+client that reads slower than the loop produces simply skips frames, so it
+never holds up the loop or the other clients. The loop starts with the first
+subscriber and stops shortly after the last one leaves.
+"""
+
+import io
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+Frame = namedtuple("Frame", ["seq", "jpeg", "captured_at"])
+
+
+class Subscription:
+    """Latest-frame mailbox for one client"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._last_seq = 0
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, frame):
+        with self._cond:
+            if self._frame is not None and self._frame.seq > self._last_seq:
+                # Previous frame was never read: the client is behind, skip it
+                self.dropped += 1
+            self._frame = frame
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Wait for a frame newer than the last one returned; None on timeout or close"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.closed or (self._frame is not None and self._frame.seq > self._last_seq),
+                timeout)
+            if self.closed or self._frame is None or self._frame.seq <= self._last_seq:
+                return None
+            self._last_seq = self._frame.seq
+            return self._frame
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class FrameBroadcaster:
+    """
+    Capture `bbox` with `capture(bbox) -> PIL.Image` at up to `fps` frames
+    per second while anyone is subscribed, JPEG-encoding each frame once.
+    `on_idle(broadcaster)` is called when the last subscriber leaves.
+    """
+
+    def __init__(self, capture, bbox, fps=10, quality=80, on_idle=None):
+        self.capture = capture
+        self.bbox = tuple(bbox)
+        self.fps = fps
+        self.quality = quality
+        self.on_idle = on_idle
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._seq = 0
+        self.frames_captured = 0
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self):
+        sub = Subscription()
+        with self._lock:
+            self._subscribers.add(sub)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="camera-stream", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.close()
+        with self._lock:
+            self._subscribers.discard(sub)
+            idle = not self._subscribers
+        if idle and self.on_idle is not None:
+            self.on_idle(self)
+
+    def _encode(self, img):
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, "JPEG", quality=self.quality)
+        return buf.getvalue()
+
+    def _run(self):
+        period = 1.0 / self.fps if self.fps else 0
+        while True:
+            started = time.monotonic()
+            with self._lock:
+                subscribers = list(self._subscribers)
+                if not subscribers:
+                    self._thread = None
+                    return
+            try:
+                with span("stream_capture"):
+                    img = self.capture(self.bbox)
+                with span("jpeg_encode"):
+                    jpeg = self._encode(img)
+            except Exception as e:
+                logger.error(f"Camera stream capture failed: {e}")
+                time.sleep(max(period, 0.5))
+                continue
+            self._seq += 1
+            self.frames_captured += 1
+            frame = Frame(self._seq, jpeg, time.time())
+            for sub in subscribers:
+                sub.offer(frame)
+            elapsed = time.monotonic() - started
+            if period > elapsed:
+                time.sleep(period - elapsed)
+
+
+class MJPEGStream:
+    """
+    multipart/x-mixed-replace body for one client, as a WSGI response iterable.
+
+    Unsubscribes when the client disconnects or the subscription is closed.
+    The WSGI server calls close() even if the body was never iterated (the
+    client left before the first frame), so the subscription can't leak.
+    """
+
+    def __init__(self, broadcaster, sub=None, boundary="frame", timeout=5.0):
+        self.broadcaster = broadcaster
+        self.sub = sub if sub is not None else broadcaster.subscribe()
+        self.boundary = boundary
+        self.timeout = timeout
+        self._closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            while not self.sub.closed:
+                frame = self.sub.get(self.timeout)
+                if frame is None:
+                    continue
+                yield (f"--{self.boundary}\r\n"
+                       f"Content-Type: image/jpeg\r\n"
+                       f"Content-Length: {len(frame.jpeg)}\r\n"
+                       f"X-Frame-Seq: {frame.seq}\r\n\r\n").encode("ascii") + frame.jpeg + b"\r\n"
+        finally:
+            self.close()
+
+    def close(self):
+        if not self._closed.is_set():
+            self._closed.set()
+            self.broadcaster.unsubscribe(self.sub)
+
+
+def mjpeg_chunks(broadcaster, boundary="frame", timeout=5.0, sub=None):
+    """MJPEGStream for `broadcaster`, on an existing subscription `sub` if given"""
+    return MJPEGStream(broadcaster, sub, boundary, timeout)
@@ -1,28 +1,137 @@
+import html
+import os
+import time
+import uuid
+from functools import lru_cache, partial
+
 import streamlit as st
 
+from context_builder import build_context
+from include.chat_store import ChatStore
+from llm_cache import LLMCache
+from llm_client import StreamingReply, embed
+
+# One append-only JSONL history per browser session, named after its session id
+CHAT_HISTORY_DIR = os.environ.get(
+    "CHAT_HISTORY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_history"))
+CHAT_WINDOW = 30  # messages rendered initially
+CHAT_PAGE = 30    # messages added by "Show older"
+LLM_CONTEXT_MESSAGES = 20  # history sent with each question
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CHAT_CONTEXT_TOKENS", 2000))  # for selected tree nodes
+
+SYSTEM_PROMPT = ("You help photographers configure a Sony α7R V. Give concrete menu "
+                 "settings and where to find them (e.g. MENU → (Shooting) → [Image Stabilization]). "
+                 "Messages starting with 📄 tell you which menu item the user has selected in the tree.")
+
+def get_chat_store():
+    """This session's history (kept in session_state, never shared between sessions)"""
+    store = st.session_state.get("chat_store")
+    if store is None:
+        session_id = st.session_state.setdefault("chat_session_id", uuid.uuid4().hex)
+        os.makedirs(CHAT_HISTORY_DIR, exist_ok=True)
+        store = ChatStore(os.path.join(CHAT_HISTORY_DIR, f"{session_id}.jsonl"))
+        if not len(store):
+            store.append("user", "Hello!")
+            store.append("assistant", "Hi, how can I help you?")
+        st.session_state["chat_store"] = store
+    return store
+
+# The response cache is the only chat resource shared by all sessions
+@st.cache_resource
+def get_llm_cache():
+    # LLM_CACHE_SEMANTIC=1 also reuses answers to near-identical questions (one embedding call each)
+    embed_fn = (lambda text: embed([text])[0]) if os.environ.get("LLM_CACHE_SEMANTIC") == "1" else None
+    return LLMCache(embed_fn=embed_fn)
+
+@lru_cache(maxsize=1024)
+def message_html(role, content):
+    """HTML for one chat bubble (cached: old messages never change)"""
+    content = html.escape(content).replace("\n", "<br>")
+    if role == "user":
+        return f'<div style="background:#e3f2fd;padding:8px 12px;border-radius:8px;margin-bottom:4px;text-align:left;"><b>User:</b> {content}</div>'
+    elif role == "system":
+        return f'<div style="background:#fff3e0;padding:8px 12px;border-radius:8px;margin-bottom:4px;text-align:left;font-style:italic;">{content}</div>'
+    else:
+        return f'<div style="background:#f1f8e9;padding:8px 12px;border-radius:8px;margin-bottom:4px;text-align:left;"><b>Assistant:</b> {content}</div>'
+
+def llm_messages(history, paths):
+    """System prompt, context for the selected tree nodes and recent history in OpenAI chat format"""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if paths:
+        # Settings from the selected tree nodes, packed to a token budget and
+        # ranked by the question being asked
+        question = next((m["content"] for m in reversed(history) if m["role"] == "user"), "")
+        context = build_context(paths, budget=CONTEXT_TOKEN_BUDGET, query=question)
+        messages.append({"role": "system", "content": context.text})
+    for msg in history:
+        messages.append({"role": msg["role"], "content": msg["content"]})
+    return messages
+
+def finish_reply(store, reply):
+    """Store the finished (or stopped/failed) reply and clear it from the session"""
+    if reply.text:
+        store.append("assistant", reply.text + (" …(stopped)" if reply.cancelled else ""))
+    if reply.error:
+        store.append("system", f"⚠️ LLM error: {reply.error}")
+    st.session_state["chat_reply"] = None
+
+def send_message(store):
+    user_input = st.session_state.get("chat_input", "").strip()
+    if not user_input:
+        return
+    store.append("user", user_input)
+    st.session_state["chat_window"] = CHAT_WINDOW
+    st.session_state["chat_input"] = ""  # Clear input after sending
+    # Building the context, the cache lookup, the tokens and the cache store
+    # all happen on a background thread; the script run is not held up
+    previous = st.session_state.get("chat_reply")
+    if previous is not None:
+        previous.cancel()
+        st.session_state["chat_reply"] = None
+    # session_state is only read here, on the script thread
+    messages = partial(llm_messages, store.tail(LLM_CONTEXT_MESSAGES), list(st.session_state.get("chat_context_paths") or []))
+    st.session_state["chat_reply"] = StreamingReply(messages, cache=get_llm_cache()).start()
+
+def render_reply(store):
+    """Partial assistant reply; re-runs on its own while tokens arrive"""
+    reply = st.session_state.get("chat_reply")
+    if reply is None:
+        return
+    if reply.done:
+        finish_reply(store, reply)
+        st.rerun()
+    st.markdown(message_html("assistant", reply.text + " ▌"), unsafe_allow_html=True)
+    if st.button("⏹ Stop", key="chat_stop_btn"):
+        reply.cancel()
+
+# With st.fragment only the reply area reruns while streaming, not the whole app
+if hasattr(st, "fragment"):
+    render_reply = st.fragment(run_every=0.2)(render_reply)
+
 def render_chat():
     st.markdown("### 💬 Chat")
-    # Use session state to store chat messages
-    if "chat_messages" not in st.session_state:
-        st.session_state["chat_messages"] = [
-            {"role": "user", "content": "Hello!"},
-            {"role": "assistant", "content": "Hi, how can I help you?"}
-        ]
+    store = get_chat_store()
+    # Only the newest chat_window messages are rendered; "Show older" widens it
+    if "chat_window" not in st.session_state:
+        st.session_state["chat_window"] = CHAT_WINDOW
     # Show all queued selections in chat (from capp.py)
     if "chat_selection_queue" in st.session_state and st.session_state["chat_selection_queue"]:
         # Process all queued selections
         for sel in st.session_state["chat_selection_queue"]:
             # Add the selection to chat messages
-            st.session_state["chat_messages"].append(
-                {"role": "system", "content": f"📄 File selected: {sel}"}
-            )
-
-        # Debug information (comment out in production)
-        # st.write(f"Added {len(st.session_state['chat_selection_queue'])} selections to chat")
+            store.append("system", f"📄 File selected: {sel}")
 
         # Clear the queue after processing all items
         st.session_state["chat_selection_queue"] = []
 
+    total = len(store)
+    window = min(st.session_state["chat_window"], total)
+    if window < total:
+        if st.button(f"⬆️ Show older ({total - window} more)", key="chat_older_btn", use_container_width=True):
+            st.session_state["chat_window"] += CHAT_PAGE
+            st.rerun()
+
     # Scrollable chat area with fixed width and height
     chat_container_style = """
         <div style="
@@ -36,24 +145,30 @@ def render_chat():
             margin-bottom:8px;
         ">
     """
-    chat_html = ""
-    for msg in st.session_state["chat_messages"]:
-        if msg["role"] == "user":
-            chat_html += f'<div style="background:#e3f2fd;padding:8px 12px;border-radius:8px;margin-bottom:4px;text-align:left;"><b>User:</b> {msg["content"]}</div>'
-        elif msg["role"] == "system":
-            chat_html += f'<div style="background:#fff3e0;padding:8px 12px;border-radius:8px;margin-bottom:4px;text-align:left;font-style:italic;">{msg["content"]}</div>'
-        else:
-            chat_html += f'<div style="background:#f1f8e9;padding:8px 12px;border-radius:8px;margin-bottom:4px;text-align:left;"><b>Assistant:</b> {msg["content"]}</div>'
+    chat_html = "".join(message_html(msg["role"], msg["content"]) for msg in store.tail(window))
     chat_container_style += chat_html + "</div>"
     st.markdown(chat_container_style, unsafe_allow_html=True)
 
+    if st.session_state.get("chat_context_paths"):
+        col_ctx, col_clear = st.columns([4, 1])
+        with col_ctx:
+            st.caption(f"Context: {len(st.session_state['chat_context_paths'])} selected item(s), "
+                       f"up to {CONTEXT_TOKEN_BUDGET} tokens")
+        with col_clear:
+            if st.button("Clear", key="chat_context_clear_btn"):
+                st.session_state["chat_context_paths"] = []
+                st.rerun()
+
     # Multiline input and Chat button (fixed width to match chat area)
     col1, col2 = st.columns([4, 1])
     with col1:
-        user_input = st.text_area("Your message", key="chat_input", label_visibility="collapsed", height=70)
+        st.text_area("Your message", key="chat_input", label_visibility="collapsed", height=70)
     with col2:
-        send_clicked = st.button("Chat", key="chat_send_btn", use_container_width=True)
+        # on_click runs before the next script run, so the input can still be cleared
+        st.button("Chat", key="chat_send_btn", use_container_width=True, on_click=send_message, args=(store,))
 
-    if send_clicked and user_input.strip():
-        st.session_state["chat_messages"].append({"role": "user", "content": user_input.strip()})
-        st.session_state["chat_input"] = ""  # Clear input after sending
+    if st.session_state.get("chat_reply") is not None:
+        render_reply(store)
+        if not hasattr(st, "fragment"):
+            time.sleep(0.2)
+            st.rerun()
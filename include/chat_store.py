@@ -0,0 +1,96 @@
+"""
+Bounded, disk-backed chat history for include/chat.py.
+
+Messages are appended to a JSONL file (one {"role", "content", "ts"} object
+per line) and never rewritten. In memory the store keeps only the most recent
+`keep` messages plus the byte offset of every line, so older messages can be
+read back from disk a page at a time. Rendering the last N messages costs the
+same however long the history gets.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class ChatStore:
+    """Append-only chat history; `path=None` keeps it in memory only"""
+
+    def __init__(self, path=None, keep=200):
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=keep)
+        self._offsets = []
+        self._count = 0
+        self._needs_newline = False
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    message = json.loads(line) if line.strip() else None
+                except ValueError:
+                    # A line cut short by a crash mid-write
+                    message = None
+                if message is not None:
+                    self._offsets.append(offset)
+                    self._recent.append(message)
+                offset += len(line)
+                self._needs_newline = not line.endswith(b"\n")
+        self._count = len(self._offsets)
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+    def append(self, role, content):
+        message = {"role": role, "content": content, "ts": time.time()}
+        line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self.path:
+                with open(self.path, "ab") as f:
+                    if self._needs_newline:
+                        f.write(b"\n")
+                        self._needs_newline = False
+                    self._offsets.append(f.tell())
+                    f.write(line)
+            self._recent.append(message)
+            self._count += 1
+        return message
+
+    def tail(self, n):
+        """The last `n` messages (n <= keep is served from memory)"""
+        with self._lock:
+            count = self._count
+            if n <= len(self._recent):
+                return list(self._recent)[-n:] if n > 0 else []
+        return self.page(max(0, count - n), n)
+
+    def page(self, start, count):
+        """Messages start .. start+count-1 (0 = oldest), read from disk if needed"""
+        with self._lock:
+            total = self._count
+            start = max(0, start)
+            end = min(total, start + count)
+            first_recent = total - len(self._recent)
+            if start >= first_recent:
+                recent = list(self._recent)
+                return recent[start - first_recent:end - first_recent]
+            if not self.path:
+                # In-memory stores drop messages older than `keep`
+                recent = list(self._recent)
+                return recent[:max(0, end - first_recent)]
+            offsets = self._offsets[start:end]
+        messages = []
+        if offsets:
+            with open(self.path, "rb") as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    messages.append(json.loads(f.readline()))
+        return messages
@@ -0,0 +1,21 @@
+import streamlit as st
+
+from availability import get_availability
+
+
+def render_mode_filter():
+    """Mode / option filter backed by the availability matrix; returns the allowed file paths or None"""
+    matrix = get_availability()
+    mode_col, match_col, option_col, _ = st.columns([0.25, 0.1, 0.2, 0.45])
+    with mode_col:
+        modes = st.multiselect("Modes", matrix.modes, key="mode_filter_modes",
+                               format_func=lambda m: m.upper() if m == "s&q" else m.capitalize())
+    with match_col:
+        match = st.radio("Match", ["all", "any"], key="mode_filter_match", horizontal=True)
+    with option_col:
+        option = st.text_input("Option", key="mode_filter_option", placeholder="e.g. Manual")
+    if not modes and not option.strip():
+        return None
+    mask = matrix.filter(modes=modes, match=match, option=option.strip() or None)
+    st.caption(f"{int(mask.sum())} of {len(matrix)} settings match")
+    return {matrix.paths[i] for i in mask.nonzero()[0]}
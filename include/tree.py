@@ -24,6 +24,32 @@ def build_tree(path):
             })
     return tree
 
+def build_allowed_tree(path, allowed):
+    """Like build_tree, but only the files in `allowed` (absolute paths) and the folders leading to them"""
+    allowed = {os.path.abspath(p) for p in allowed}
+    folders = set()
+    for file_path in allowed:
+        parent = os.path.dirname(file_path)
+        while parent not in folders and parent != os.path.dirname(parent):
+            folders.add(parent)
+            parent = os.path.dirname(parent)
+
+    def walk(path):
+        tree = []
+        try:
+            entries = sorted(os.listdir(path), key=lambda x: (not os.path.isdir(os.path.join(path, x)), x.lower()))
+        except PermissionError:
+            return tree
+        for entry in entries:
+            full_path = os.path.join(path, entry)
+            if os.path.abspath(full_path) in folders and os.path.isdir(full_path):
+                tree.append({"type": "dir", "name": entry, "path": full_path, "children": walk(full_path)})
+            elif os.path.abspath(full_path) in allowed:
+                tree.append({"type": "file", "name": entry, "path": full_path})
+        return tree
+
+    return walk(path)
+
 def render_tree(tree, level=0, key_prefix=""):
     for idx, node in enumerate(tree):
         node_key = f"{key_prefix}-{node['name']}-{idx}"
@@ -0,0 +1,230 @@
+"""
+Shared request metrics, timing spans and logging setup for the Python services.
+
+    from instrumentation import instrument_app, setup_logging, span
+
+    setup_logging()
+    instrument_app(app, "camera_api")     # adds per-route timing and GET /metrics
+
+    with span("capture"):
+        img = grab(bbox)
+
+Metrics are kept in process memory and rendered at /metrics in the Prometheus
+text format:
+
+- http_request_duration_seconds{service,route,method,status}  histogram
+- http_requests_in_flight{service}                            gauge
+- span_duration_seconds{span}                                 histogram
+
+`setup_logging` routes log records through a QueueHandler so request threads
+never block on console or file I/O; a QueueListener thread does the writing.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # one counter per bucket, then sum and count
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self, *labels):
+        """(count, sum) for one label set"""
+        with self._lock:
+            series = self._series.get(labels)
+            return (series[-1], series[-2]) if series else (0, 0.0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, inf)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_number(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets)
+
+    def gauge(self, name, help_text, label_names=()):
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("service", "route", "method", "status"))
+IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("service",))
+SPAN_DURATION = metrics.histogram(
+    "span_duration_seconds", "Duration of instrumented operations (captures, window enumeration, ...)",
+    ("span",))
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block into span_duration_seconds{span=name}"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_DURATION.observe(time.perf_counter() - started, name)
+
+
+def instrument_app(app, service):
+    """Record per-route latency and in-flight requests for a Flask app and add GET /metrics"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+        IN_FLIGHT.inc(service)
+
+    @app.after_request
+    def _record(response):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return response
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        method, status = request.method, str(response.status_code)
+
+        # Streamed responses (e.g. /api/camera_stream) finish when the body is
+        # closed, not when the view returns
+        def done():
+            REQUEST_DURATION.observe(time.perf_counter() - started, service, route, method, status)
+            IN_FLIGHT.dec(service)
+
+        response.call_on_close(done)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return app
+
+
+_listener = None
+
+
+def setup_logging(level=logging.INFO, fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s"):
+    """
+    Configure root logging through a non-blocking queue.
+
+    Callers log into a QueueHandler; a single QueueListener thread formats and
+    writes the records. Like logging.basicConfig, it leaves an already
+    configured root logger alone, so it is safe to call more than once.
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None or root.handlers:
+        return root
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(fmt))
+    log_queue = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return root
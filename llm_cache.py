@@ -0,0 +1,239 @@
+"""
+Persistent cache for LLM responses.
+
+`LLMCache` stores replies in SQLite under a SHA-256 of the model, the
+messages (including any image data URLs) and an optional raw image, so an
+identical question or screenshot extraction is answered from disk. With an
+`embed_fn`, a second, semantic layer also answers questions whose embedding
+is close enough to an earlier question asked with the same model, system
+prompt, history and image.
+
+Entries expire after `ttl` seconds and the least recently used ones are
+dropped beyond `max_entries`. `stats()` reports exact/semantic hits, misses
+and the hit rate for this process.
+
+`CachedLLM.complete()` wraps a completion function with the cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3"))
+DEFAULT_TTL = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 5000))
+
+# kind is "exact" or "semantic"; similarity is 1.0 for exact hits
+CacheHit = namedtuple("CacheHit", ["response", "kind", "similarity"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    context_key TEXT NOT NULL,
+    model TEXT NOT NULL,
+    question TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    embedding BLOB
+);
+CREATE INDEX IF NOT EXISTS responses_context ON responses (context_key, last_used);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def split_question(messages):
+    """(context messages, text of the last user message) for semantic matching"""
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].get("role") == "user":
+            content = messages[i].get("content")
+            if isinstance(content, list):
+                content = " ".join(p.get("text", "") for p in content if isinstance(p, dict) and p.get("type") == "text")
+            return messages[:i] + messages[i + 1:], str(content or "")
+    return messages, ""
+
+
+def cache_keys(model, messages, image=None):
+    """(exact key, context key); the context key ignores the wording of the last question"""
+    image_part = image or b""
+    # Earlier turns stay in both keys: "And for video?" means something else after each question
+    context, _ = split_question(messages)
+    # Image parts of the question stay in the context key: a different screenshot is a different question
+    question_images = []
+    last_user = next((m for m in reversed(messages) if m.get("role") == "user"), None)
+    if last_user and isinstance(last_user.get("content"), list):
+        question_images = [p for p in last_user["content"] if isinstance(p, dict) and p.get("type") != "text"]
+    exact = _digest(model, _canonical(messages), image_part)
+    context_key = _digest(model, _canonical(context), _canonical(question_images), image_part)
+    return exact, context_key
+
+
+class LLMCache:
+    def __init__(self, path=LLM_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 embed_fn=None, similarity=0.92, semantic_candidates=1000, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed_fn = embed_fn
+        self.similarity = similarity
+        self.semantic_candidates = semantic_candidates
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        if path:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _embed(self, text):
+        if self.embed_fn is None or not text.strip():
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Embedding failed, semantic cache skipped: {e}")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def lookup(self, model, messages, image=None):
+        """CacheHit for `messages`, or None"""
+        exact, context_key = cache_keys(model, messages, image)
+        now = self.clock()
+        oldest = now - self.ttl if self.ttl else float("-inf")
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ? AND created >= ?",
+                                   (exact, oldest)).fetchone()
+            if row is not None:
+                self._touch(exact, now)
+                self._stats["hits"] += 1
+                return CacheHit(row[0], "exact", 1.0)
+            if self.embed_fn is None:
+                self._stats["misses"] += 1
+                return None
+            rows = self._db.execute(
+                "SELECT key, response, embedding FROM responses WHERE context_key = ? AND created >= ? "
+                "AND embedding IS NOT NULL ORDER BY last_used DESC LIMIT ?",
+                (context_key, oldest, self.semantic_candidates)).fetchall()
+        query = self._embed(split_question(messages)[1]) if rows else None
+        if query is not None:
+            # Vectors from a different embedding model (other size) can't be compared
+            rows = [r for r in rows if len(r[2]) == query.nbytes]
+            if rows:
+                matrix = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if float(scores[best]) >= self.similarity:
+                    key, response = rows[best][0], rows[best][1]
+                    with self._lock:
+                        self._touch(key, now)
+                        self._stats["semantic_hits"] += 1
+                    return CacheHit(response, "semantic", float(scores[best]))
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def _touch(self, key, now):
+        self._db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._db.commit()
+
+    def store(self, model, messages, response, image=None):
+        exact, context_key = cache_keys(model, messages, image)
+        question = split_question(messages)[1]
+        vector = self._embed(question)
+        now = self.clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, context_key, model, question, response, created, last_used, embedding) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (exact, context_key, model, question, response, now, now,
+                 vector.tobytes() if vector is not None else None))
+            self._stats["stores"] += 1
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now):
+        removed = 0
+        if self.ttl:
+            removed += self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            removed += self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)).rowcount
+        self._stats["evictions"] += removed
+
+    def evict(self):
+        """Drop expired and over-limit entries now"""
+        with self._lock:
+            self._evict(self.clock())
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = stats["hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["semantic_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachedLLM:
+    """
+    `complete(messages)` answers from the cache when it can and otherwise calls
+    `complete_fn(messages, model=..., **kwargs)` (llm_client.chat_completion by
+    default) and stores the reply. Returns (text, source) with source one of
+    "exact", "semantic" or "model".
+    """
+
+    def __init__(self, cache, complete_fn=None, model=None):
+        if complete_fn is None:
+            from llm_client import chat_completion as complete_fn
+        if model is None:
+            from llm_client import llm_config
+            model = llm_config()["model"]
+        self.cache = cache
+        self.complete_fn = complete_fn
+        self.model = model
+
+    def complete(self, messages, image=None, **kwargs):
+        model = kwargs.pop("model", None) or self.model
+        hit = self.cache.lookup(model, messages, image)
+        if hit is not None:
+            return hit.response, hit.kind
+        text = self.complete_fn(messages, model=model, **kwargs)
+        self.cache.store(model, messages, text, image)
+        return text, "model"
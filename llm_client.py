@@ -0,0 +1,200 @@
+"""
+Streaming client for OpenAI-compatible chat completion APIs (stdlib only).
+
+`stream_chat(messages)` yields text fragments as the server sends them over
+server-sent events. `StreamingReply` runs that on a background thread and
+accumulates the text, so a Streamlit script can start a reply, return
+immediately, and pick up the partial text on its next rerun. Point
+LLM_BASE_URL at mock_llm_server.py to work offline.
+"""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_MODEL = "gpt-4o"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+class LLMError(Exception):
+    pass
+
+
+def llm_config():
+    """Endpoint settings from the environment"""
+    return {
+        "base_url": os.environ.get("LLM_BASE_URL", DEFAULT_BASE_URL).rstrip("/"),
+        "model": os.environ.get("LLM_MODEL", DEFAULT_MODEL),
+        "api_key": os.environ.get("LLM_API_KEY") or os.environ.get("OPENAI_API_KEY", ""),
+    }
+
+
+def iter_sse_data(lines):
+    """Yield the data payload of each server-sent event from an iterable of byte lines"""
+    data = []
+    for raw in lines:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+    if data:
+        yield "\n".join(data)
+
+
+def _post(path, payload, base_url=None, api_key=None, timeout=60, accept="application/json"):
+    """POST JSON to an API path (e.g. "/chat/completions") and return the open response"""
+    config = llm_config()
+    headers = {"Content-Type": "application/json", "Accept": accept}
+    api_key = api_key if api_key is not None else config["api_key"]
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    req = urllib.request.Request(f"{(base_url or config['base_url']).rstrip('/')}{path}",
+                                 data=json.dumps(payload).encode("utf-8"), headers=headers)
+    try:
+        return urllib.request.urlopen(req, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode("utf-8", "replace")[:500]
+        raise LLMError(f"LLM request failed ({e.code}): {detail}") from e
+    except urllib.error.URLError as e:
+        raise LLMError(f"LLM endpoint unreachable: {e.reason}") from e
+
+
+def open_chat_stream(messages, base_url=None, model=None, api_key=None, max_tokens=1000, timeout=60):
+    """POST a streaming chat completion request and return the open HTTP response"""
+    payload = {
+        "model": model or llm_config()["model"],
+        "messages": messages,
+        "stream": True,
+        "max_tokens": max_tokens,
+    }
+    return _post("/chat/completions", payload, base_url, api_key, timeout, accept="text/event-stream")
+
+
+def chat_completion(messages, base_url=None, model=None, api_key=None, max_tokens=1000, timeout=60):
+    """Non-streaming chat completion; returns the reply text"""
+    payload = {"model": model or llm_config()["model"], "messages": messages, "max_tokens": max_tokens}
+    with _post("/chat/completions", payload, base_url, api_key, timeout) as response:
+        result = json.load(response)
+    return result["choices"][0]["message"]["content"]
+
+
+def embed(texts, base_url=None, model=None, api_key=None, timeout=60):
+    """Embedding vectors for `texts` from the /embeddings endpoint"""
+    payload = {"model": model or os.environ.get("LLM_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL), "input": list(texts)}
+    with _post("/embeddings", payload, base_url, api_key, timeout) as response:
+        result = json.load(response)
+    return [item["embedding"] for item in sorted(result["data"], key=lambda item: item["index"])]
+
+
+def iter_deltas(response):
+    """Text fragments from an open streaming response, until [DONE]"""
+    for data in iter_sse_data(response):
+        if data == "[DONE]":
+            return
+        chunk = json.loads(data)
+        if "error" in chunk:
+            raise LLMError(str(chunk["error"]))
+        for choice in chunk.get("choices", []):
+            text = (choice.get("delta") or {}).get("content")
+            if text:
+                yield text
+
+
+def stream_chat(messages, **kwargs):
+    """Yield the reply to `messages` piece by piece (see open_chat_stream for options)"""
+    with open_chat_stream(messages, **kwargs) as response:
+        yield from iter_deltas(response)
+
+
+class StreamingReply:
+    """
+    Collects a streamed reply on a daemon thread.
+
+    `text`, `done`, `error` and `cancelled` can be read from any thread;
+    `cancel()` stops reading and closes the connection. With a `cache`
+    (an llm_cache.LLMCache), the lookup and the store of the finished reply
+    also run on that thread; `cached` is the CacheHit kind when it answered.
+    `messages` may be a function returning them, called on the thread too.
+    """
+
+    def __init__(self, messages, cache=None, **kwargs):
+        self.messages = messages
+        self.cache = cache
+        self.kwargs = kwargs
+        self.cached = None
+        self._lock = threading.Lock()
+        self._parts = []
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._response = None
+        self.error = None
+        self._thread = None
+
+    @property
+    def text(self):
+        with self._lock:
+            return "".join(self._parts)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="llm-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            if callable(self.messages):
+                self.messages = self.messages()
+            model = self.kwargs.get("model") or llm_config()["model"]
+            if self.cache is not None:
+                # May make an embedding request: another reason to be off the caller's thread
+                hit = self.cache.lookup(model, self.messages)
+                if hit is not None:
+                    with self._lock:
+                        self._parts.append(hit.response)
+                    self.cached = hit.kind
+                    return
+                if self._cancel.is_set():
+                    return
+            response = open_chat_stream(self.messages, **self.kwargs)
+            with self._lock:
+                self._response = response
+            with response:
+                for text in iter_deltas(response):
+                    if self._cancel.is_set():
+                        break
+                    with self._lock:
+                        self._parts.append(text)
+            if self.cache is not None and not self._cancel.is_set() and self.text:
+                self.cache.store(model, self.messages, self.text)
+        except Exception as e:
+            if not self._cancel.is_set():
+                self.error = str(e)
+        finally:
+            self._done.set()
+
+    def cancel(self):
+        self._cancel.set()
+        with self._lock:
+            response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
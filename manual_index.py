@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Page index of the α7R V manual PDF (tree-view-app/public/docs).
+
+The first use extracts the text of every page on a process pool and writes
+an inverted index (word -> pages) next to the PDF. Later runs load that file
+unless the PDF's SHA-256 has changed, so lookups cost a dictionary access
+and a phrase check on a few pages:
+
+    python manual_index.py "SteadyShot Adjust."
+    python manual_index.py --settings          # every menu setting -> pages
+
+`setting_pages()` links each setting name in the α7RV JSON tree to the
+manual pages that mention it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from menu_tree import MENU_ROOT, load_menu_json
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+DOCS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app", "public", "docs")
+MANUAL_PDF = os.path.join(DOCS_DIR, "sony_a7r5_user_manual.pdf")
+
+# Bump when tokenization or the file layout changes
+INDEX_VERSION = 1
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def default_index_path(pdf_path):
+    return os.path.splitext(pdf_path)[0] + ".index.json"
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _extract_range(pdf_path, start, stop):
+    """Worker: (page number, text) for pages start..stop-1 (0-based), numbered from 1"""
+    reader = PdfReader(pdf_path)
+    pages = []
+    for i in range(start, stop):
+        try:
+            text = reader.pages[i].extract_text() or ""
+        except Exception:
+            text = ""
+        pages.append((i + 1, text))
+    return pages
+
+
+def extract_pages(pdf_path, workers=None):
+    """Text of every page, extracted in parallel; returns a list indexed from page 1"""
+    if PdfReader is None:
+        raise RuntimeError("pypdf is required to index the manual: pip install pypdf")
+    count = len(PdfReader(pdf_path).pages)
+    workers = workers or min(8, os.cpu_count() or 1)
+    step = max(1, -(-count // (workers * 4)))
+    ranges = [(start, min(start + step, count)) for start in range(0, count, step)]
+    texts = [""] * count
+    if workers == 1:
+        results = [_extract_range(pdf_path, start, stop) for start, stop in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_extract_range, [pdf_path] * len(ranges),
+                                    [r[0] for r in ranges], [r[1] for r in ranges]))
+    for chunk in results:
+        for page, text in chunk:
+            texts[page - 1] = text
+    return texts
+
+
+class ManualIndex:
+    """Inverted index over the pages of one PDF"""
+
+    def __init__(self, pdf_sha256, pages, terms):
+        self.pdf_sha256 = pdf_sha256
+        self.pages = pages          # normalized text per page: " word word ... "
+        self.terms = terms          # word -> sorted page numbers (1-based)
+
+    @classmethod
+    def build(cls, texts, pdf_sha256=""):
+        pages = []
+        terms = {}
+        for number, text in enumerate(texts, start=1):
+            words = tokenize(text)
+            pages.append(" " + " ".join(words) + " ")
+            for word in set(words):
+                terms.setdefault(word, []).append(number)
+        return cls(pdf_sha256, pages, terms)
+
+    def to_dict(self):
+        return {"version": INDEX_VERSION, "pdf_sha256": self.pdf_sha256, "pages": self.pages, "terms": self.terms}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["pdf_sha256"], data["pages"], data["terms"])
+
+    def pages_for(self, phrase):
+        """Pages containing `phrase` as consecutive words (case-insensitive)"""
+        words = tokenize(phrase)
+        if not words:
+            return []
+        postings = [self.terms.get(word) for word in words]
+        if not all(postings):
+            return []
+        candidates = set(min(postings, key=len)).intersection(*postings)
+        needle = " " + " ".join(words) + " "
+        return sorted(page for page in candidates if needle in self.pages[page - 1])
+
+
+def load_or_build(pdf_path=MANUAL_PDF, index_path=None, workers=None, force=False):
+    """The index for `pdf_path`, rebuilt only when the PDF's hash differs from the saved one"""
+    index_path = index_path or default_index_path(pdf_path)
+    digest = file_sha256(pdf_path)
+    if not force and os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("pdf_sha256") == digest:
+                return ManualIndex.from_dict(data)
+        except (OSError, ValueError, KeyError):
+            pass
+    index = ManualIndex.build(extract_pages(pdf_path, workers), digest)
+    tmp = f"{index_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index.to_dict(), f, ensure_ascii=False)
+    os.replace(tmp, index_path)
+    return index
+
+
+_manual_index = {"stat": None, "index": None}
+_manual_index_lock = threading.Lock()
+
+
+def get_manual_index():
+    """Process-wide index of MANUAL_PDF, reloaded (or rebuilt) when the PDF's mtime or size changes"""
+    st = os.stat(MANUAL_PDF)
+    with _manual_index_lock:
+        if _manual_index["stat"] != (st.st_mtime_ns, st.st_size):
+            # load_or_build compares the SHA-256, so a touched but identical PDF is not re-extracted
+            _manual_index["index"] = load_or_build(MANUAL_PDF)
+            _manual_index["stat"] = (st.st_mtime_ns, st.st_size)
+        return _manual_index["index"]
+
+
+def setting_names(menu):
+    """Setting names defined by one menu JSON file"""
+    names = [menu["menu"]] if menu.get("menu") else []
+    for setting in menu.get("submenu", {}).get("settings", []):
+        if setting.get("name"):
+            names.append(setting["name"])
+        names.extend(setting_names(setting))  # nested submenus
+    return names
+
+
+def iter_settings(root=MENU_ROOT):
+    """Yield (setting name, JSON path) for every setting in the α7RV tree"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if not name.endswith(".json") or name == "modes.json":
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                menu = load_menu_json(path)
+            except (OSError, ValueError):
+                continue
+            for setting in setting_names(menu):
+                yield setting, path
+
+
+def setting_pages(index, root=MENU_ROOT):
+    """{setting name: {"pages": [...], "files": [...]}} for every setting in the tree"""
+    links = {}
+    for setting, path in iter_settings(root):
+        entry = links.setdefault(setting, {"pages": index.pages_for(setting), "files": []})
+        entry["files"].append(os.path.relpath(path, root))
+    return links
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up α7R V manual pages")
+    parser.add_argument("phrase", nargs="*", help="Setting name or phrase to look up")
+    parser.add_argument("--pdf", default=MANUAL_PDF)
+    parser.add_argument("--rebuild", action="store_true", help="Re-extract even if the PDF is unchanged")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--settings", action="store_true", help="List manual pages for every setting in the tree")
+    args = parser.parse_args()
+
+    index = load_or_build(args.pdf, workers=args.workers, force=args.rebuild)
+    if args.settings:
+        for setting, entry in sorted(setting_pages(index).items()):
+            print(f"{setting}: {', '.join(map(str, entry['pages'])) or '-'}")
+    if args.phrase:
+        phrase = " ".join(args.phrase)
+        print(f"{phrase}: {', '.join(map(str, index.pages_for(phrase))) or 'not found'}")
+
+
+if __name__ == "__main__":
+    main()
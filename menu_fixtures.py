@@ -0,0 +1,14 @@
+"""
+Test helper: writes menu JSON files the way the extraction step saves them.
+"""
+
+import json
+import os
+
+
+def write_menu(root, rel_path, data):
+    """Write `data` to root/rel_path behind the "/api: ..." line the LLM extraction step leaves in front"""
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("/api: /api/ask-chatgpt_streamed\n" + json.dumps(data, indent=2))
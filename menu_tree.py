@@ -0,0 +1,74 @@
+"""
+Helpers for reading the α7RV menu tree (tree-view-app/public/α7RV).
+
+Menu JSON files are saved straight from the LLM extraction step, so some of
+them start with a "/api: ..." line before the JSON object and a few contain raw
+control characters inside strings. `load_menu_json` accepts both.
+"""
+
+import json
+import os
+
+MENU_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app", "public", "α7RV")
+
+STILLS_TAB = "Stills"
+MOVIE_TAB = "Movie"
+
+
+def parse_menu_json(text):
+    """Parse menu JSON text, skipping any preamble before the first '{'"""
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object found")
+    return json.loads(text[start:], strict=False)
+
+
+def load_menu_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_menu_json(f.read())
+
+
+def menu_tab(menu):
+    """
+    "Movie" for a setting that only applies when recording movies, else "Stills".
+
+    Movie settings live in the same folders as the stills ones, so the tab
+    comes from the shooting modes: the condition's "mode" list if it has one,
+    else "modes".
+    """
+    condition = menu.get("condition")
+    modes = condition.get("mode") if isinstance(condition, dict) else None
+    if not isinstance(modes, list):
+        modes = menu.get("modes")
+    if isinstance(modes, list) and modes and not {"photo", "stills"} & set(modes):
+        return MOVIE_TAB
+    return STILLS_TAB
+
+
+def tab_name(name, tab):
+    """Setting name kept apart from a same-named setting of the other tab, e.g. "Movie/File Format\""""
+    return f"{tab}/{name}"
+
+
+def safe_dir_name(name):
+    """Menu names like "Shutter/Silent" become "Shutter_Silent", as in the existing tree"""
+    return name.replace("/", "_").replace("\\", "_").strip()
+
+
+def submenu_dir_spec(menu):
+    """
+    Nested directory spec for a submenu JSON file (e.g. 7_image_stabilization.json).
+
+    Returns {"1 SteadyShot": {}, "2 SteadyShot Adjust.": {}, ...}, numbering
+    settings in menu order the way the α7RV tree does. Repeated setting names
+    are listed once; nested submenus become nested dicts.
+    """
+    spec = {}
+    seen = set()
+    for setting in menu.get("submenu", {}).get("settings", []):
+        name = safe_dir_name(setting.get("name", ""))
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        spec[f"{len(seen)} {name}"] = submenu_dir_spec(setting)
+    return spec
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Local mock of the OpenAI chat completions API, for developing and testing the
+streaming chat offline.
+
+    python mock_llm_server.py --port 8008 --delay 0.05
+    LLM_BASE_URL=http://localhost:8008/v1 streamlit run capp.py
+
+POST /v1/chat/completions answers with a canned reply that echoes the last
+user message, word by word as server-sent events when "stream" is true.
+POST /v1/embeddings returns small bag-of-words vectors.
+"""
+
+import argparse
+import json
+import time
+import zlib
+
+from flask import Flask, Response, jsonify, request
+
+
+def reply_for(messages):
+    last = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+    if isinstance(last, list):
+        last = " ".join(part.get("text", "") for part in last if isinstance(part, dict))
+    return f"Mock answer to: {last}"
+
+
+def create_app(delay=0.02, reply_fn=reply_for):
+    app = Flask(__name__)
+
+    @app.route("/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        data = request.get_json() or {}
+        model = data.get("model", "mock")
+        text = reply_fn(data.get("messages", []))
+        if not data.get("stream"):
+            return jsonify({
+                "id": "chatcmpl-mock", "object": "chat.completion", "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+            })
+
+        def events():
+            words = text.split(" ")
+            for i, word in enumerate(words):
+                chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word},
+                                      "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                time.sleep(delay)
+            done = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.route("/v1/embeddings", methods=["POST"])
+    def embeddings():
+        data = request.get_json() or {}
+        inputs = data.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return jsonify({
+            "object": "list", "model": data.get("model", "mock"),
+            "data": [{"object": "embedding", "index": i, "embedding": mock_embedding(text)}
+                     for i, text in enumerate(inputs)],
+        })
+
+    return app
+
+
+def mock_embedding(text, dims=64):
+    """Deterministic bag-of-words vector: texts sharing most words come out similar"""
+    vector = [0.0] * dims
+    for word in text.lower().split():
+        word = word.strip(".,!?;:\"'()[]")
+        if word:
+            vector[zlib.crc32(word.encode("utf-8")) % dims] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds between streamed words")
+    args = parser.parse_args()
+    create_app(args.delay).run(host="127.0.0.1", port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Minimal change plans for applying a preset to the camera.
+
+`PresetPlanner` knows where every setting of the α7RV menu tree lives. Given
+the current camera state and a target preset, both {setting: value}, `plan()`
+lists only the settings whose value differs. Changes are grouped by the menu
+screen the user has to open and ordered the way the menu is laid out (tab,
+page, item number), so the camera is walked through once:
+
+    planner = get_planner()
+    plan = planner.plan(current_state, preset)
+    for group, steps in plan.groups: ...
+
+`PresetBank` holds many saved presets encoded once as a presets × settings
+matrix of value codes, with columns in menu order. Diffing all of them
+against the current state is then one array comparison (`diff()`,
+`change_counts()`, `plans()`); `plan_many()` is the one-off form.
+"""
+
+import os
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from menu_tree import MENU_ROOT, MOVIE_TAB, load_menu_json, menu_tab, tab_name
+
+# One setting of the menu tree; order is its position in menu order
+Location = namedtuple("Location", ["name", "path", "group", "navigation", "order"])
+Step = namedtuple("Step", ["setting", "current", "target", "group", "navigation", "path"])
+Plan = namedtuple("Plan", ["steps", "groups", "unchanged", "unknown"])
+
+OTHER_GROUP = "Other"
+
+_NUMBER_RE = re.compile(r"(\d+)")
+_PREFIX_RE = re.compile(r"^\d+[ _]")
+_PAGE_RE = re.compile(r"^PAGE_\d+$")
+
+
+@lru_cache(maxsize=16384)
+def normalize(text):
+    """Key for setting names and values: case, spacing, brackets and a trailing dot ignored"""
+    return " ".join(str(text).strip().strip("[]").lower().split()).rstrip(".").strip()
+
+
+def natural_key(rel_path):
+    """Sort key for paths with numbered entries: "8 High ISO NR" before "10 Color Space\""""
+    return [[int(part) if part.isdigit() else part.lower() for part in _NUMBER_RE.split(component)]
+            for component in rel_path.replace("\\", "/").split("/")]
+
+
+def group_label(group):
+    """Readable name for a group path, e.g. "Stills › Shooting › Image Quality Rec\""""
+    parts = [p for p in group.replace("\\", "/").split("/") if p and not _PAGE_RE.match(p)]
+    return " › ".join(" ".join(_PREFIX_RE.sub("", p).replace("_", " ").replace("-", " ").split()) for p in parts)
+
+
+def load_locations(root=MENU_ROOT):
+    """
+    Location of every setting file in menu order; the first file wins for
+    duplicate names within a tab. A name used by both a stills and a movie
+    setting gets a second location for the movie one, as "Movie/File Format".
+    """
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(".json") or filename == "modes.json" or filename.startswith("PAGE_"):
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                menu = load_menu_json(path)
+            except (OSError, ValueError):
+                continue
+            if menu.get("menu"):
+                found.append((natural_key(os.path.relpath(path, root)), path, menu))
+    found.sort(key=lambda entry: entry[0])
+    tabs = {}
+    for _, _, menu in found:
+        tabs.setdefault(normalize(menu["menu"]), set()).add(menu_tab(menu))
+    locations = {}
+    for _, path, menu in found:
+        name = menu["menu"]
+        if menu_tab(menu) == MOVIE_TAB and len(tabs[normalize(name)]) > 1:
+            name = tab_name(name, MOVIE_TAB)
+        key = normalize(name)
+        if key in locations:
+            continue
+        # The screen holding the setting: the folder above the setting's own folder
+        group = os.path.dirname(os.path.dirname(os.path.relpath(path, root)))
+        locations[key] = Location(name, path, group_label(group), menu.get("navigation") or "", len(locations))
+    return locations
+
+
+class PresetPlanner:
+    def __init__(self, locations):
+        self.locations = locations
+        self.columns = sorted(locations, key=lambda key: locations[key].order)
+        self._column_index = {key: i for i, key in enumerate(self.columns)}
+
+    @classmethod
+    def from_tree(cls, root=MENU_ROOT):
+        return cls(load_locations(root))
+
+    def _step(self, key, name, current, target):
+        location = self.locations.get(key)
+        if location is None:
+            return Step(name, current, target, OTHER_GROUP, "", "")
+        return Step(location.name, current, target, location.group, location.navigation, location.path)
+
+    def _finish(self, steps, unchanged, unknown):
+        # Known settings in menu order, then the rest as given
+        steps.sort(key=lambda step: self.locations[normalize(step.setting)].order
+                   if step.group != OTHER_GROUP else len(self.locations))
+        return self._group(steps, unchanged, unknown)
+
+    @staticmethod
+    def _group(steps, unchanged, unknown):
+        groups = []
+        for step in steps:
+            if not groups or groups[-1][0] != step.group:
+                groups.append((step.group, []))
+            groups[-1][1].append(step)
+        return Plan(steps, groups, unchanged, unknown)
+
+    def plan(self, current, target):
+        """
+        Changes needed to go from `current` to `target` ({setting: value}).
+
+        Settings the target leaves out are not touched. Settings the tree
+        doesn't know are still planned, in an "Other" group at the end, and
+        listed in `unknown`.
+        """
+        current_keys = {normalize(name): name for name in current}
+        steps = []
+        unknown = []
+        unchanged = 0
+        for name, value in target.items():
+            key = normalize(name)
+            known = current_keys.get(key)
+            value_now = current[known] if known is not None else None
+            if value_now is not None and normalize(value_now) == normalize(value):
+                unchanged += 1
+                continue
+            if key not in self.locations:
+                unknown.append(name)
+            steps.append(self._step(key, name, value_now, value))
+        return self._finish(steps, unchanged, unknown)
+
+    def plan_many(self, current, presets):
+        """Plan for each preset in `presets` against the same `current` state"""
+        return PresetBank(self, presets).plans(current)
+
+
+class PresetBank:
+    """
+    Saved presets encoded once as a presets × settings matrix of value codes.
+
+    Columns are the menu settings in menu order, then settings outside the
+    tree in the order first seen; 0 means "not set". `diff(current)` encodes
+    only the current state and compares it with every preset in one array
+    operation, so re-planning after each change on the camera stays cheap.
+    """
+
+    def __init__(self, planner, presets):
+        self.planner = planner
+        self.presets = list(presets)
+        self.columns = list(planner.columns)
+        self._column_index = dict(planner._column_index)   # raw and normalized names -> column
+        self._codes = {}   # (column, raw or normalized value) -> code
+        rows, columns, codes = [], [], []
+        for row, preset in enumerate(self.presets):
+            for name, value in preset.items():
+                column = self._column_of(name)
+                rows.append(row)
+                columns.append(column)
+                codes.append(self._code_of(column, value))
+        self.matrix = np.zeros((len(self.presets), len(self.columns)), dtype=np.int32)
+        self.matrix[rows, columns] = codes
+        self.set_counts = (self.matrix != 0).sum(axis=1)
+
+    def _column_of(self, name, add=True):
+        column = self._column_index.get(name)
+        if column is None:
+            key = normalize(name)
+            column = self._column_index.get(key)
+            if column is None:
+                if not add:
+                    return None
+                column = self._column_index[key] = len(self.columns)
+                self.columns.append(key)
+            self._column_index[name] = column
+        return column
+
+    def _code_of(self, column, value, add=True):
+        code = self._codes.get((column, value))
+        if code is None:
+            code = self._codes.get((column, normalize(value)))
+            if code is None:
+                if not add:
+                    return -1  # a value no preset uses: differs from all of them
+                code = self._codes[(column, normalize(value))] = len(self._codes) + 1
+            self._codes[(column, value)] = code
+        return code
+
+    def encode_state(self, current):
+        state = np.zeros(len(self.columns), dtype=np.int32)
+        for name, value in current.items():
+            column = self._column_of(name, add=False)
+            if column is not None:
+                state[column] = self._code_of(column, value, add=False)
+        return state
+
+    def diff(self, current):
+        """Bool array presets × columns: True where a preset sets a value different from `current`"""
+        return (self.matrix != 0) & (self.matrix != self.encode_state(current))
+
+    def change_counts(self, current):
+        """Number of changes each preset needs from `current`"""
+        return self.diff(current).sum(axis=1)
+
+    def plans(self, current, indexes=None):
+        """Plan for each preset (or those at `indexes`) against `current`"""
+        changed = self.diff(current)
+        current_keys = {normalize(name): name for name in current}
+        plans = []
+        for row in range(len(self.presets)) if indexes is None else indexes:
+            preset = self.presets[row]
+            names = {normalize(name): name for name in preset}
+            steps = []
+            unknown = []
+            # Columns are already in menu order, so the steps come out sorted
+            for column in np.flatnonzero(changed[row]):
+                key = self.columns[column]
+                known = current_keys.get(key)
+                steps.append(self.planner._step(key, names[key], current[known] if known is not None else None,
+                                                preset[names[key]]))
+                if key not in self.planner.locations:
+                    unknown.append(names[key])
+            plans.append(PresetPlanner._group(steps, int(self.set_counts[row]) - len(steps), unknown))
+        return plans
+
+
+_planner = None
+_planner_lock = threading.Lock()
+
+
+def get_planner(refresh=False):
+    """Process-wide planner for MENU_ROOT"""
+    global _planner
+    with _planner_lock:
+        if _planner is None or refresh:
+            _planner = PresetPlanner.from_tree()
+        return _planner
@@ -4,21 +4,38 @@ from pprint import pprint as pp
 from PIL import Image, ImageGrab
 from time import sleep
 import click
+import screen_capture
 click.disable_unicode_literals_warning = True
 
-def print_screen(fname, itype="JPEG"):
-    img = ImageGrab.grab()
+def print_screen(fname, itype="JPEG", bbox=None):
+    if bbox:
+        # Only read the monitor(s) the region is on
+        img = screen_capture.grab(bbox)
+    else:
+        img = ImageGrab.grab()
     img.save(fname, itype, quality=100, subsampling=0)
 
+def parse_bbox(ctx, param, value):
+    if not value:
+        return None
+    try:
+        left, top, right, bottom = (int(v) for v in value.split(','))
+    except ValueError:
+        raise click.BadParameter('expected left,top,right,bottom')
+    return (left, top, right, bottom)
+
 @click.command()
 @click.option('-f', '--file_name', default='snap', help='File prefix.', required=True)
+@click.option('-b', '--bbox', default=None, callback=parse_bbox,
+              help='Region to capture as left,top,right,bottom (negative values allowed).')
 def start_loop(**kwargs):
     fn = kwargs.get('file_name')
+    bbox = kwargs.get('bbox')
     assert fn
     for i in range(10):
         sleep(1)
         imgfn = '%s_%03d.jpg' % (fn, i)
-        print_screen(imgfn)
+        print_screen(imgfn, bbox=bbox)
         print('Screenshot %d is saved to "%s"' % (i, imgfn))
 
 if __name__ == "__main__":
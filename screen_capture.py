@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Screen capture helpers shared by the Python camera tools.
+
+Regions come from tree-view-app/public/snap_config.json. The `camera_snap`
+entry is the main camera window rectangle; an optional `regions` map inside it
+names sub-areas (full menu, tab bar, setting panel, ...) in absolute screen
+coordinates. `grab_regions` grabs the union of the requested regions once and
+crops every region out of that single in-memory image.
+
+Grabs are monitor-aware: a bbox is split into the parts that fall on each
+physical monitor and only those pixels are read (through `mss` when it is
+installed), so capturing a window on a secondary monitor at negative
+coordinates no longer copies the whole virtual desktop first.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from PIL import Image, ImageGrab
+
+try:
+    import mss
+except ImportError:
+    mss = None
+
+SNAP_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "tree-view-app", "public", "snap_config.json")
+
+
+def rect_to_bbox(rect):
+    """Convert a {left, top, width, height} dict to a (left, top, right, bottom) tuple"""
+    left = int(rect["left"])
+    top = int(rect["top"])
+    return (left, top, left + int(rect["width"]), top + int(rect["height"]))
+
+
+def load_snap_regions(config_path=SNAP_CONFIG_PATH):
+    """
+    Return {name: bbox} for every region in snap_config.json.
+
+    The `camera_snap` rectangle itself is always included under the name
+    "camera_snap" so single-region callers keep working unchanged.
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    snap = config["camera_snap"]
+    regions = {"camera_snap": rect_to_bbox(snap)}
+    for name, rect in snap.get("regions", {}).items():
+        regions[name] = rect_to_bbox(rect)
+    return regions
+
+
+def union_bbox(bboxes):
+    """Smallest bbox containing every bbox in `bboxes`"""
+    bboxes = list(bboxes)
+    if not bboxes:
+        raise ValueError("union_bbox() needs at least one bbox")
+    return (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+            max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+
+
+Monitor = namedtuple("Monitor", ["left", "top", "right", "bottom"])
+
+_local = threading.local()
+
+
+def _mss_instance():
+    # mss handles are not thread-safe, so keep one per thread
+    sct = getattr(_local, "sct", None)
+    if sct is None:
+        sct = _local.sct = mss.mss()
+    return sct
+
+
+def get_monitors():
+    """
+    Return the physical monitors as Monitor tuples in virtual-desktop coordinates.
+
+    Returns an empty list when no monitor backend is available; callers then
+    fall back to a plain ImageGrab of the bbox.
+    """
+    if mss is not None:
+        # monitors[0] is the combined virtual desktop, the rest are real screens
+        return [Monitor(m["left"], m["top"], m["left"] + m["width"], m["top"] + m["height"])
+                for m in _mss_instance().monitors[1:]]
+    try:
+        import win32api
+    except ImportError:
+        return []
+    return [Monitor(*rect) for _, _, rect in win32api.EnumDisplayMonitors()]
+
+
+def monitor_slices(bbox, monitors):
+    """
+    Split `bbox` into the pieces that lie on each monitor.
+
+    Returns a list of (monitor_index, bbox) pairs in virtual-desktop
+    coordinates. Parts of `bbox` that are on no monitor are left out.
+    """
+    left, top, right, bottom = bbox
+    slices = []
+    for index, mon in enumerate(monitors):
+        s_left, s_top = max(left, mon.left), max(top, mon.top)
+        s_right, s_bottom = min(right, mon.right), min(bottom, mon.bottom)
+        if s_left < s_right and s_top < s_bottom:
+            slices.append((index, (s_left, s_top, s_right, s_bottom)))
+    return slices
+
+
+def _grab_rect_mss(bbox):
+    left, top, right, bottom = bbox
+    shot = _mss_instance().grab({"left": left, "top": top, "width": right - left, "height": bottom - top})
+    return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+
+def _grab_rect_pil(bbox):
+    return ImageGrab.grab(bbox=bbox, all_screens=True)
+
+
+def grab(bbox, monitors=None, grab_rect=None):
+    """
+    Grab a (left, top, right, bottom) screen rectangle.
+
+    Only the monitors `bbox` overlaps are read. `monitors` and `grab_rect`
+    default to the real monitor layout and the mss (or PIL) backend; tests
+    pass a fake layout and grabber instead.
+    """
+    if monitors is None:
+        monitors = get_monitors()
+    if grab_rect is None:
+        grab_rect = _grab_rect_mss if mss is not None else _grab_rect_pil
+    if not monitors:
+        return grab_rect(tuple(bbox))
+    slices = monitor_slices(bbox, monitors)
+    if len(slices) == 1 and slices[0][1] == tuple(bbox):
+        return grab_rect(tuple(bbox))
+
+    # The bbox spans several monitors or sticks out of the desktop: grab each
+    # piece separately and paste it onto a black canvas of the requested size.
+    left, top, right, bottom = bbox
+    canvas = Image.new("RGB", (right - left, bottom - top))
+    for _, piece in slices:
+        canvas.paste(grab_rect(piece), (piece[0] - left, piece[1] - top))
+    return canvas
+
+
+class SyntheticCaptureSource:
+    """
+    Drop-in replacement for `grab` that draws images instead of reading the screen.
+
+    Every call returns a new frame (a gradient shifted by the frame number), so
+    callers can tell frames apart. Used by tests and for running the camera
+    API on machines without a display. `delay` simulates a slow grab.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, bbox):
+        with self._lock:
+            self.frames += 1
+            frame = self.frames
+        if self.delay:
+            time.sleep(self.delay)
+        width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        gradient = Image.linear_gradient("L").resize((width, height))
+        shade = Image.new("L", (width, height), (frame * 37) % 256)
+        return Image.merge("RGB", (gradient, shade, gradient.rotate(90)))
+
+
+def grab_regions(regions, grab_fn=grab):
+    """
+    Capture several named regions with a single screen grab.
+
+    `regions` maps names to bboxes. The union bbox is grabbed once with
+    `grab_fn` and each region is cropped from that buffer, so N regions
+    cost one grab instead of N.
+    """
+    if not regions:
+        return {}
+    outer = union_bbox(regions.values())
+    frame = grab_fn(outer)
+    ox, oy = outer[0], outer[1]
+    return {
+        name: frame.crop((left - ox, top - oy, right - ox, bottom - oy))
+        for name, (left, top, right, bottom) in regions.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture snap_config.json regions with one grab.")
+    parser.add_argument("names", nargs="*", help="Region names to capture (default: all)")
+    parser.add_argument("-c", "--config", default=SNAP_CONFIG_PATH, help="Path to snap_config.json")
+    parser.add_argument("-o", "--out_dir", default="camera_snaps", help="Directory for the PNG files")
+    args = parser.parse_args()
+
+    regions = load_snap_regions(args.config)
+    if args.names:
+        unknown = [n for n in args.names if n not in regions]
+        if unknown:
+            parser.error(f"Unknown region(s): {', '.join(unknown)}. Available: {', '.join(regions)}")
+        regions = {n: regions[n] for n in args.names}
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for name, img in grab_regions(regions).items():
+        out_path = os.path.join(args.out_dir, f"{name}.png")
+        img.save(out_path)
+        print(f'Region "{name}" saved to "{out_path}"')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Lossless transcoding of the menu screenshot library.
+
+Every PNG under the menu tree is re-encoded as an optimized PNG and as a
+lossless WebP. The output is decoded and compared pixel for pixel with the
+source, and the smallest verified encoding is kept. The source is kept if
+nothing verified is smaller.
+
+    python screenshot_archive.py                    # mirror into screenshot-archive/
+    python screenshot_archive.py --in-place         # optimized PNG only, same file names
+
+Archive mode writes a mirror tree, so .webp files never replace the .png
+paths the tree and the apps refer to. In-place mode rewrites the PNGs
+themselves.
+
+Files are processed on a process pool. The manifest records, for each
+source path, the SHA-256 its output was made from. A re-run skips a file
+only if its path and content both match an entry. A duplicate screenshot is
+copied from its twin's output instead of being encoded again. Outputs of
+deleted sources are removed. ICC profile, EXIF, DPI and PNG text chunks are
+carried over.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, PngImagePlugin, features
+
+from menu_tree import MENU_ROOT
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshot-archive")
+IN_PLACE_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app",
+                                 ".screenshot-manifest.json")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 2
+
+# Modes whose pixels survive a round trip through RGBA; others (16-bit, CMYK...) are kept as they are
+VERIFIABLE_MODES = {"1", "L", "LA", "P", "PA", "RGB", "RGBA"}
+WEBP_EFFORT = 4
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _metadata(im):
+    return {key: im.info[key] for key in ("icc_profile", "exif", "dpi") if im.info.get(key)}
+
+
+def _png_text(im):
+    """tEXt/iTXt chunks of a PNG, to write back with the optimized PNG"""
+    text = getattr(im, "text", None)
+    if not text:
+        return {}
+    info = PngImagePlugin.PngInfo()
+    for key, value in text.items():
+        info.add_text(key, value)
+    return {"pnginfo": info}
+
+
+def _pixels(im):
+    return np.asarray(im.convert("RGBA"))
+
+
+def encode_candidates(im, webp=True, effort=WEBP_EFFORT):
+    """[(format, bytes)] of lossless encodings of `im`"""
+    candidates = []
+    out = io.BytesIO()
+    im.save(out, "PNG", optimize=True, **_metadata(im), **_png_text(im),
+            **({"transparency": im.info["transparency"]} if "transparency" in im.info else {}))
+    candidates.append(("png", out.getvalue()))
+    if webp and features.check("webp"):
+        out = io.BytesIO()
+        im.save(out, "WEBP", lossless=True, quality=100, method=effort, exact=True,
+                **{k: v for k, v in _metadata(im).items() if k != "dpi"})
+        candidates.append(("webp", out.getvalue()))
+    return candidates
+
+
+def transcode(source, target_base, webp=True, effort=WEBP_EFFORT):
+    """
+    Worker: write the smallest verified encoding of `source` to target_base + extension.
+
+    Returns a manifest entry: {"format", "output", "source_size", "size", "output_hash"}.
+    """
+    with open(source, "rb") as f:
+        data = f.read()
+    with Image.open(io.BytesIO(data)) as im:
+        im.load()
+        best = ("png", data, "kept")
+        if im.mode in VERIFIABLE_MODES:
+            reference = _pixels(im)
+            for fmt, encoded in sorted(encode_candidates(im, webp, effort), key=lambda c: len(c[1])):
+                if len(encoded) >= len(best[1]):
+                    break
+                with Image.open(io.BytesIO(encoded)) as check:
+                    if np.array_equal(_pixels(check), reference):
+                        best = (fmt, encoded, "transcoded")
+                        break
+    fmt, encoded, status = best
+    target = f"{target_base}.{fmt}"
+    if status == "transcoded" or os.path.abspath(target) != os.path.abspath(source):
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp = f"{target}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp, target)
+    return {"format": fmt, "status": status, "output": target, "source_size": len(data), "size": len(encoded),
+            "output_hash": hashlib.sha256(encoded).hexdigest()}
+
+
+def load_manifest(path):
+    """{source path relative to the root: entry} from a previous run, or {}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data["sources"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_manifest(sources, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "sources": sources}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def list_screenshots(root):
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        found.extend(os.path.join(dirpath, name) for name in sorted(filenames) if name.lower().endswith(".png"))
+    return found
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def archive_library(root=MENU_ROOT, out_dir=ARCHIVE_DIR, in_place=False, manifest_path=None, workers=None,
+                    effort=WEBP_EFFORT):
+    """
+    Transcode every PNG under `root` whose output isn't already up to date.
+
+    Returns {"transcoded", "kept", "copied", "skipped", "removed", "source_bytes", "bytes"}.
+    The manifest maps each source path (relative to `root`) to the hash it
+    had when its output (relative to the output directory) was written. A
+    file is skipped only when both still match. Outputs of deleted sources
+    and outputs left behind by a format change are removed.
+    """
+    out_dir = root if in_place else out_dir
+    manifest_path = manifest_path or (IN_PLACE_MANIFEST if in_place else os.path.join(out_dir, MANIFEST_NAME))
+    old = load_manifest(manifest_path)
+    stats = {"transcoded": 0, "kept": 0, "copied": 0, "skipped": 0, "removed": 0, "source_bytes": 0, "bytes": 0}
+    current = {os.path.relpath(source, root): file_sha256(source) for source in list_screenshots(root)}
+    sources = {}
+    # Outputs still made from the content the source has now, usable for its duplicates
+    twins = {}
+    for rel, entry in old.items():
+        # In place, the file itself is the output: it is up to date when it holds the output bytes
+        done_hash = entry["output_hash"] if in_place else entry["hash"]
+        if current.get(rel) == done_hash and os.path.exists(os.path.join(out_dir, entry["output"])):
+            sources[rel] = entry
+            twins.setdefault(entry["hash"], entry)
+
+    jobs = {}   # source hash -> [(rel, target base)]; the first one is encoded, the rest copied
+    for rel, digest in current.items():
+        if rel in sources:
+            stats["skipped"] += 1
+            continue
+        target_base = os.path.join(out_dir, os.path.splitext(rel)[0])
+        twin = twins.get(digest)
+        if twin is not None:
+            target = f"{target_base}.{twin['format']}"
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(out_dir, twin["output"]), target)
+            sources[rel] = dict(twin, output=os.path.relpath(target, out_dir))
+            stats["copied"] += 1
+            continue
+        jobs.setdefault(digest, []).append((rel, target_base))
+
+    digests = list(jobs)
+    firsts = [jobs[d][0] for d in digests]
+    workers = workers or min(8, os.cpu_count() or 1)
+    args = ([os.path.join(root, rel) for rel, _ in firsts], [t for _, t in firsts], [not in_place] * len(firsts),
+            [effort] * len(firsts))
+    if workers == 1 or len(firsts) <= 1:
+        results = [transcode(*job) for job in zip(*args)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(transcode, *args, chunksize=4))
+
+    for digest, result in zip(digests, results):
+        entry = {"hash": digest, "format": result["format"], "output": os.path.relpath(result["output"], out_dir),
+                 "source_size": result["source_size"], "size": result["size"], "output_hash": result["output_hash"]}
+        sources[jobs[digest][0][0]] = entry
+        stats[result["status"]] += 1
+        stats["source_bytes"] += result["source_size"]
+        stats["bytes"] += result["size"]
+        for rel, target_base in jobs[digest][1:]:
+            target = f"{target_base}.{result['format']}"
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(result["output"], target)
+            sources[rel] = dict(entry, output=os.path.relpath(target, out_dir))
+            stats["copied"] += 1
+
+    if not in_place:
+        # Outputs of sources that are gone, or that were re-encoded to another format
+        kept = {entry["output"] for entry in sources.values()}
+        for rel, entry in old.items():
+            if entry["output"] not in kept and os.path.exists(os.path.join(out_dir, entry["output"])):
+                _remove(os.path.join(out_dir, entry["output"]))
+                stats["removed"] += 1
+    save_manifest(sources, manifest_path)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Losslessly re-encode the menu screenshots")
+    parser.add_argument("--root", default=MENU_ROOT)
+    parser.add_argument("--out", default=ARCHIVE_DIR, help="Mirror directory for the archive")
+    parser.add_argument("--in-place", action="store_true", help="Rewrite the PNGs themselves (no WebP)")
+    parser.add_argument("--manifest", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--effort", type=int, default=WEBP_EFFORT, help="WebP effort 0-6 (slower, smaller)")
+    args = parser.parse_args()
+    stats = archive_library(args.root, args.out, args.in_place, args.manifest, args.workers, args.effort)
+    saved = stats["source_bytes"] - stats["bytes"]
+    print(f"{stats['transcoded']} transcoded, {stats['kept']} kept, {stats['copied']} copied, "
+          f"{stats['skipped']} already done, {stats['removed']} stale outputs removed; "
+          f"{stats['source_bytes'] / 1e6:.1f} MB -> {stats['bytes'] / 1e6:.1f} MB "
+          f"({saved / 1e6:.1f} MB saved)")
+
+
+if __name__ == "__main__":
+    main()
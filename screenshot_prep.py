@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Screenshot preprocessing before LLM extraction, in one decode per image.
+
+The Node extraction route runs sharp's trim -> removeAlpha -> flatten -> JPEG
+chain on every capture. `prepare()` does the same work in Python. It decodes
+the image once into a NumPy array and then:
+  - composites any alpha onto a white background;
+  - trims the border that matches the top-left pixel, using vectorized
+    strip tests that scan inward from each edge;
+  - downscales the long side to MAX_SIDE;
+  - encodes JPEG once, without metadata.
+
+The result is a `Payload` whose `image_part()` is ready to drop into a chat
+message:
+
+    payload = prepare("tree-view-app/public/α7RV/2 Main/2 Main.png")
+    messages = [{"role": "user", "content": [{"type": "text", "text": prompt}, image_part(payload)]}]
+
+    python screenshot_prep.py tree-view-app/public/α7RV --jsonl payloads.jsonl --out prepared/
+
+`prepare_directory()` runs a whole folder on a process pool.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from menu_tree import MENU_ROOT
+
+# box: (left, top, right, bottom) of the kept region in source pixels
+Payload = namedtuple("Payload", ["source", "jpeg", "width", "height", "box"])
+
+TRIM_THRESHOLD = 10      # max channel difference from the border colour still counted as border (as sharp)
+MAX_SIDE = 1568          # vision models downscale larger images anyway
+QUALITY = 75
+BACKGROUND = (255, 255, 255)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def flatten(pixels, background=BACKGROUND):
+    """RGB uint8 array from an RGBA one, composited onto `background`"""
+    alpha = pixels[..., 3:4].astype(np.uint16)
+    rgb = pixels[..., :3].astype(np.uint16) * alpha
+    rgb += np.asarray(background, dtype=np.uint16) * (255 - alpha)
+    return ((rgb + 127) // 255).astype(np.uint8)
+
+
+def _differs(block, color, threshold):
+    # |block - color| per channel without leaving uint8
+    return (np.maximum(block, color) - np.minimum(block, color)).max(axis=-1) > threshold
+
+
+def _first_hit(test, n):
+    """Index of the first of n lines where test(start, stop) is True, in strips that double in size"""
+    start, step = 0, 8
+    while start < n:
+        stop = min(n, start + step)
+        hits = np.flatnonzero(test(start, stop))
+        if hits.size:
+            return start + int(hits[0])
+        start, step = stop, step * 2
+    return None
+
+
+def trim_box(rgb, threshold=TRIM_THRESHOLD):
+    """
+    (left, top, right, bottom) of the content differing from the top-left pixel; the whole image if none does.
+
+    Each edge is scanned inward in growing strips, so a capture with a thin
+    border costs a few small array operations instead of a full-image pass.
+    """
+    height, width = rgb.shape[:2]
+    color = rgb[0, 0]
+    top = _first_hit(lambda i, j: _differs(rgb[i:j], color, threshold).any(axis=1), height)
+    if top is None:
+        return 0, 0, width, height
+    flipped = rgb[::-1]
+    bottom = height - _first_hit(lambda i, j: _differs(flipped[i:j], color, threshold).any(axis=1), height)
+    band = rgb[top:bottom]
+    left = _first_hit(lambda i, j: _differs(band[:, i:j], color, threshold).any(axis=0), width)
+    flipped = band[:, ::-1]
+    right = width - _first_hit(lambda i, j: _differs(flipped[:, i:j], color, threshold).any(axis=0), width)
+    return left, top, right, bottom
+
+
+def prepare(source, max_side=MAX_SIDE, quality=QUALITY, threshold=TRIM_THRESHOLD, background=BACKGROUND, trim=True):
+    """Payload for an image path or bytes: trimmed, flattened, downscaled JPEG"""
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as im:
+        has_alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+        pixels = np.asarray(im.convert("RGBA" if has_alpha else "RGB"))
+    rgb = flatten(pixels, background) if has_alpha else pixels
+    box = trim_box(rgb, threshold) if trim else (0, 0, rgb.shape[1], rgb.shape[0])
+    out = Image.fromarray(rgb[box[1]:box[3], box[0]:box[2]])
+    if max_side and max(out.size) > max_side:
+        scale = max_side / max(out.size)
+        out = out.resize((max(1, round(out.width * scale)), max(1, round(out.height * scale))), Image.LANCZOS,
+                         reducing_gap=3.0)
+    buf = io.BytesIO()
+    out.save(buf, "JPEG", quality=quality, optimize=True)
+    return Payload(source if isinstance(source, str) else "", buf.getvalue(), out.width, out.height, box)
+
+
+def data_url(payload):
+    return "data:image/jpeg;base64," + base64.b64encode(payload.jpeg).decode("ascii")
+
+
+def image_part(payload):
+    """Chat message content part for the payload"""
+    return {"type": "image_url", "image_url": {"url": data_url(payload)}}
+
+
+def list_images(root):
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        found.extend(os.path.join(dirpath, name) for name in sorted(filenames)
+                     if name.lower().endswith(IMAGE_EXTENSIONS))
+    return found
+
+
+def _prepare_file(path, options):
+    return prepare(path, **options)
+
+
+def prepare_directory(root=MENU_ROOT, out_dir=None, workers=None, **options):
+    """
+    Payloads for every image under `root`, prepared on a process pool.
+
+    With `out_dir`, each JPEG is also written there under its relative path
+    with a .jpg extension.
+    """
+    paths = list_images(root)
+    workers = workers or min(8, os.cpu_count() or 1)
+    if workers == 1 or len(paths) <= 1:
+        payloads = [prepare(path, **options) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            payloads = list(pool.map(_prepare_file, paths, [options] * len(paths), chunksize=8))
+    if out_dir:
+        for payload in payloads:
+            target = os.path.join(out_dir, os.path.splitext(os.path.relpath(payload.source, root))[0] + ".jpg")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(payload.jpeg)
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trim, flatten, resize and JPEG-encode screenshots for the LLM")
+    parser.add_argument("root", nargs="?", default=MENU_ROOT)
+    parser.add_argument("--out", help="Write the JPEGs to this folder (mirroring the tree)")
+    parser.add_argument("--jsonl", help="Write one ready-to-send image part per line to this file")
+    parser.add_argument("--max-side", type=int, default=MAX_SIDE)
+    parser.add_argument("--quality", type=int, default=QUALITY)
+    parser.add_argument("--threshold", type=int, default=TRIM_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    payloads = prepare_directory(args.root, args.out, args.workers, max_side=args.max_side, quality=args.quality,
+                                 threshold=args.threshold)
+    if args.jsonl:
+        with open(args.jsonl, "w", encoding="utf-8") as f:
+            for payload in payloads:
+                f.write(json.dumps({"source": os.path.relpath(payload.source, args.root), "width": payload.width,
+                                    "height": payload.height, "box": payload.box, "image_part": image_part(payload)},
+                                   ensure_ascii=False) + "\n")
+    total = sum(len(p.jpeg) for p in payloads)
+    print(f"{len(payloads)} images -> {total / 1e6:.1f} MB of JPEG")
+
+
+if __name__ == "__main__":
+    main()
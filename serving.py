@@ -0,0 +1,273 @@
+"""
+Production serving for the Python Flask services.
+
+`serve(app, host, port)` replaces `app.run(debug=True)`:
+
+- SERVER_MODE=dev keeps the old single-process debug server with the reloader.
+- Otherwise the app is served by waitress when it is installed, or by a
+  werkzeug server that handles requests on a fixed-size thread pool.
+- WORKERS sets the number of request threads (default: 4 per CPU, max 32).
+- REQUEST_TIMEOUT (seconds, default 30) is the idle-connection timeout: a
+  client that sends nothing for that long is disconnected (waitress's
+  `channel_timeout`, the socket timeout for werkzeug). It does not limit how
+  long a handler runs; only calls made through `run_blocking` are bounded
+  by it.
+- SIGINT/SIGTERM stop accepting connections and let in-flight requests
+  finish (for up to DRAIN_TIMEOUT seconds, default 30, under waitress).
+
+Blocking work inside request handlers (screen grabs, filesystem changes) goes
+through `run_blocking`, which runs it on a bounded executor and gives up with
+`BlockingTimeout` instead of tying up the request thread indefinitely.
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+try:
+    import waitress
+    from waitress import wasyncore
+    from waitress.channel import HTTPChannel
+    from waitress.server import BaseWSGIServer as WaitressListener
+except ImportError:
+    waitress = None
+
+logger = logging.getLogger(__name__)
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def env_workers():
+    return int(os.environ.get("WORKERS", default_workers()))
+
+
+def env_request_timeout():
+    return float(os.environ.get("REQUEST_TIMEOUT", 30))
+
+
+def env_drain_timeout():
+    return float(os.environ.get("DRAIN_TIMEOUT", 30))
+
+
+class BlockingTimeout(Exception):
+    """A run_blocking() call did not finish (or could not start) in time"""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a cap on queued work.
+
+    At most `workers` calls run at once and at most `max_pending` more wait in
+    line; beyond that `submit` waits up to `timeout` for room and then raises
+    BlockingTimeout, so a stuck backend can't pile up unbounded work.
+    """
+
+    def __init__(self, workers, max_pending=None, name="blocking"):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(workers + (workers * 4 if max_pending is None else max_pending))
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        if not self._slots.acquire(timeout=timeout):
+            raise BlockingTimeout("Too many blocking calls queued")
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def blocking_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get("BLOCKING_WORKERS", max(4, env_workers() // 2)))
+            _executor = BoundedExecutor(workers)
+        return _executor
+
+
+def run_blocking(fn, *args, timeout=None, **kwargs):
+    """Run fn(*args, **kwargs) on the bounded executor and wait at most `timeout` seconds"""
+    if timeout is None:
+        timeout = env_request_timeout()
+    future = blocking_executor().submit(fn, *args, timeout=timeout, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise BlockingTimeout(f"{getattr(fn, '__name__', 'call')} did not finish within {timeout:g}s")
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug WSGI server that handles each connection on a fixed-size thread pool"""
+
+    multithread = True
+
+    def __init__(self, host, port, app, workers, request_timeout):
+        # StreamRequestHandler applies `timeout` to the client socket
+        handler = type("TimeoutRequestHandler", (WSGIRequestHandler,), {"timeout": request_timeout})
+        super().__init__(host, port, app, handler=handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # Let in-flight requests finish before returning
+        self.pool.shutdown(wait=True)
+
+
+def _install_shutdown_handlers(stop):
+    def handler(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        # shutdown() blocks until serve_forever() returns, so call it off the main thread
+        threading.Thread(target=stop, daemon=True).start()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            signal.signal(sig, handler)
+        except (ValueError, OSError):
+            # Not on the main thread, or signal not supported on this platform
+            pass
+
+
+def make_server(app, host, port, workers=None, request_timeout=None):
+    """Create (but don't start) a PooledWSGIServer; port 0 picks a free port"""
+    return PooledWSGIServer(host, port, app,
+                            workers or env_workers(),
+                            request_timeout or env_request_timeout())
+
+
+def make_waitress_server(app, host, port, workers=None, request_timeout=None):
+    """Create (but don't start) a waitress server; port 0 picks a free port, see `effective_port`"""
+    return waitress.create_server(app, host=host, port=port, threads=workers or env_workers(),
+                                  channel_timeout=request_timeout or env_request_timeout())
+
+
+def stop_waitress(server, timeout=None):
+    """
+    Stop a running waitress server gracefully; call from any thread but the one in `server.run()`.
+
+    The listening sockets are closed first, then requests already received are
+    given up to `timeout` seconds to finish and flush their responses before
+    the remaining connections and the worker threads are shut down.
+
+    waitress has no public drain, so this reads its internals: the socket map,
+    the listeners' `trigger`, `HTTPChannel.requests` / `total_outbufs_len` and
+    `wasyncore.dispatcher.close`. test_serving.py checks them, so upgrading
+    past the pinned waitress fails the tests instead of the shutdown.
+    """
+    timeout = env_drain_timeout() if timeout is None else timeout
+    # create_server() returns a MultiSocketServer for several listen addresses, else the one dispatcher
+    socket_map = server.map if hasattr(server, "map") else server._map
+    listeners = [d for d in list(socket_map.values()) if isinstance(d, WaitressListener)]
+    if not listeners:
+        return
+    # Sockets are only touched on the server's own loop thread, via its trigger
+    trigger = listeners[0].trigger
+    for listener in listeners:
+        trigger.pull_trigger(lambda listener=listener: wasyncore.dispatcher.close(listener))
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        busy = [c for c in list(socket_map.values())
+                if isinstance(c, HTTPChannel) and (c.requests or c.total_outbufs_len)]
+        if not busy:
+            break
+        time.sleep(0.05)
+    else:
+        logger.warning("Requests still running after the drain timeout, closing their connections")
+
+    def close_all():
+        server.task_dispatcher.shutdown()
+        wasyncore.close_all(socket_map)
+
+    trigger.pull_trigger(close_all)
+
+
+def server_backend():
+    """"waitress" when it is installed, else "pooled": what serve() runs outside SERVER_MODE=dev"""
+    return "waitress" if waitress is not None else "pooled"
+
+
+class ServerThread:
+    """
+    Run a WSGI app on a free local port in a background thread (benchmarks, tests).
+
+    `backend` is "waitress" or "pooled"; by default the one serve() would use.
+    """
+
+    def __init__(self, app, workers, backend=None, request_timeout=30):
+        self.backend = backend or server_backend()
+        if self.backend == "waitress":
+            self.server = make_waitress_server(app, "127.0.0.1", 0, workers, request_timeout)
+            self.port = self.server.effective_port
+            target = self.server.run
+        else:
+            self.server = make_server(app, "127.0.0.1", 0, workers, request_timeout)
+            self.port = self.server.server_port
+            target = self.server.serve_forever
+        self.thread = threading.Thread(target=target, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.backend == "waitress":
+            stop_waitress(self.server, timeout=5)
+            self.thread.join(5)
+        else:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def serve(app, host="0.0.0.0", port=5000, workers=None, request_timeout=None):
+    """Serve `app` until SIGINT/SIGTERM, using the mode picked by SERVER_MODE"""
+    workers = workers or env_workers()
+    request_timeout = request_timeout or env_request_timeout()
+
+    if os.environ.get("SERVER_MODE") == "dev":
+        app.run(host=host, port=port, debug=True)
+        return
+
+    if server_backend() == "waitress":
+        server = make_waitress_server(app, host, port, workers, request_timeout)
+        _install_shutdown_handlers(lambda: stop_waitress(server))
+        logger.info(f"Serving on http://{host}:{port} with waitress ({workers} threads)")
+        server.run()
+    else:
+        server = make_server(app, host, port, workers, request_timeout)
+        _install_shutdown_handlers(server.shutdown)
+        logger.info(f"Serving on http://{host}:{port} ({workers} worker threads)")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
@@ -0,0 +1,138 @@
+"""
+Coalesced, briefly cached camera snapshots.
+
+`SnapshotService.get(bbox)` returns a PNG snapshot of a screen region. When
+several callers ask for the same region at once, only the first one captures;
+the others wait for and share its result (single-flight). The finished
+snapshot is then kept for `ttl` seconds, so a burst of requests costs one grab
+per region per TTL window. Each snapshot carries an ETag for conditional GETs.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from instrumentation import span
+
+Snapshot = namedtuple("Snapshot", ["png", "etag", "captured_at", "bbox"])
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Return (result, shared) where shared is True if another caller did the work"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class TTLCache:
+    """Small thread-safe dict whose entries expire after `ttl` seconds (oldest evicted first)"""
+
+    def __init__(self, ttl, max_entries=32, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if self.clock() >= expires:
+                del self._entries[key]
+                return None
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self.clock() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SnapshotService:
+    """
+    Capture PNG snapshots through `capture(bbox) -> PIL.Image`.
+
+    `capture` is normally screen_capture.grab; tests use a
+    SyntheticCaptureSource. Counters in `stats` show how many requests were
+    answered by a real grab, by joining an in-flight grab, or from the cache.
+    """
+
+    def __init__(self, capture, ttl=0.5, max_entries=32, clock=time.monotonic):
+        self.capture = capture
+        self.cache = TTLCache(ttl, max_entries, clock)
+        self.flight = SingleFlight()
+        self._stats_lock = threading.Lock()
+        self.stats = {"captures": 0, "coalesced": 0, "cache_hits": 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get(self, bbox):
+        key = tuple(int(v) for v in bbox)
+        snapshot = self.cache.get(key)
+        if snapshot is not None:
+            self._count("cache_hits")
+            return snapshot
+        snapshot, shared = self.flight.do(key, lambda: self._capture(key))
+        if shared:
+            self._count("coalesced")
+        return snapshot
+
+    def _capture(self, key):
+        # Another leader may have filled the cache while we waited for the lock
+        snapshot = self.cache.get(key)
+        if snapshot is not None:
+            return snapshot
+        with span("capture"):
+            img = self.capture(key)
+        buf = io.BytesIO()
+        with span("png_encode"):
+            img.save(buf, "PNG")
+        png = buf.getvalue()
+        snapshot = Snapshot(png, hashlib.sha1(png).hexdigest(), time.time(), key)
+        self.cache.put(key, snapshot)
+        self._count("captures")
+        return snapshot
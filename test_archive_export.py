@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for archive_export.py and the /api/exports endpoints.
+"""
+
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+
+from archive_export import iter_entries, stream_archive, stream_zip
+
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, "tab", "PAGE_1", "empty"))
+    with open(os.path.join(root, "tab", "PAGE_1", "shot.png"), "wb") as f:
+        f.write(os.urandom(5000))
+    with open(os.path.join(root, "tab", "PAGE_1", "menu.json"), "w", encoding="utf-8") as f:
+        f.write('{"menu": "SteadyShot"}' * 2000)
+    with open(os.path.join(root, "tab", "notes ü.txt"), "w", encoding="utf-8") as f:
+        f.write("hello")
+    return os.path.join(root, "tab")
+
+
+def test_zip_roundtrip_and_methods():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        data = b"".join(stream_archive([tab], "zip", workers=3))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            names = zf.namelist()
+            assert "tab/PAGE_1/empty/" in names
+            assert "tab/notes ü.txt" in names
+            assert zf.getinfo("tab/PAGE_1/shot.png").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("tab/PAGE_1/menu.json").compress_type == zipfile.ZIP_DEFLATED
+            with open(os.path.join(tab, "PAGE_1", "menu.json"), "rb") as f:
+                assert zf.read("tab/PAGE_1/menu.json") == f.read()
+
+
+def test_large_files_stream_with_data_descriptor():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        chunks = list(stream_zip(iter_entries([tab]), workers=2, chunk_size=1024, inline_limit=100))
+        assert max(len(c) for c in chunks) <= 1024 + 200
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+            assert zf.testzip() is None
+            info = zf.getinfo("tab/PAGE_1/menu.json")
+            assert info.flag_bits & 0x08
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+            assert info.compress_size < info.file_size
+
+
+def test_tar_roundtrip():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        data = b"".join(stream_archive([tab], "tar"))
+        with tarfile.open(fileobj=io.BytesIO(data)) as tf:
+            assert tf.getmember("tab/PAGE_1/empty").isdir()
+            with open(os.path.join(tab, "PAGE_1", "shot.png"), "rb") as f:
+                assert tf.extractfile("tab/PAGE_1/shot.png").read() == f.read()
+
+
+def test_overlapping_and_same_name_selections():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        other = os.path.join(root, "other", "tab")
+        os.makedirs(other)
+        png = os.path.join(tab, "PAGE_1", "shot.png")
+        names = [e.arcname for e in iter_entries([tab, png, other])]
+        assert names.count("tab/PAGE_1/shot.png") == 1
+        assert "shot.png" not in names
+        assert "tab (2)/" in names
+
+
+def test_exports_endpoint_streams_archive():
+    import importlib
+    api = importlib.import_module("__api_server")
+    client = api.app.test_client()
+    saved = api.EXPORT_ROOTS
+    with tempfile.TemporaryDirectory() as root:
+        api.EXPORT_ROOTS = [os.path.realpath(root)]
+        try:
+            tab = make_tree(root)
+            assert client.post("/api/exports", json={"paths": [tab], "format": "rar"}).status_code == 400
+            resp = client.post("/api/exports", json={"paths": [tab], "format": "zip"})
+            url = resp.get_json()["url"]
+            resp = client.get(url)
+            assert resp.status_code == 200
+            assert resp.is_streamed
+            assert "tab.zip" in resp.headers["Content-Disposition"]
+            with zipfile.ZipFile(io.BytesIO(resp.data)) as zf:
+                assert zf.testzip() is None
+            assert client.get("/api/exports/nope").status_code == 404
+        finally:
+            api.EXPORT_ROOTS = saved
+
+
+def test_exports_refuse_paths_outside_the_roots():
+    import importlib
+    api = importlib.import_module("__api_server")
+    client = api.app.test_client()
+    saved = api.EXPORT_ROOTS
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        api.EXPORT_ROOTS = [os.path.realpath(tab)]
+        try:
+            for path in ["/etc/passwd", os.path.join(tab, "..", "..", "etc", "passwd"),
+                         os.path.join(tab, "PAGE_1", "..", "..")]:
+                resp = client.post("/api/exports", json={"paths": [path]})
+                assert resp.status_code == 400 and resp.get_json()["outside"] == [path]
+            # A symlink inside the root pointing out of it is refused too
+            os.symlink("/etc", os.path.join(tab, "etc"))
+            assert client.post("/api/exports", json={"paths": [os.path.join(tab, "etc")]}).status_code == 400
+            assert client.post("/api/exports", json={"paths": [os.path.join(tab, "PAGE_1")]}).status_code == 200
+        finally:
+            api.EXPORT_ROOTS = saved
+
+
+def test_symlinks_inside_selected_folders_are_skipped():
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as outside:
+        tab = make_tree(root)
+        secret = os.path.join(outside, "secret")
+        with open(secret, "w") as f:
+            f.write("not for export")
+        os.symlink(secret, os.path.join(tab, "PAGE_1", "link"))
+        os.symlink(outside, os.path.join(tab, "PAGE_1", "linked_dir"))
+        names = [e.arcname for e in iter_entries([tab])]
+        assert "tab/PAGE_1/shot.png" in names
+        assert not any("link" in name for name in names)
+        with zipfile.ZipFile(io.BytesIO(b"".join(stream_archive([tab], "zip")))) as zf:
+            assert not any("secret" in name or "link" in name for name in zf.namelist())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
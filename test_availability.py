@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for availability.py: mode normalization, vectorized filters and the
+real α7RV tree.
+"""
+
+import json
+import os
+import tempfile
+
+from availability import AvailabilityMatrix, get_availability, setting_location
+from menu_fixtures import write_menu
+
+
+def sample_tree(root):
+    with open(os.path.join(root, "modes.json"), "w", encoding="utf-8") as f:
+        json.dump({"photo": {"mode_name": "Photo"}, "video": {"mode_name": "Video"}, "s&q": {"mode_name": "S&Q"}}, f)
+    write_menu(root, "Stills/1_Shooting/PAGE_1/1 Quality/1_Quality.json",
+               {"menu": "Quality", "modes": ["photo"], "items": [{"label": "RAW"}, {"label": "JPEG"}]})
+    write_menu(root, "Stills/1_Shooting/PAGE_1/2 Frame Rate/2_Frame-Rate.json",
+               {"menu": "Rec Frame Rate", "modes": ["photo", "movie", "s&q"],
+                "condition": {"mode": ["movie", "s&q"]}, "items": [{"label": "60p"}, {"label": "24p"}]})
+    write_menu(root, "Stills/1_Shooting/PAGE_2/3 SteadyShot Adjust/3_SteadyShot-Adjust.json",
+               {"menu": "SteadyShot Adjust.", "modes": [], "items": [{"label": "Auto"}, {"label": "Manual"}]})
+    write_menu(root, "Stills/1_Shooting/PAGE_2/4 Media/4_Media.json",
+               {"menu": "Auto Switch Media", "modes": ["stills", "movie"], "items": [{"label": "On"}, {"label": "Off"}]})
+    write_menu(root, "Stills/1_Shooting/PAGE_2/5 Group/5_group.json",
+               {"id": "g", "name": "Group", "type": "submenu", "submenu": {"settings": []}})
+    write_menu(root, "Stills/1_Shooting/PAGE_2/5 Group/PAGE_1/PAGE_1.json", {"menu": "Group page", "modes": ["photo"]})
+
+
+def names(matrix, mask):
+    return [row["name"] for row in matrix.rows(mask)]
+
+
+def test_matrix_filters():
+    with tempfile.TemporaryDirectory() as root:
+        sample_tree(root)
+        matrix = AvailabilityMatrix.build(root)
+        assert matrix.modes == ["photo", "video", "s&q"]
+        # Submenu index files and PAGE_N summaries are not settings
+        assert len(matrix) == 4
+        assert matrix.counts() == {"photo": 3, "video": 3, "s&q": 2}
+
+        assert names(matrix, matrix.filter(modes=["photo", "movie"])) == ["SteadyShot Adjust.", "Auto Switch Media"]
+        assert names(matrix, matrix.filter(modes=["photo", "s&q"], match="any")) == [
+            "Quality", "Rec Frame Rate", "SteadyShot Adjust.", "Auto Switch Media"]
+        # The condition narrows the listed modes
+        assert matrix.rows(matrix.filter(option="60p"))[0]["modes"] == ["video", "s&q"]
+        assert names(matrix, matrix.filter(modes=["video"], option="manual")) == ["SteadyShot Adjust."]
+        assert names(matrix, matrix.filter(modes=["video"], declared_only=True)) == ["Rec Frame Rate", "Auto Switch Media"]
+        assert names(matrix, matrix.filter(option="o", exact_option=True)) == []
+        assert names(matrix, matrix.filter(page="1_Shooting/PAGE_1")) == ["Quality", "Rec Frame Rate"]
+        assert not matrix.filter(tab="Movie").any()
+        try:
+            matrix.filter(modes=["timelapse"])
+            assert False, "unknown mode accepted"
+        except ValueError:
+            pass
+
+
+def test_setting_location():
+    assert setting_location("Stills/1_Shooting/PAGE_1/2_Media/1 Format/1_Format.json") == ("Stills", "1_Shooting/PAGE_1")
+    assert setting_location("modes.json") == ("", "")
+
+
+def test_real_tree():
+    matrix = get_availability()
+    assert set(matrix.modes) == {"photo", "video", "s&q"}
+    movie = names(matrix, matrix.filter(modes=["movie"], declared_only=True))
+    assert "Rec Frame Rate" in movie and "Aspect Ratio" not in movie
+    assert "SteadyShot Adjust." in names(matrix, matrix.filter(modes=["photo", "video"], option="Manual"))
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
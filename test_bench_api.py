@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the benchmark harness (bench_api.py): runs every scenario
+with a handful of requests against the in-process servers.
+"""
+
+import importlib
+
+import bench_api
+from camera_windows import FakeWindowProvider
+from screen_capture import SyntheticCaptureSource
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert bench_api.percentile(values, 50) == 50
+    assert bench_api.percentile(values, 95) == 95
+    assert bench_api.percentile(values, 99) == 99
+    assert bench_api.percentile([], 50) == 0.0
+
+
+def test_run_benchmarks():
+    for backend in ("pooled", "waitress"):
+        results = bench_api.run_benchmarks(requests=20, concurrency=2, warmup=2, backend=backend)
+        assert set(results) == {"camera_info", "camera_snapshot", "create_dir"}
+        for stats in results.values():
+            assert stats["requests"] == 20
+            assert stats["errors"] == 0
+            assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+
+
+def test_run_benchmarks_restores_camera_server_state():
+    camera_api_server = importlib.import_module("camera_api_server")
+    registry = camera_api_server.init_registry(FakeWindowProvider([]), start=False)
+    snapshots = camera_api_server.init_snapshots(SyntheticCaptureSource(), ttl=0)
+    bench_api.run_benchmarks(["camera_info", "camera_snapshot"], requests=4, concurrency=1, warmup=0,
+                             backend="pooled")
+    assert camera_api_server.registry is registry
+    assert camera_api_server.snapshots is snapshots
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"camera_info": {"rps": 1000.0, "p95_ms": 10.0}}}
+    assert bench_api.compare({"camera_info": {"rps": 900.0, "p95_ms": 11.0}}, baseline, 0.25) == []
+    problems = bench_api.compare({"camera_info": {"rps": 500.0, "p95_ms": 20.0}}, baseline, 0.25)
+    assert len(problems) == 2
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
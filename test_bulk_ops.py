@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk_ops.py: the selection set and background bulk jobs.
+"""
+
+import os
+import tempfile
+
+from PIL import Image
+
+from bulk_ops import BulkJob, Selection, copy_item, delete_item, move_item, optimize_png, plan_operation
+
+
+def make_tree(root):
+    for page in ("PAGE_1", "PAGE_2"):
+        os.makedirs(os.path.join(root, "tab", page))
+        for n in range(3):
+            Image.new("RGB", (40, 30), (n * 60, 20, 200)).save(os.path.join(root, "tab", page, f"{n}.png"), compress_level=0)
+    return os.path.join(root, "tab")
+
+
+def test_selection_subtree_and_top_level():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        sel = Selection()
+        assert sel.add_subtree(tab) == 9
+        assert os.path.join(tab, "PAGE_1", "0.png") in sel
+        assert sel.top_level() == [os.path.normpath(tab)]
+        sel.discard_subtree(os.path.join(tab, "PAGE_1"))
+        assert len(sel) == 5
+        sel.discard(tab)
+        assert sel.top_level() == [os.path.join(tab, "PAGE_2")]
+
+
+def test_top_level_with_similar_prefixes():
+    sel = Selection(["/a/b", "/a/b c", "/a/b c/x", "/a/b/x"])
+    assert sel.top_level() == ["/a/b", "/a/b c"]
+
+
+def test_bulk_copy_reports_per_item_errors():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        dest = os.path.join(root, "dest")
+        os.makedirs(os.path.join(dest, "PAGE_2"))
+        paths = [os.path.join(tab, "PAGE_1"), os.path.join(tab, "PAGE_2"), os.path.join(tab, "missing")]
+        job = BulkJob(copy_item, paths, (dest,), workers=4).start()
+        assert job.wait(10)
+        assert job.done == job.total == 3
+        failed = sorted(r.path for r in job.errors)
+        assert failed == [os.path.join(tab, "PAGE_2"), os.path.join(tab, "missing")]
+        assert sorted(os.listdir(os.path.join(dest, "PAGE_1"))) == ["0.png", "1.png", "2.png"]
+
+
+def test_move_and_delete():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        dest = os.path.join(root, "dest")
+        os.makedirs(dest)
+        move_item(os.path.join(tab, "PAGE_1"), dest)
+        assert os.path.isdir(os.path.join(dest, "PAGE_1"))
+        delete_item(os.path.join(dest, "PAGE_1"))
+        delete_item(os.path.join(tab, "PAGE_2", "0.png"))
+        assert os.listdir(dest) == []
+        assert sorted(os.listdir(os.path.join(tab, "PAGE_2"))) == ["1.png", "2.png"]
+
+
+def test_optimize_is_lossless_and_shrinks():
+    with tempfile.TemporaryDirectory() as root:
+        tab = make_tree(root)
+        sel = Selection([tab])
+        paths = plan_operation("optimize", sel)
+        assert len(paths) == 6
+        before = Image.open(paths[0]).tobytes()
+        size = os.path.getsize(paths[0])
+        job = BulkJob(optimize_png, paths, workers=4).start()
+        assert job.wait(10) and not job.errors
+        assert os.path.getsize(paths[0]) < size
+        assert Image.open(paths[0]).tobytes() == before
+        assert sorted(os.listdir(os.path.join(tab, "PAGE_1"))) == ["0.png", "1.png", "2.png"]
+
+
+def test_optimize_keeps_metadata_and_unverifiable_modes():
+    from PIL import PngImagePlugin
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "shot.PNG")
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Source", "α7RV menu")
+        Image.new("RGB", (64, 64), "white").save(path, "PNG", compress_level=0, dpi=(144, 144), pnginfo=info)
+        assert optimize_png(path).endswith("bytes")
+        assert os.listdir(root) == ["shot.PNG"]
+        with Image.open(path) as img:
+            assert img.text["Source"] == "α7RV menu"
+            assert tuple(round(d) for d in img.info["dpi"]) == (144, 144)
+
+        # 16-bit greyscale can't be checked through an 8-bit RGBA round trip: left untouched
+        deep = os.path.join(root, "deep.png")
+        Image.new("I;16", (64, 64), 1000).save(deep, "PNG", compress_level=0)
+        with open(deep, "rb") as f:
+            original = f.read()
+        assert optimize_png(deep) == "already optimal"
+        with open(deep, "rb") as f:
+            assert f.read() == original
+
+
+def test_cancel_skips_pending_items():
+    import threading
+    gate = threading.Event()
+
+    def slow(path):
+        gate.wait(5)
+        return path
+
+    job = BulkJob(slow, [str(n) for n in range(20)], workers=2).start()
+    job.cancel()
+    gate.set()
+    assert job.wait(10)
+    assert job.done == 20
+    assert any(r.detail == "cancelled" for r in job.results)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
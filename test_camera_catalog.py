@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for camera_catalog.py: shared records, per-body overlays and the
+cross-body index.
+"""
+
+import importlib
+import os
+import tempfile
+
+import camera_catalog
+from menu_fixtures import write_menu
+
+
+def make_body(root, steadyshot_types):
+    write_menu(root, "modes.json", {"photo": {}, "video": {}})
+    write_menu(root, "Stills/1 Format/1_Format.json", {"menu": "Format", "description": "Formats the card."})
+    write_menu(root, "Stills/2 Image Stabilization/2_image_stabilization.json", {
+        "id": "image-stabilization", "name": "Image Stabilization",
+        "submenu": {"settings": [{"name": "SteadyShot Type", "options": steadyshot_types}]}})
+    write_menu(root, "Stills/3 Color Space/3_Color-Space.json", {
+        "menu": "Color Space", "items": [{"label": "sRGB"}, {"label": "AdobeRGB"}]})
+
+
+def make_public(public):
+    make_body(os.path.join(public, "α7RV"), ["Standard", "Active", "Dynamic"])
+    # A second body: one menu differs, one is missing, one is new, the rest is identical
+    make_body(os.path.join(public, "α7IV"), ["Standard", "Active"])
+    os.remove(os.path.join(public, "α7IV", "Stills/3 Color Space/3_Color-Space.json"))
+    write_menu(os.path.join(public, "α7IV"), "Stills/4 Touch Panel/4_Touch-Panel.json", {"menu": "Touch Panel"})
+    os.makedirs(os.path.join(public, "docs"))  # not a body: no modes.json
+
+
+def test_second_body_stores_only_its_differences():
+    with tempfile.TemporaryDirectory() as public:
+        make_public(public)
+        catalog = camera_catalog.CameraCatalog.build(public)
+        assert list(catalog.bodies) == ["α7IV", "α7RV"]
+        overlay = catalog.bodies["α7RV"]
+        assert overlay["base"] == "α7IV"
+        assert sorted(overlay["entries"]) == ["Stills/2 Image Stabilization/2_image_stabilization.json",
+                                              "Stills/3 Color Space/3_Color-Space.json"]
+        assert overlay["removed"] == ["Stills/4 Touch Panel/4_Touch-Panel.json"]
+        assert catalog.stats() == {"bodies": 2, "records": 6, "paths": 8, "stored_entries": 7}
+        # The shared record is the same object for both bodies
+        assert catalog.menu("α7RV", "Stills/1 Format/1_Format.json") is \
+            catalog.menu("α7IV", "Stills/1 Format/1_Format.json")
+        assert "Stills/4 Touch Panel/4_Touch-Panel.json" not in catalog.entries("α7RV")
+
+
+def test_cross_body_queries():
+    with tempfile.TemporaryDirectory() as public:
+        make_public(public)
+        catalog = camera_catalog.CameraCatalog.build(public)
+        assert catalog.bodies_with("Dynamic SteadyShot") == ["α7RV"]
+        assert catalog.bodies_with("steadyshot type") == ["α7IV", "α7RV"]
+        assert catalog.bodies_with("AdobeRGB") == ["α7RV"]
+        assert catalog.bodies_with("Touch Panel") == ["α7IV"]
+        assert catalog.bodies_with("Nonexistent") == []
+        match = catalog.find("Dynamic", body="α7RV")[0]
+        assert (match.setting, match.option) == ("SteadyShot Type", "Dynamic")
+
+
+def test_save_and_load_round_trip():
+    with tempfile.TemporaryDirectory() as public:
+        make_public(public)
+        catalog = camera_catalog.CameraCatalog.build(public)
+        path = os.path.join(public, "catalog.json")
+        catalog.save(path)
+        loaded = camera_catalog.CameraCatalog.load(path)
+        assert loaded.entries("α7RV") == catalog.entries("α7RV")
+        assert loaded.bodies_with("Dynamic SteadyShot") == ["α7RV"]
+        try:
+            catalog.add_body("α7IV", os.path.join(public, "α7IV"))
+        except ValueError as e:
+            assert "base of α7RV" in str(e)
+        else:
+            raise AssertionError("replacing a base body should fail")
+
+
+def test_catalog_endpoint():
+    api = importlib.import_module("__api_server")
+    client = api.app.test_client()
+    data = client.get("/api/catalog?q=Dynamic SteadyShot").get_json()
+    assert data["success"] and data["bodies"] == ["α7RV"]
+    assert data["matches"][0]["option"] == "Dynamic"
+    data = client.get("/api/catalog").get_json()
+    assert data["stats"]["bodies"] >= 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
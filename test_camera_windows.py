@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached camera window registry (camera_windows.py) and the
+/api/get_camera_info route that reads from it.
+Uses FakeWindowProvider, so it runs on Linux.
+"""
+
+import time
+
+from camera_windows import CameraWindowRegistry, FakeWindowProvider, WindowInfo
+
+CAMERA = WindowInfo(1001, "Camera", -3300, 550, 1475, 905)
+
+
+def test_refresh_detects_changes():
+    provider = FakeWindowProvider([CAMERA])
+    registry = CameraWindowRegistry(provider)
+    events = []
+    registry.add_listener(events.append)
+
+    assert [c.kind for c in registry.refresh()] == ["added"]
+    assert registry.refresh() == []
+
+    provider.set_windows([CAMERA._replace(left=-3200)])
+    assert [c.kind for c in registry.refresh()] == ["moved"]
+
+    provider.set_windows([CAMERA._replace(left=-3200, width=1200)])
+    change, = registry.refresh()
+    assert change.kind == "resized"
+    assert change.previous.width == 1475
+
+    provider.set_windows([])
+    assert [c.kind for c in registry.refresh()] == ["removed"]
+
+    assert [e.kind for e in events] == ["added", "moved", "resized", "removed"]
+    assert [e.seq for e in registry.events_since(2)] == [3, 4]
+
+
+def test_reads_are_served_from_cache():
+    provider = FakeWindowProvider([CAMERA])
+    registry = CameraWindowRegistry(provider)
+    registry.refresh()
+    for _ in range(100):
+        payload = registry.payload()
+    assert provider.calls == 1
+    assert payload == [{
+        "hwnd": "1001",
+        "title": "Camera",
+        "position": {"left": -3300, "top": 550},
+        "size": {"width": 1475, "height": 905},
+    }]
+
+
+def test_adaptive_interval():
+    registry = CameraWindowRegistry(FakeWindowProvider(), min_interval=0.1, max_interval=0.8)
+    registry.interval = registry._next_interval(False)
+    registry.interval = registry._next_interval(False)
+    registry.interval = registry._next_interval(False)
+    registry.interval = registry._next_interval(False)
+    assert registry.interval == 0.8
+    assert registry._next_interval(True) == 0.1
+
+
+def test_background_poller_picks_up_moves():
+    provider = FakeWindowProvider([CAMERA])
+    registry = CameraWindowRegistry(provider, min_interval=0.01, max_interval=0.02)
+    registry.refresh()
+    registry.start()
+    try:
+        provider.set_windows([CAMERA._replace(top=600)])
+        deadline = time.time() + 2
+        while time.time() < deadline and registry.windows()[0].top != 600:
+            time.sleep(0.01)
+        assert registry.windows()[0].top == 600
+    finally:
+        registry.stop(timeout=1)
+
+
+def test_get_camera_info_route():
+    import camera_api_server
+
+    provider = FakeWindowProvider([CAMERA])
+    camera_api_server.init_registry(provider, start=False)
+    try:
+        client = camera_api_server.app.test_client()
+        data = client.get('/api/get_camera_info').get_json()
+        assert data["success"] is True
+        assert data["cameraWindows"][0]["position"] == {"left": -3300, "top": 550}
+
+        provider.set_windows([])
+        camera_api_server.registry.refresh()
+        data = client.get('/api/get_camera_info').get_json()
+        assert data["success"] is False
+        assert data["cameraWindows"] == []
+
+        events = client.get('/api/camera_events?since=0').get_json()["events"]
+        assert [e["kind"] for e in events] == ["added", "removed"]
+    finally:
+        camera_api_server.registry = None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for include/chat_store.py: bounded memory, paging and JSONL persistence.
+"""
+
+import json
+import os
+import tempfile
+
+from include.chat_store import ChatStore
+
+
+def test_tail_and_pages_from_disk():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "chat.jsonl")
+        store = ChatStore(path, keep=10)
+        for n in range(100):
+            store.append("user" if n % 2 else "assistant", f"message {n}")
+        assert len(store) == 100
+        assert [m["content"] for m in store.tail(3)] == ["message 97", "message 98", "message 99"]
+        # Older than the in-memory window: read back from the file
+        assert [m["content"] for m in store.tail(12)][:2] == ["message 88", "message 89"]
+        assert [m["content"] for m in store.page(0, 2)] == ["message 0", "message 1"]
+        assert store.page(98, 10)[-1]["content"] == "message 99"
+        assert len(store._recent) == 10
+
+
+def test_history_persists_as_append_only_jsonl():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "chat.jsonl")
+        store = ChatStore(path)
+        store.append("user", "héllo\nthere")
+        store.append("assistant", "hi")
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert [m["content"] for m in lines] == ["héllo\nthere", "hi"]
+
+        reopened = ChatStore(path, keep=1)
+        assert len(reopened) == 2
+        assert reopened.tail(2)[0]["content"] == "héllo\nthere"
+
+
+def test_truncated_last_line_is_skipped_and_repaired():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "chat.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"role": "user", "content": "ok"}\n{"role": "user", "cont')
+        store = ChatStore(path)
+        assert len(store) == 1
+        store.append("assistant", "after crash")
+        reopened = ChatStore(path)
+        assert [m["content"] for m in reopened.tail(5)] == ["ok", "after crash"]
+
+
+def test_in_memory_store_is_bounded():
+    store = ChatStore(keep=5)
+    for n in range(20):
+        store.append("user", str(n))
+    assert len(store) == 20
+    assert [m["content"] for m in store.tail(50)] == ["15", "16", "17", "18", "19"]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for constraints.py: rule extraction from menu prose, validation,
+completion and the rules found in the real α7RV tree.
+"""
+
+import tempfile
+
+from constraints import ConstraintEngine, extract_rules, get_engine, rules_for_menu
+from menu_fixtures import write_menu
+
+
+FOCAL_LENGTH = {
+    "menu": "Focal Length",
+    "description": "Sets the focal length information to be used for the built-in SteadyShot function "
+                   "when [SteadyShot Adjust.] is set to [Manual].",
+    "items": [{"label": "8mm"}, {"label": "9mm"}],
+}
+STEADYSHOT_ADJUST = {"menu": "SteadyShot Adjust.", "items": [{"label": "Auto"}, {"label": "Manual"}]}
+LONG_EXPOSURE_NR = {
+    "menu": "Long Exposure NR",
+    "note": "[Long Exposure NR] is unavailable in the following situations: [Shutter Type] is set to "
+            "[Electronic Shutter]. [Drive Mode] is set to [Cont. Shooting] or [Cont. Bracket]. "
+            "[Long Exposure NR] cannot be set to [Off] in the following shooting modes: [Intelligent Auto]",
+    "items": [{"label": "On"}, {"label": "Off"}],
+}
+PIXEL_SHIFT = {
+    "menu": "Pixel Shift Multi Shoot.",
+    "note": "In [Pixel Shift Multi Shoot.], some settings are locked as follows:\n"
+            "[File Format] under [Image Quality Settings]: [RAW]\n"
+            "[RAW File Type] under [Image Quality Settings]: [Uncompressed]\n"
+            "In [Pixel Shift Multi Shoot.], you cannot perform bulb shooting.",
+    "items": [{"label": "Off"}, {"label": "4 Shortest"}],
+}
+SELECT_FOLDER = {
+    "menu": "Select REC Folder",
+    "note": "You cannot record RAW images to Slot 2. You cannot select the folder when [Folder Name] "
+            "under [File/Folder Settings] is set to [Date Form].",
+    "hint": "When [Folder Name] is set to [Standard Form], folders are numbered.",
+}
+
+
+def engine_for(*menus):
+    rules, domains = [], {}
+    for menu in menus:
+        rules.extend(rules_for_menu(menu, menu["menu"]))
+        domains.setdefault(menu["menu"], []).extend(i["label"] for i in menu.get("items", []))
+    domains.setdefault("Folder Name", []).extend(["Standard Form", "Date Form"])
+    return ConstraintEngine(rules, domains)
+
+
+def test_extracts_rules_from_prose():
+    rule, = rules_for_menu(FOCAL_LENGTH)
+    assert (rule.kind, rule.target, rule.setting, rule.values, rule.negate) == (
+        "requires", "Focal Length", "SteadyShot Adjust.", ("Manual",), False)
+
+    rules = rules_for_menu(LONG_EXPOSURE_NR)
+    assert [(r.setting, r.values, r.negate) for r in rules] == [
+        ("Shutter Type", ("Electronic Shutter",), True), ("Drive Mode", ("Cont. Shooting", "Cont. Bracket"), True)]
+
+    rules = rules_for_menu(PIXEL_SHIFT)
+    assert [(r.kind, r.target, r.target_values) for r in rules] == [
+        ("forces", "File Format", ("RAW",)), ("forces", "RAW File Type", ("Uncompressed",))]
+
+    # "You cannot record ..." in the sentence before must not be taken as the rule's start
+    rule, = rules_for_menu(SELECT_FOLDER)
+    assert (rule.setting, rule.values, rule.negate) == ("Folder Name", ("Date Form",), True)
+
+
+def test_validate_reports_conflicts_and_prerequisites():
+    engine = engine_for(FOCAL_LENGTH, STEADYSHOT_ADJUST, LONG_EXPOSURE_NR, PIXEL_SHIFT, SELECT_FOLDER)
+    assert engine.validate({"SteadyShot Adjust.": "Manual", "Focal Length": "8mm"}).ok
+
+    report = engine.validate({"focal length": "50mm", "SteadyShot Adjust": "auto"})
+    assert not report.ok
+    conflict, = report.conflicts
+    assert (conflict.setting, conflict.value, conflict.required) == ("SteadyShot Adjust.", "Auto", ["Manual"])
+    # Values the menu doesn't list are kept as given
+    assert report.preset["Focal Length"] == "50mm"
+
+    report = engine.validate([("Long Exposure NR", "On"), ("Drive Mode", "Cont. Bracket"), ("Lens", "85mm")])
+    assert [c.setting for c in report.conflicts] == ["Drive Mode"]
+    assert report.unknown == [("Lens", "85mm")]
+    # Off doesn't need the prerequisite
+    assert engine.validate({"Long Exposure NR": "Off", "Drive Mode": "Cont. Bracket"}).ok
+
+    report = engine.validate({"Focal Length": "9mm"})
+    assert not report.ok and [(c.setting, c.value) for c in report.changes] == [("SteadyShot Adjust.", "Manual")]
+
+
+def test_complete_fills_prerequisites_and_forced_values():
+    engine = engine_for(FOCAL_LENGTH, STEADYSHOT_ADJUST, PIXEL_SHIFT, SELECT_FOLDER)
+    report = engine.validate({"Focal Length": "9mm", "Pixel Shift Multi Shoot.": "4 Shortest",
+                              "Select REC Folder": "100MSDCF"}, complete=True)
+    assert report.ok
+    assert report.preset["SteadyShot Adjust."] == "Manual"
+    assert report.preset["File Format"] == "RAW"
+    assert report.preset["RAW File Type"] == "Uncompressed"
+    assert report.preset["Folder Name"] == "Standard Form"
+
+    report = engine.validate({"Pixel Shift Multi Shoot.": "4 Shortest", "RAW File Type": "Compressed"}, complete=True)
+    assert not report.ok and [c.setting for c in report.conflicts] == ["RAW File Type"]
+
+
+def test_stills_and_movie_settings_with_one_name_stay_apart():
+    menus = {
+        "Stills/1 Image Quality Settings/1 File Format/1_File_Format.json":
+            {"menu": "File Format", "modes": ["photo"], "items": [{"label": "RAW"}, {"label": "JPEG"}]},
+        "Stills/1 Image Quality Settings/2 RAW File Type/2_RAW-File-Type.json":
+            {"menu": "RAW File Type", "modes": ["photo"], "items": [{"label": "Compressed"}],
+             "condition": {"file_format": {"not": "JPEG"}}},
+        "Stills/4 File Format/4_File_Format.json":
+            {"menu": "File Format", "condition": {"mode": ["movie", "s&q"]},
+             "items": [{"label": "XAVC HS 8K"}, {"label": "XAVC S 4K"}]},
+    }
+    with tempfile.TemporaryDirectory() as root:
+        for rel_path, menu in menus.items():
+            write_menu(root, rel_path, menu)
+        rules, domains = extract_rules(root)
+    assert domains["File Format"] == ["RAW", "JPEG"]
+    assert domains["Movie/File Format"] == ["XAVC HS 8K", "XAVC S 4K"]
+
+    engine = ConstraintEngine(rules, domains)
+    conflict, = engine.validate({"File Format": "JPEG", "RAW File Type": "Compressed"}).conflicts
+    assert conflict.required == ["RAW"]
+    assert engine.validate({"Movie/File Format": "XAVC S 4K", "File Format": "RAW"}).ok
+    conflict, = engine.validate({"File Format": "XAVC HS 8K"}).conflicts
+    assert (conflict.setting, conflict.required, conflict.rule.setting) == ("File Format", ["RAW", "JPEG"],
+                                                                           "Movie/File Format")
+    conflict, = engine.validate({"movie/file format": "JPEG"}).conflicts
+    assert conflict.setting == "Movie/File Format"
+
+
+def test_real_tree():
+    engine = get_engine()
+    targets = {(r.target, r.setting) for r in engine.rules}
+    assert ("Focal Length", "SteadyShot Adjust.") in targets
+    assert ("HLG Still Image", "JPEG/HEIF Switch") in targets
+    report = engine.validate({"HLG Still Image": "On", "JPEG/HEIF Switch": "JPEG"})
+    assert {c.setting for c in report.conflicts} == {"HLG Still Image", "JPEG/HEIF Switch"}
+    report = engine.validate({"HLG Still Image": "On"}, complete=True)
+    assert report.ok and report.preset["File Format"] == "HEIF"
+    report = engine.validate({"File Format": "JPEG", "RAW File Type": "Compressed"})
+    assert not any(value.startswith("XAVC") for c in report.conflicts for value in c.required)
+    assert not engine.validate({"File Format": "XAVC HS 8K"}).ok
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
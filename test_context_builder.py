@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for context_builder.py: summaries, the content-hash cache and budget packing.
+"""
+
+import json
+import os
+import tempfile
+
+from context_builder import MENU_ROOT, SummaryCache, build_context, count_tokens
+
+STABILIZATION = os.path.join(MENU_ROOT, "Stills", "1_Shooting", "PAGE_1", "7_Image-Stabilization")
+STILLS = os.path.join(MENU_ROOT, "Stills")
+
+
+def test_small_selection_is_included_whole():
+    ctx = build_context([os.path.join(STABILIZATION, "1 SteadyShot")], budget=2000, cache=SummaryCache(None))
+    assert not ctx.omitted
+    assert "Setting: SteadyShot" in ctx.text
+    assert "Navigation: MENU → (Shooting) → [Image Stabilization] → [SteadyShot]" in ctx.text
+    assert "Screenshot: 1_SteadyShot.png" in ctx.text
+
+
+def test_large_subtree_keeps_relevant_settings_within_budget():
+    ctx = build_context([STILLS], budget=1500, query="SteadyShot focal length", cache=SummaryCache(None))
+    assert ctx.tokens <= 1500
+    names = [os.path.basename(p) for p in ctx.included]
+    assert "1_SteadyShot.json" in names and "3_Focal-Length.json" in names
+    assert not any(n.endswith(".png") for n in names)
+    assert "1_Format.json" not in names
+    assert "not shown" in ctx.text
+
+
+def test_without_query_settings_fill_the_budget():
+    ctx = build_context([STILLS], budget=800, cache=SummaryCache(None))
+    assert ctx.tokens <= 800
+    assert ctx.included and all(p.endswith(".json") for p in ctx.included)
+
+
+def test_cache_is_keyed_by_content_and_persisted():
+    with tempfile.TemporaryDirectory() as root:
+        menu = os.path.join(root, "1_Test.json")
+        with open(menu, "w", encoding="utf-8") as f:
+            f.write('/api: /api/ask-chatgpt_streamed\n' + json.dumps({"menu": "Test", "items": [{"label": "On"}]}))
+        copy = os.path.join(root, "copy.json")
+        with open(menu, "rb") as src, open(copy, "wb") as dst:
+            dst.write(src.read())
+
+        cache_path = os.path.join(root, "cache.json")
+        cache = SummaryCache(cache_path)
+        first = cache.summary(menu)
+        assert first.text == "Setting: Test\n- On"
+        assert first.tokens == count_tokens(first.text)
+        cache.summary(copy)
+        assert (cache.hits, cache.misses) == (1, 1)
+        cache.save()
+
+        reloaded = SummaryCache(cache_path)
+        reloaded.summary(menu)
+        assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+        with open(menu, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"menu": "Changed"}))
+        assert reloaded.summary(menu).title == "Changed"
+        assert reloaded.misses == 1
+
+
+def test_cache_keeps_the_most_recently_used_entries():
+    with tempfile.TemporaryDirectory() as root:
+        paths = []
+        for name in "abc":
+            paths.append(os.path.join(root, f"{name}.json"))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write(json.dumps({"menu": name}))
+        cache_path = os.path.join(root, "cache.json")
+        cache = SummaryCache(cache_path, max_entries=2)
+        cache.summary(paths[0])
+        cache.summary(paths[1])
+        cache.summary(paths[0])  # b is now the least recently used
+        cache.summary(paths[2])
+        cache.save()
+        reloaded = SummaryCache(cache_path, max_entries=2)
+        for path in (paths[0], paths[2], paths[1]):
+            reloaded.summary(path)
+        assert (reloaded.hits, reloaded.misses) == (2, 1)
+        assert len(SummaryCache(cache_path, max_entries=1)._entries) == 1
+
+
+def test_modes_json_summary():
+    ctx = build_context([os.path.join(MENU_ROOT, "modes.json")], cache=SummaryCache(None))
+    assert "- photo (Photo):" in ctx.text and "- video (Video):" in ctx.text
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
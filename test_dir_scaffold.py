@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for dir_scaffold.py, menu_tree.py and the /api/create_dirs endpoint.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from dir_scaffold import ScaffoldError, create_dirs, plan_dirs
+from menu_tree import MENU_ROOT, load_menu_json, parse_menu_json, submenu_dir_spec
+
+
+def listing(root):
+    return sorted(str(p.relative_to(root)) for p in Path(root).rglob("*"))
+
+
+def test_nested_spec_creates_parents_first():
+    with tempfile.TemporaryDirectory() as root:
+        spec = {"PAGE_1": {"1 SteadyShot": {}, "2 Focal Length": None},
+                "PAGE_2": ["1 A", {"name": "2 B", "children": ["x"]}]}
+        created = create_dirs(plan_dirs(root, spec))
+        assert len(created) == 7
+        assert listing(root) == ["PAGE_1", "PAGE_1/1 SteadyShot", "PAGE_1/2 Focal Length",
+                                 "PAGE_2", "PAGE_2/1 A", "PAGE_2/2 B", "PAGE_2/2 B/x"]
+
+
+def test_bad_names_reject_whole_batch():
+    with tempfile.TemporaryDirectory() as root:
+        try:
+            plan_dirs(root, {"ok": {}, "bad:name": {}, "..": {}})
+            assert False, "expected ScaffoldError"
+        except ScaffoldError as e:
+            assert e.status == 400
+            assert [p["path"] for p in e.problems] == ["bad:name", ".."]
+        assert listing(root) == []
+
+
+def test_duplicate_names_rejected():
+    with tempfile.TemporaryDirectory() as root:
+        try:
+            plan_dirs(root, ["a", "a"])
+            assert False, "expected ScaffoldError"
+        except ScaffoldError as e:
+            assert e.problems == [{"path": "a", "error": "listed twice"}]
+
+
+def test_existing_directory_conflict_and_exist_ok():
+    with tempfile.TemporaryDirectory() as root:
+        os.mkdir(os.path.join(root, "a"))
+        try:
+            plan_dirs(root, {"a": ["b"]})
+            assert False, "expected ScaffoldError"
+        except ScaffoldError as e:
+            assert e.status == 409
+        paths = plan_dirs(root, {"a": ["b"]}, exist_ok=True)
+        assert paths == [Path(root, "a", "b")]
+
+
+def test_failure_rolls_back_created_dirs():
+    with tempfile.TemporaryDirectory() as root:
+        paths = plan_dirs(root, {"a": {"b": {}, "c": {}}})
+
+        def flaky_mkdir(path):
+            if path.name == "c":
+                raise OSError("disk full")
+            os.mkdir(path)
+
+        try:
+            create_dirs(paths, mkdir=flaky_mkdir)
+            assert False, "expected OSError"
+        except OSError:
+            pass
+        assert listing(root) == []
+
+
+def test_menu_json_preamble_and_submenu_spec():
+    menu = parse_menu_json('/api: /api/ask-chatgpt_streamed\n{"submenu": {"settings": ['
+                           '{"name": "Shutter/Silent"}, {"name": "Shutter/Silent"}, '
+                           '{"name": "Mode", "submenu": {"settings": [{"name": "On"}]}}]}}')
+    assert submenu_dir_spec(menu) == {"1 Shutter_Silent": {}, "2 Mode": {"1 On": {}}}
+
+
+def test_real_submenu_file():
+    path = os.path.join(MENU_ROOT, "Stills", "1_Shooting", "PAGE_1", "7_Image-Stabilization",
+                        "7_image_stabilization.json")
+    spec = submenu_dir_spec(load_menu_json(path))
+    assert spec and all(name.split(" ", 1)[0].isdigit() for name in spec)
+    with tempfile.TemporaryDirectory() as root:
+        assert len(create_dirs(plan_dirs(root, spec))) >= len(spec)
+
+
+def test_create_dirs_endpoint():
+    import importlib
+    api = importlib.import_module("__api_server")
+    client = api.app.test_client()
+    with tempfile.TemporaryDirectory() as root:
+        resp = client.post("/api/create_dirs", json={"parent_path": root, "spec": {"a": ["b"], "c:": {}}})
+        assert resp.status_code == 400
+        assert resp.get_json()["problems"][0]["path"] == "c:"
+        assert listing(root) == []
+
+        resp = client.post("/api/create_dirs", json={"parent_path": root, "spec": {"a": ["b"]}})
+        assert resp.status_code == 200
+        assert resp.get_json()["created"] == [os.path.join(root, "a"), os.path.join(root, "a", "b")]
+
+        resp = client.post("/api/create_dirs", json={"parent_path": root, "spec": {"a": ["b"]}})
+        assert resp.status_code == 409
+
+
+def test_failed_refresh_still_reports_created_dirs():
+    import importlib
+    import subprocess
+    api = importlib.import_module("__api_server")
+    client = api.app.test_client()
+
+    def failing_refresh():
+        raise subprocess.CalledProcessError(1, "gen_tree_json.py")
+
+    original = api.refresh_tree
+    api.refresh_tree = failing_refresh
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            resp = client.post("/api/create_dirs", json={"parent_path": root, "spec": ["a"], "refresh_tree": True})
+            data = resp.get_json()
+            assert resp.status_code == 200
+            assert data["success"] and not data["tree_refreshed"] and "refresh_error" in data
+            assert listing(root) == ["a"]
+    finally:
+        api.refresh_tree = original
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
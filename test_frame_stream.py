@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared-capture MJPEG stream (frame_stream.py and
+/api/camera_stream). Uses the synthetic capture source.
+"""
+
+import time
+
+from frame_stream import FrameBroadcaster, Subscription, Frame
+from screen_capture import SyntheticCaptureSource
+
+BBOX = (0, 0, 64, 48)
+
+
+def test_subscribers_share_frames():
+    source = SyntheticCaptureSource()
+    broadcaster = FrameBroadcaster(source, BBOX, fps=50)
+    subs = [broadcaster.subscribe() for _ in range(5)]
+    try:
+        frames = [sub.get(timeout=2) for sub in subs]
+        assert all(f is not None for f in frames)
+        assert frames[0].jpeg[:2] == b"\xff\xd8"
+        # Five viewers did not cause five captures per frame
+        assert source.frames - broadcaster.frames_captured in (0, 1)
+    finally:
+        for sub in subs:
+            broadcaster.unsubscribe(sub)
+
+
+def test_slow_subscriber_drops_frames():
+    source = SyntheticCaptureSource()
+    broadcaster = FrameBroadcaster(source, BBOX, fps=100)
+    fast = broadcaster.subscribe()
+    slow = broadcaster.subscribe()
+    try:
+        seen = [fast.get(timeout=2).seq for _ in range(10)]
+        assert seen == sorted(seen) and len(set(seen)) == 10
+        frame = slow.get(timeout=2)
+        # The slow viewer gets the newest frame, not a backlog
+        assert frame.seq >= seen[-1]
+        assert slow.dropped > 0
+    finally:
+        broadcaster.unsubscribe(fast)
+        broadcaster.unsubscribe(slow)
+
+
+def test_loop_stops_without_subscribers():
+    source = SyntheticCaptureSource()
+    broadcaster = FrameBroadcaster(source, BBOX, fps=100)
+    sub = broadcaster.subscribe()
+    sub.get(timeout=2)
+    broadcaster.unsubscribe(sub)
+    time.sleep(0.1)
+    count = source.frames
+    time.sleep(0.1)
+    assert source.frames == count
+
+
+def test_on_idle_called_when_last_subscriber_leaves():
+    idle = []
+    broadcaster = FrameBroadcaster(SyntheticCaptureSource(), BBOX, fps=100, on_idle=idle.append)
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+    broadcaster.unsubscribe(first)
+    assert idle == []
+    broadcaster.unsubscribe(second)
+    assert idle == [broadcaster]
+
+
+def test_registry_keeps_one_broadcaster_per_region():
+    import camera_api_server
+    from frame_stream import mjpeg_chunks
+
+    camera_api_server.init_snapshots(SyntheticCaptureSource(), ttl=5)
+    try:
+        first, sub1 = camera_api_server.get_broadcaster(BBOX)
+        second, sub2 = camera_api_server.get_broadcaster(BBOX)
+        assert first is second and first.subscriber_count == 2
+        first.unsubscribe(sub1)
+        # An idle check racing with a viewer that is subscribed keeps the entry
+        camera_api_server.drop_broadcaster(first)
+        assert camera_api_server.broadcasters[BBOX] is first
+        first.unsubscribe(sub2)
+        assert BBOX not in camera_api_server.broadcasters
+
+        # A response body that is closed without ever being iterated still unsubscribes
+        broadcaster, sub = camera_api_server.get_broadcaster(BBOX)
+        stream = mjpeg_chunks(broadcaster, sub=sub)
+        assert camera_api_server.broadcasters[BBOX] is broadcaster
+        stream.close()
+        assert broadcaster.subscriber_count == 0 and camera_api_server.broadcasters == {}
+    finally:
+        camera_api_server.snapshots = None
+        camera_api_server.broadcasters.clear()
+
+
+def test_subscription_returns_each_frame_once():
+    sub = Subscription()
+    sub.offer(Frame(1, b"a", 0))
+    assert sub.get(timeout=0).seq == 1
+    assert sub.get(timeout=0) is None
+    sub.offer(Frame(2, b"b", 0))
+    sub.offer(Frame(3, b"c", 0))
+    assert sub.get(timeout=0).seq == 3
+    assert sub.dropped == 1
+
+
+def test_stream_route():
+    import camera_api_server
+
+    camera_api_server.init_snapshots(SyntheticCaptureSource(), ttl=5)
+    try:
+        client = camera_api_server.app.test_client()
+        resp = client.get('/api/camera_stream?left=0&top=0&width=64&height=48', buffered=False)
+        assert resp.status_code == 200
+        assert resp.mimetype == 'multipart/x-mixed-replace'
+        chunks = resp.response
+        first = next(iter(chunks))
+        assert first.startswith(b"--frame\r\nContent-Type: image/jpeg")
+        broadcaster = camera_api_server.broadcasters[(0, 0, 64, 48)]
+        resp.close()
+        assert broadcaster.subscriber_count == 0
+        # The last viewer left: the region's broadcaster is forgotten
+        assert camera_api_server.broadcasters == {}
+    finally:
+        camera_api_server.snapshots = None
+        camera_api_server.broadcasters.clear()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
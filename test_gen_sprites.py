@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for tree-view-app/gen_sprites.py: per-tab atlases, offsets and
+incremental regeneration.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app"))
+import gen_sprites  # noqa: E402
+
+
+def make_png(path, color, size=(736, 452)):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new("RGB", size, color).save(path)
+
+
+def make_menu(menu_dir):
+    make_png(os.path.join(menu_dir, "1 My Menu/1 My Menu.png"), "red")
+    make_png(os.path.join(menu_dir, "Stills/1_Shooting/1_Shooting.png"), "blue")
+    make_png(os.path.join(menu_dir, "Stills/1_Shooting/PAGE_1/10 b/10 b.png"), "green")
+    make_png(os.path.join(menu_dir, "Stills/1_Shooting/PAGE_1/2 a/2 a.png"), "yellow")
+    make_png(os.path.join(menu_dir, "Stills/2_Exposure/2_Exposure.png"), "black")
+
+
+def test_tabs_are_packed_with_offsets():
+    with tempfile.TemporaryDirectory() as public:
+        menu_dir, sprites_dir = os.path.join(public, "α7RV"), os.path.join(public, "sprites")
+        make_menu(menu_dir)
+        manifest, redrawn = gen_sprites.build_sprites(menu_dir, sprites_dir, workers=1)
+        assert redrawn == ["1 My Menu", "Stills/1_Shooting", "Stills/2_Exposure"]
+        shooting = manifest["tabs"]["Stills/1_Shooting"]
+        # Members in natural order, downscaled to SPRITE_WIDTH side by side
+        assert list(shooting["members"]) == ["α7RV/Stills/1_Shooting/1_Shooting.png",
+                                             "α7RV/Stills/1_Shooting/PAGE_1/2 a/2 a.png",
+                                             "α7RV/Stills/1_Shooting/PAGE_1/10 b/10 b.png"]
+        assert shooting["members"]["α7RV/Stills/1_Shooting/PAGE_1/10 b/10 b.png"] == [736, 0, 368, 226]
+        assert (shooting["width"], shooting["height"]) == (1104, 226)
+        with Image.open(os.path.join(public, shooting["image"])) as atlas:
+            r, g, b = atlas.convert("RGB").getpixel((736 + 184, 113))
+            assert g > 100 and r < 60 and b < 60  # the green member
+        with open(os.path.join(sprites_dir, "sprites.json"), encoding="utf-8") as f:
+            assert json.load(f) == manifest
+
+
+def test_only_changed_tabs_are_redrawn():
+    with tempfile.TemporaryDirectory() as public:
+        menu_dir, sprites_dir = os.path.join(public, "α7RV"), os.path.join(public, "sprites")
+        make_menu(menu_dir)
+        first, _ = gen_sprites.build_sprites(menu_dir, sprites_dir, workers=1)
+        assert gen_sprites.build_sprites(menu_dir, sprites_dir, workers=1)[1] == []
+
+        make_png(os.path.join(menu_dir, "Stills/2_Exposure/2_Exposure.png"), "white")
+        second, redrawn = gen_sprites.build_sprites(menu_dir, sprites_dir, workers=1)
+        assert redrawn == ["Stills/2_Exposure"]
+        assert second["tabs"]["1 My Menu"] == first["tabs"]["1 My Menu"]
+        assert second["tabs"]["Stills/2_Exposure"]["image"] != first["tabs"]["Stills/2_Exposure"]["image"]
+        # The replaced atlas is deleted
+        assert sorted(os.listdir(sprites_dir)) == sorted(
+            [os.path.basename(t["image"]) for t in second["tabs"].values()] + ["sprites.json"])
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the content hashes written by tree-view-app/gen_tree_json.py and
+the /api/tree endpoint that serves subtrees with them as ETags.
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app"))
+import gen_tree_json  # noqa: E402
+
+
+def make_public(root):
+    for rel, content in [("α7RV/1 Tab/a.json", b"{}"), ("α7RV/1 Tab/a.png", b"png"), ("α7RV/2 Tab/b.json", b"[]"),
+                         ("docs/manual.pdf", b"pdf")]:
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+
+
+def child(node, name):
+    return next(c for c in node["children"] if c["name"] == name)
+
+
+def test_merkle_hashes_change_only_along_the_modified_path():
+    with tempfile.TemporaryDirectory() as root:
+        make_public(root)
+        cache = {}
+        before = gen_tree_json.build_tree(root, hash_cache=cache)
+        menu = child(before, "α7RV")
+        assert [c["name"] for c in before["children"]] == ["α7RV"]  # docs/ is excluded
+        leaf = child(child(menu, "1 Tab"), "a.json")
+        assert leaf["size"] == 2 and len(leaf["hash"]) == 64
+
+        # Same content again: identical hashes, and no file is re-read (cached by mtime/size)
+        for entry in cache.values():
+            entry[2] = "cached-" + entry[2]
+        again = gen_tree_json.build_tree(root, hash_cache=cache)
+        assert child(child(child(again, "α7RV"), "1 Tab"), "a.json")["hash"].startswith("cached-")
+
+        cache = {}
+        before = gen_tree_json.build_tree(root, hash_cache=cache)
+        with open(os.path.join(root, "α7RV", "2 Tab", "b.json"), "wb") as f:
+            f.write(b"[1]")
+        after = gen_tree_json.build_tree(root, hash_cache=cache)
+        assert after["hash"] != before["hash"]
+        assert child(child(after, "α7RV"), "2 Tab")["hash"] != child(child(before, "α7RV"), "2 Tab")["hash"]
+        assert child(child(after, "α7RV"), "1 Tab")["hash"] == child(child(before, "α7RV"), "1 Tab")["hash"]
+
+        # A rename changes the parent's hash even though the content is the same
+        os.rename(os.path.join(root, "α7RV", "1 Tab", "a.png"), os.path.join(root, "α7RV", "1 Tab", "c.png"))
+        renamed = gen_tree_json.build_tree(root, hash_cache=cache)
+        assert child(child(renamed, "α7RV"), "1 Tab")["hash"] != child(child(after, "α7RV"), "1 Tab")["hash"]
+
+
+def test_cache_and_output_files():
+    with tempfile.TemporaryDirectory() as root:
+        make_public(root)
+        cache_path = os.path.join(root, "cache.json")
+        cache, used = {}, set()
+        tree = gen_tree_json.build_tree(root, hash_cache=cache, used=used)
+        gen_tree_json.save_hash_cache(cache, used, cache_path)
+        assert gen_tree_json.load_hash_cache(cache_path) == cache
+
+        out = os.path.join(root, "tree-data.json")
+        assert gen_tree_json.write_tree(tree, out)
+        mtime = os.stat(out).st_mtime_ns
+        time.sleep(0.01)
+        assert not gen_tree_json.write_tree(tree, out)
+        assert os.stat(out).st_mtime_ns == mtime
+
+
+def test_tree_endpoint_etags():
+    api = importlib.import_module("__api_server")
+    with tempfile.TemporaryDirectory() as root:
+        make_public(root)
+        tree = gen_tree_json.build_tree(root)
+        out = os.path.join(root, "tree-data.json")
+        gen_tree_json.write_tree(tree, out)
+        saved = api.TREE_DATA_PATH
+        api.TREE_DATA_PATH = out
+        try:
+            client = api.app.test_client()
+            resp = client.get("/api/tree", query_string={"path": "α7RV/1 Tab"})
+            node_hash = child(child(tree, "α7RV"), "1 Tab")["hash"]
+            assert resp.status_code == 200 and resp.headers["ETag"] == f'"{node_hash}-full"'
+            assert [c["name"] for c in resp.get_json()["children"]] == ["a.json", "a.png"]
+
+            resp = client.get("/api/tree", query_string={"path": "α7RV/1 Tab"}, headers={"If-None-Match": f'"{node_hash}-full"'})
+            assert resp.status_code == 304 and resp.headers["ETag"] == f'"{node_hash}-full"'
+
+            # A validator from a depth-limited answer doesn't stand for the full subtree
+            resp = client.get("/api/tree", query_string={"path": "α7RV/1 Tab", "depth": 0})
+            assert resp.headers["ETag"] == f'"{node_hash}-d0"'
+            resp = client.get("/api/tree", query_string={"path": "α7RV/1 Tab"}, headers={"If-None-Match": f'"{node_hash}-d0"'})
+            assert resp.status_code == 200 and "children" in resp.get_json()
+            resp = client.get("/api/tree", query_string={"path": "α7RV/1 Tab"}, headers={"If-None-Match": f'"{node_hash}"'})
+            assert resp.status_code == 200
+
+            shallow = client.get("/api/tree", query_string={"path": "α7RV", "depth": 0}).get_json()
+            assert [c["name"] for c in shallow["children"]] == ["1 Tab", "2 Tab"]
+            assert "children" not in shallow["children"][0] and shallow["children"][0]["hash"] == node_hash
+            assert client.get("/api/tree", query_string={"path": "α7RV/nope"}).status_code == 404
+        finally:
+            api.TREE_DATA_PATH = saved
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
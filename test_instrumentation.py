@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for instrumentation.py (histograms, spans, the /metrics endpoint).
+"""
+
+import time
+
+from instrumentation import Histogram, MetricsRegistry, SPAN_DURATION, span
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    hist.observe(0.05, "/a")
+    hist.observe(0.5, "/a")
+    hist.observe(5.0, "/a")
+    lines = hist.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.gauge("demo", "Demo", ("name",)).inc('say "hi"\n')
+    assert 'demo{name="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_span_records_duration():
+    before = SPAN_DURATION.snapshot("test_span")[0]
+    with span("test_span"):
+        time.sleep(0.01)
+    count, total = SPAN_DURATION.snapshot("test_span")
+    assert count == before + 1
+    assert total >= 0.01
+
+
+def test_metrics_endpoint():
+    import camera_api_server
+    from camera_windows import FakeWindowProvider, WindowInfo
+
+    camera_api_server.init_registry(FakeWindowProvider([WindowInfo(1, "Camera", 0, 0, 10, 10)]), start=False)
+    try:
+        client = camera_api_server.app.test_client()
+        client.get('/api/get_camera_info').close()
+        resp = client.get('/metrics')
+        body = resp.get_data(as_text=True)
+        assert resp.mimetype == 'text/plain'
+        assert ('http_request_duration_seconds_count{service="camera_api",'
+                'route="/api/get_camera_info",method="GET",status="200"}') in body
+        assert 'span_duration_seconds_count{span="window_enumeration"}' in body
+        assert 'http_requests_in_flight{service="camera_api"}' in body
+    finally:
+        camera_api_server.registry = None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
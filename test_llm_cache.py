@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for llm_cache.py: exact and semantic hits, TTL/LRU eviction and stats.
+"""
+
+import os
+import tempfile
+
+from llm_cache import CachedLLM, LLMCache, cache_keys
+from mock_llm_server import mock_embedding
+
+SYSTEM = {"role": "system", "content": "You help configure a Sony α7R V."}
+
+
+def ask(question):
+    return [SYSTEM, {"role": "user", "content": question}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_hits_persist_across_instances():
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "cache.sqlite3")
+        cache = LLMCache(path)
+        assert cache.lookup("gpt-4o", ask("Best IBIS setting?")) is None
+        cache.store("gpt-4o", ask("Best IBIS setting?"), "SteadyShot On")
+        cache.close()
+
+        cache = LLMCache(path)
+        hit = cache.lookup("gpt-4o", ask("Best IBIS setting?"))
+        assert hit.response == "SteadyShot On" and hit.kind == "exact"
+        assert cache.lookup("gpt-4o-mini", ask("Best IBIS setting?")) is None
+        assert cache.lookup("gpt-4o", ask("Best IBIS setting?"), image=b"png") is None
+        assert cache.stats()["hit_rate"] == 1 / 3
+
+
+def test_image_content_changes_the_key():
+    def with_image(data):
+        return [{"role": "user", "content": [{"type": "text", "text": "Extract JSON"},
+                                              {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{data}"}}]}]
+
+    assert cache_keys("m", with_image("AAAA")) != cache_keys("m", with_image("BBBB"))
+    assert cache_keys("m", with_image("AAAA")) == cache_keys("m", with_image("AAAA"))
+
+
+def test_key_depends_on_earlier_turns():
+    def follow_up(question, answer):
+        return [SYSTEM, {"role": "user", "content": question}, {"role": "assistant", "content": answer},
+                {"role": "user", "content": "And for video?"}]
+
+    steadyshot = follow_up("How do I set SteadyShot?", "MENU → Shooting → SteadyShot")
+    card = follow_up("How do I format the card?", "MENU → Setup → Format")
+    # Same follow-up question, different conversations: neither key may match
+    assert cache_keys("m", steadyshot)[0] != cache_keys("m", card)[0]
+    assert cache_keys("m", steadyshot)[1] != cache_keys("m", card)[1]
+    cache = LLMCache(None)
+    cache.store("m", steadyshot, "SteadyShot Active for video")
+    assert cache.lookup("m", card) is None
+    assert cache.lookup("m", steadyshot).response == "SteadyShot Active for video"
+
+
+def test_semantic_hits_need_same_context():
+    cache = LLMCache(None, embed_fn=mock_embedding, similarity=0.85)
+    cache.store("gpt-4o", ask("What is the best SteadyShot setting for handheld shooting?"), "On, Standard")
+    hit = cache.lookup("gpt-4o", ask("what is the best steadyshot setting for handheld shooting"))
+    assert hit.kind == "semantic" and hit.response == "On, Standard"
+    assert cache.lookup("gpt-4o", ask("How do I format the memory card?")) is None
+    other_context = [{"role": "system", "content": "Different prompt"}] + ask("What is the best SteadyShot setting for handheld shooting?")[1:]
+    assert cache.lookup("gpt-4o", other_context) is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 2)
+
+
+def test_ttl_and_lru_eviction():
+    clock = Clock()
+    cache = LLMCache(None, ttl=60, max_entries=2, clock=clock)
+    cache.store("m", ask("a"), "A")
+    clock.now += 1
+    cache.store("m", ask("b"), "B")
+    clock.now += 1
+    assert cache.lookup("m", ask("a")).response == "A"  # a is now more recently used than b
+    clock.now += 1
+    cache.store("m", ask("c"), "C")
+    assert cache.lookup("m", ask("b")) is None
+    assert cache.lookup("m", ask("a")) is not None
+    clock.now += 120
+    assert cache.lookup("m", ask("c")) is None
+    cache.evict()
+    assert cache.stats()["entries"] == 0
+
+
+def test_cached_llm_calls_model_once():
+    calls = []
+
+    def complete(messages, model=None, **kwargs):
+        calls.append(model)
+        return "answer"
+
+    llm = CachedLLM(LLMCache(None), complete_fn=complete, model="gpt-4o")
+    assert llm.complete(ask("q")) == ("answer", "model")
+    assert llm.complete(ask("q")) == ("answer", "exact")
+    assert calls == ["gpt-4o"]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for llm_client.py against the local mock_llm_server.py.
+"""
+
+import time
+
+from llm_cache import LLMCache
+from llm_client import LLMError, StreamingReply, iter_sse_data, stream_chat
+from mock_llm_server import create_app
+from serving import ServerThread
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Best IBIS setting?"}]
+
+
+def test_sse_parsing():
+    lines = [b"data: one\n", b"\n", b": comment\n", b"data: a\n", b"data: b\n", b"\n", b"data: [DONE]\n"]
+    assert list(iter_sse_data(lines)) == ["one", "a\nb", "[DONE]"]
+
+
+def test_stream_chat_yields_tokens_incrementally():
+    with ServerThread(create_app(delay=0.05), workers=2) as server:
+        base_url = f"http://127.0.0.1:{server.port}/v1"
+        started = time.monotonic()
+        first_at = None
+        parts = []
+        for text in stream_chat(MESSAGES, base_url=base_url, api_key=""):
+            if first_at is None:
+                first_at = time.monotonic() - started
+            parts.append(text)
+        total = time.monotonic() - started
+        assert "".join(parts) == "Mock answer to: Best IBIS setting?"
+        assert len(parts) == 6
+        # The first token arrives long before the whole reply is done
+        assert first_at < total / 2
+
+
+def test_streaming_reply_runs_in_background_and_cancels():
+    with ServerThread(create_app(delay=0.2), workers=2) as server:
+        base_url = f"http://127.0.0.1:{server.port}/v1"
+        started = time.monotonic()
+        reply = StreamingReply(MESSAGES, base_url=base_url, api_key="").start()
+        assert time.monotonic() - started < 0.1
+        while not reply.text:
+            time.sleep(0.02)
+        reply.cancel()
+        assert reply.wait(2)
+        assert reply.cancelled and reply.error is None
+        assert reply.text != "Mock answer to: Best IBIS setting?"
+
+        reply = StreamingReply(MESSAGES, base_url=base_url, api_key="").start()
+        assert reply.wait(5)
+        assert reply.text == "Mock answer to: Best IBIS setting?"
+
+
+def test_streaming_reply_uses_the_cache_on_its_thread():
+    cache = LLMCache(None)
+    with ServerThread(create_app(), workers=2) as server:
+        reply = StreamingReply(MESSAGES, cache=cache, base_url=f"http://127.0.0.1:{server.port}/v1", api_key="").start()
+        assert reply.wait(5) and reply.cached is None
+    assert cache.stats()["stores"] == 1
+    # Answered from the cache: the server is gone
+    reply = StreamingReply(MESSAGES, cache=cache, base_url="http://127.0.0.1:9/v1", api_key="").start()
+    assert reply.wait(5) and reply.error is None
+    assert reply.cached == "exact" and reply.text == "Mock answer to: Best IBIS setting?"
+
+
+def test_errors_are_reported():
+    with ServerThread(create_app(), workers=2) as server:
+        reply = StreamingReply(MESSAGES, base_url=f"http://127.0.0.1:{server.port}/nope").start()
+        assert reply.wait(5)
+        assert "404" in reply.error
+    try:
+        list(stream_chat(MESSAGES, base_url="http://127.0.0.1:1/v1", timeout=2))
+        assert False, "expected LLMError"
+    except LLMError as e:
+        assert "unreachable" in str(e)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for manual_index.py: parallel extraction, phrase lookup, rebuild-on-change
+and setting links.
+"""
+
+import importlib
+import json
+import os
+import tempfile
+
+import manual_index
+from manual_index import ManualIndex, load_or_build, setting_names, setting_pages
+
+
+def make_pdf(texts):
+    """Minimal PDF with one line of Helvetica text per page"""
+    objects = []
+    n_pages = len(texts)
+    # 1: catalog, 2: pages, 3: font, then page/content pairs
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+PAGES = ["Cover", "SteadyShot Adjust. sets the stabilization for the lens",
+         "Use SteadyShot when shooting handheld", "Adjust. the SteadyShot focal length"]
+
+
+def test_phrase_lookup():
+    index = ManualIndex.build(PAGES)
+    assert index.pages_for("SteadyShot Adjust.") == [2]
+    assert index.pages_for("steadyshot") == [2, 3, 4]
+    assert index.pages_for("focal length") == [4]
+    assert index.pages_for("SteadyShot Type") == []
+    assert index.pages_for("") == []
+
+
+def test_builds_in_parallel_and_rebuilds_only_on_change():
+    with tempfile.TemporaryDirectory() as root:
+        pdf = os.path.join(root, "manual.pdf")
+        with open(pdf, "wb") as f:
+            f.write(make_pdf(PAGES))
+        index = load_or_build(pdf, workers=2)
+        assert index.pages_for("SteadyShot Adjust.") == [2]
+        index_path = os.path.join(root, "manual.index.json")
+        assert os.path.exists(index_path)
+
+        # Same hash: the saved index is used as is (tampered here to prove it)
+        with open(index_path, encoding="utf-8") as f:
+            data = json.load(f)
+        data["terms"]["marker"] = [1]
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert "marker" in load_or_build(pdf, workers=2).terms
+
+        with open(pdf, "wb") as f:
+            f.write(make_pdf(PAGES + ["New page about Silent Mode"]))
+        rebuilt = load_or_build(pdf, workers=1)
+        assert "marker" not in rebuilt.terms
+        assert rebuilt.pages_for("silent mode") == [5]
+
+
+def test_process_index_follows_pdf_changes():
+    with tempfile.TemporaryDirectory() as root:
+        pdf = os.path.join(root, "manual.pdf")
+        with open(pdf, "wb") as f:
+            f.write(make_pdf(PAGES))
+        original = manual_index.MANUAL_PDF
+        manual_index.MANUAL_PDF = pdf
+        try:
+            first = manual_index.get_manual_index()
+            assert manual_index.get_manual_index() is first
+            with open(pdf, "wb") as f:
+                f.write(make_pdf(PAGES + ["New page about Silent Mode"]))
+            assert manual_index.get_manual_index().pages_for("silent mode") == [5]
+
+            api = importlib.import_module("__api_server")
+            client = api.app.test_client()
+            data = client.get("/api/manual_pages?q=silent mode").get_json()
+            assert data["pages"] == [{"page": 5, "url": "http://localhost/docs/manual.pdf#page=5"}]
+            os.environ["DOCS_ORIGIN"] = "http://localhost:3000/"
+            try:
+                data = client.get("/api/manual_pages?q=silent mode").get_json()
+                assert data["pages"][0]["url"] == "http://localhost:3000/docs/manual.pdf#page=5"
+            finally:
+                del os.environ["DOCS_ORIGIN"]
+        finally:
+            manual_index.MANUAL_PDF = original
+            manual_index._manual_index.update(stat=None, index=None)
+
+
+def test_docs_route_serves_the_manual():
+    api = importlib.import_module("__api_server")
+    client = api.app.test_client()
+    resp = client.get(f"/docs/{os.path.basename(manual_index.MANUAL_PDF)}")
+    assert resp.status_code == 200 and resp.data[:5] == b"%PDF-"
+    resp.close()
+    assert client.get("/docs/../__api_server.py").status_code == 404
+
+
+def test_setting_links():
+    menu = {"id": "x", "name": "Image Stabilization", "type": "submenu",
+            "submenu": {"settings": [{"name": "SteadyShot"}, {"name": "SteadyShot Adjust."}]}}
+    assert setting_names(menu) == ["SteadyShot", "SteadyShot Adjust."]
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "7_Image-Stabilization"))
+        with open(os.path.join(root, "7_Image-Stabilization", "7_image_stabilization.json"), "w") as f:
+            f.write("/api: /api/ask-chatgpt_streamed\n" + json.dumps(menu))
+        links = setting_pages(ManualIndex.build(PAGES), root)
+        assert links["SteadyShot"]["pages"] == [2, 3, 4]
+        assert links["SteadyShot Adjust."] == {"pages": [2], "files": [os.path.join("7_Image-Stabilization", "7_image_stabilization.json")]}
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for preset_planner.py: minimal diffs, menu ordering and grouping,
+batch diffs with PresetBank, and the real α7RV tree.
+"""
+
+import tempfile
+
+from menu_fixtures import write_menu
+from preset_planner import OTHER_GROUP, PresetBank, PresetPlanner, get_planner, natural_key
+
+
+def sample_planner(root):
+    write_menu(root, "Stills/1_Shooting/PAGE_1/1_Quality/PAGE_2/10 Color Space/10_Color-Space.json",
+               {"menu": "Color Space", "navigation": "MENU → Color Space"})
+    write_menu(root, "Stills/1_Shooting/PAGE_1/1_Quality/PAGE_2/8 High ISO NR/8_High-ISO-NR.json",
+               {"menu": "High ISO NR"})
+    write_menu(root, "Stills/1_Shooting/PAGE_1/1_Quality/PAGE_1/3 Aspect Ratio/3_Aspect-Ratio.json",
+               {"menu": "Aspect Ratio"})
+    write_menu(root, "Stills/1_Shooting/PAGE_1/7_Stabilization/1 SteadyShot/1_SteadyShot.json",
+               {"menu": "SteadyShot"})
+    write_menu(root, "Stills/1_Shooting/PAGE_1/7_Stabilization/2 SteadyShot Adjust./2_SteadyShot-Adjust.json",
+               {"menu": "SteadyShot Adjust."})
+    write_menu(root, "Stills/1_Shooting/PAGE_1/7_Stabilization/7_stabilization.json",
+               {"id": "s", "name": "Stabilization", "type": "submenu", "submenu": {"settings": []}})
+    return PresetPlanner.from_tree(root)
+
+
+def test_natural_key():
+    assert sorted(["10 Color Space", "8 High ISO NR", "9 HLG"], key=natural_key) == ["8 High ISO NR", "9 HLG", "10 Color Space"]
+
+
+def test_plan_is_minimal_and_in_menu_order():
+    with tempfile.TemporaryDirectory() as root:
+        planner = sample_planner(root)
+        assert [planner.locations[c].name for c in planner.columns] == [
+            "Aspect Ratio", "High ISO NR", "Color Space", "SteadyShot", "SteadyShot Adjust."]
+        current = {"SteadyShot Adjust.": "Auto", "aspect ratio": "3:2", "High ISO NR": "Normal", "SteadyShot": "On"}
+        target = {"SteadyShot Adjust": "[Manual]", "Color Space": "AdobeRGB", "Aspect Ratio": "3:2",
+                  "High ISO NR": "normal", "Lens": "85mm"}
+        plan = planner.plan(current, target)
+        assert [(s.setting, s.current, s.target) for s in plan.steps] == [
+            ("Color Space", None, "AdobeRGB"), ("SteadyShot Adjust.", "Auto", "[Manual]"), ("Lens", None, "85mm")]
+        assert [group for group, _ in plan.groups] == ["Stills › Shooting › Quality", "Stills › Shooting › Stabilization",
+                                                      OTHER_GROUP]
+        assert plan.steps[0].navigation == "MENU → Color Space"
+        assert plan.unchanged == 2 and plan.unknown == ["Lens"]
+        assert planner.plan(current, {}).steps == []
+
+
+def test_bank_matches_single_plans():
+    with tempfile.TemporaryDirectory() as root:
+        planner = sample_planner(root)
+        current = {"SteadyShot": "On", "High ISO NR": "Normal", "Lens": "50mm"}
+        presets = [
+            {"SteadyShot": "On", "High ISO NR": "Normal"},
+            {"SteadyShot": "Off", "Color Space": "sRGB", "Lens": "85mm"},
+            {"high iso nr": "Low", "SteadyShot": "on", "Drive Mode": "Single"},
+        ]
+        bank = PresetBank(planner, presets)
+        assert bank.change_counts(current).tolist() == [0, 3, 2]
+        # A value no saved preset uses differs from all of them
+        assert bank.change_counts({"SteadyShot": "Auto"}).tolist() == [2, 3, 3]
+        assert bank.plans(current) == [planner.plan(current, p) for p in presets]
+        assert planner.plan_many(current, presets[1:2]) == [planner.plan(current, presets[1])]
+
+
+def test_movie_setting_with_a_stills_name_keeps_its_own_location():
+    with tempfile.TemporaryDirectory() as root:
+        write_menu(root, "Stills/1_Shooting/PAGE_1/1_Quality/PAGE_1/1 File Format/1_File_Format.json",
+                   {"menu": "File Format", "modes": ["photo"]})
+        write_menu(root, "Stills/1_Shooting/PAGE_1/1_Quality/PAGE_1/4 File Format/4_File_Format.json",
+                   {"menu": "File Format", "modes": ["photo", "movie"], "condition": {"mode": ["movie"]}})
+        planner = PresetPlanner.from_tree(root)
+        assert [planner.locations[c].name for c in planner.columns] == ["File Format", "Movie/File Format"]
+        plan = planner.plan({}, {"Movie/File Format": "XAVC S 4K", "File Format": "RAW"})
+        assert [(s.setting, s.path.endswith("4_File_Format.json")) for s in plan.steps] == [
+            ("File Format", False), ("Movie/File Format", True)]
+        assert plan.unknown == []
+
+
+def test_real_tree():
+    planner = get_planner()
+    plan = planner.plan({"Focal Length": "8mm"}, {"Color Space": "AdobeRGB", "High ISO NR": "Off",
+                                                 "Focal Length": "50mm", "Aspect Ratio": "3:2"})
+    assert [s.setting for s in plan.steps] == ["Aspect Ratio", "High ISO NR", "Color Space", "Focal Length"]
+    assert plan.groups[0][0].startswith("Stills › Shooting")
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for screen_capture.py.
+Uses a fake monitor layout and grabber, so it runs on any platform.
+"""
+
+from PIL import Image
+
+import screen_capture
+from screen_capture import Monitor
+
+# Secondary monitor to the left of the primary one, like the camera setup
+# described in snap_config.json (camera window at left -3300).
+FAKE_MONITORS = [
+    Monitor(0, 0, 1920, 1080),
+    Monitor(-3840, 0, 0, 2160),
+]
+
+
+class FakeGrabber:
+    """Records every rectangle it is asked for and returns a solid image of that size."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, bbox):
+        self.calls.append(bbox)
+        return Image.new("RGB", (bbox[2] - bbox[0], bbox[3] - bbox[1]), (255, 0, 0))
+
+
+def test_monitor_slices_single_monitor():
+    bbox = (-3300, 550, -1825, 1455)
+    assert screen_capture.monitor_slices(bbox, FAKE_MONITORS) == [(1, bbox)]
+
+
+def test_monitor_slices_spanning_monitors():
+    bbox = (-100, 10, 100, 20)
+    assert screen_capture.monitor_slices(bbox, FAKE_MONITORS) == [
+        (0, (0, 10, 100, 20)),
+        (1, (-100, 10, 0, 20)),
+    ]
+
+
+def test_monitor_slices_off_desktop():
+    assert screen_capture.monitor_slices((5000, 5000, 5100, 5100), FAKE_MONITORS) == []
+
+
+def test_grab_reads_only_the_region():
+    grabber = FakeGrabber()
+    bbox = (-3300, 550, -1825, 1455)
+    img = screen_capture.grab(bbox, monitors=FAKE_MONITORS, grab_rect=grabber)
+    assert grabber.calls == [bbox]
+    assert img.size == (1475, 905)
+
+
+def test_grab_stitches_across_monitors():
+    grabber = FakeGrabber()
+    img = screen_capture.grab((-100, 1000, 100, 1200), monitors=FAKE_MONITORS, grab_rect=grabber)
+    assert sorted(grabber.calls) == [(-100, 1000, 0, 1200), (0, 1000, 100, 1080)]
+    assert img.size == (200, 200)
+    # The part below the primary monitor is off-desktop and stays black
+    assert img.getpixel((150, 150)) == (0, 0, 0)
+    assert img.getpixel((150, 50)) == (255, 0, 0)
+    assert img.getpixel((50, 150)) == (255, 0, 0)
+
+
+def test_grab_regions_single_grab():
+    calls = []
+
+    def fake_grab(bbox):
+        calls.append(bbox)
+        return Image.new("RGB", (bbox[2] - bbox[0], bbox[3] - bbox[1]))
+
+    regions = {
+        "tab_bar": (-3290, 590, -1835, 680),
+        "setting_panel": (-2870, 680, -1835, 1445),
+    }
+    images = screen_capture.grab_regions(regions, grab_fn=fake_grab)
+    assert calls == [(-3290, 590, -1835, 1445)]
+    assert images["tab_bar"].size == (1455, 90)
+    assert images["setting_panel"].size == (1035, 765)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for screenshot_archive.py: verified lossless output, the hash-keyed
+manifest and in-place mode.
+"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+import screenshot_archive
+
+
+def make_png(path, seed):
+    # A palette screenshot-like image saved without compression, so there is room to shrink it
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pixels = np.zeros((120, 200), dtype=np.uint8)
+    pixels[10:40, 10 + seed:150] = 3
+    pixels[60:70, :] = 7
+    im = Image.fromarray(pixels, "P")
+    im.putpalette([v for i in range(16) for v in (i * 16, 255 - i * 16, i * 8)])
+    im.save(path, compress_level=0)
+
+
+def pixels(path):
+    with Image.open(path) as im:
+        return np.asarray(im.convert("RGBA"))
+
+
+def test_archive_is_pixel_identical_and_incremental():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, out = os.path.join(tmp, "α7RV"), os.path.join(tmp, "archive")
+        make_png(os.path.join(root, "1 Tab/a.png"), 0)
+        make_png(os.path.join(root, "1 Tab/b.png"), 5)
+        os.makedirs(os.path.join(root, "2 Tab"))
+        shutil.copyfile(os.path.join(root, "1 Tab/a.png"), os.path.join(root, "2 Tab/a copy.png"))
+
+        stats = screenshot_archive.archive_library(root, out, workers=1)
+        assert (stats["transcoded"], stats["copied"]) == (2, 1)
+        assert stats["bytes"] < stats["source_bytes"]
+        for rel in ("1 Tab/a", "1 Tab/b", "2 Tab/a copy"):
+            folder = os.path.join(out, os.path.dirname(rel))
+            output = next(os.path.join(folder, n) for n in os.listdir(folder) if os.path.splitext(n)[0] == os.path.basename(rel))
+            assert np.array_equal(pixels(output), pixels(os.path.join(root, rel + ".png")))
+
+        stats = screenshot_archive.archive_library(root, out, workers=1)
+        assert (stats["transcoded"], stats["skipped"]) == (0, 3)
+        # A changed screenshot is the only one processed again
+        make_png(os.path.join(root, "1 Tab/b.png"), 9)
+        stats = screenshot_archive.archive_library(root, out, workers=1)
+        assert (stats["transcoded"], stats["skipped"]) == (1, 2)
+
+
+def test_restored_source_is_encoded_again():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, out = os.path.join(tmp, "α7RV"), os.path.join(tmp, "archive")
+        path = os.path.join(root, "t", "a.png")
+        make_png(path, 0)
+        with open(path, "rb") as f:
+            original = f.read()
+        screenshot_archive.archive_library(root, out, workers=1)
+        make_png(path, 9)
+        screenshot_archive.archive_library(root, out, workers=1)
+        with open(path, "wb") as f:
+            f.write(original)
+        # The hash is known from the first run, but the output now holds the changed image
+        stats = screenshot_archive.archive_library(root, out, workers=1)
+        assert stats["skipped"] == 0 and stats["transcoded"] == 1
+        assert np.array_equal(pixels(os.path.join(out, "t", "a.webp")), pixels(path))
+
+
+def test_stale_outputs_are_removed():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, out = os.path.join(tmp, "α7RV"), os.path.join(tmp, "archive")
+        make_png(os.path.join(root, "a.png"), 0)
+        make_png(os.path.join(root, "b.png"), 5)
+        screenshot_archive.archive_library(root, out, workers=1)
+        assert sorted(os.listdir(out)) == ["a.webp", "b.webp", "manifest.json"]
+
+        os.remove(os.path.join(root, "a.png"))
+        make_png(os.path.join(root, "b.png"), 7)
+        saved = screenshot_archive.encode_candidates
+        # WebP unavailable this time: b is re-encoded as PNG
+        screenshot_archive.encode_candidates = lambda im, webp=True, effort=4: saved(im, False, effort)
+        try:
+            stats = screenshot_archive.archive_library(root, out, workers=1)
+        finally:
+            screenshot_archive.encode_candidates = saved
+        assert stats["removed"] == 2
+        assert sorted(os.listdir(out)) == ["b.png", "manifest.json"]
+
+
+def test_in_place_keeps_png_names():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "α7RV")
+        manifest = os.path.join(tmp, "manifest.json")
+        path = os.path.join(root, "1 Tab/a.png")
+        make_png(path, 0)
+        before, size = pixels(path), os.path.getsize(path)
+
+        stats = screenshot_archive.archive_library(root, in_place=True, manifest_path=manifest, workers=1)
+        assert stats["transcoded"] == 1 and os.listdir(os.path.dirname(path)) == ["a.png"]
+        assert os.path.getsize(path) < size and np.array_equal(pixels(path), before)
+        stats = screenshot_archive.archive_library(root, in_place=True, manifest_path=manifest, workers=1)
+        assert stats["skipped"] == 1 and stats["transcoded"] == 0
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for screenshot_prep.py: trim, flatten, resize and the batch pipeline.
+"""
+
+import base64
+import io
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+import screenshot_prep
+
+
+def screenshot(size=(300, 200), box=(20, 10, 250, 180), border=(0, 0, 0), alpha=None):
+    pixels = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    pixels[:] = border
+    left, top, right, bottom = box
+    pixels[top:bottom, left:right] = (200, 30, 30)
+    pixels[top + 5, left:right] = (255, 255, 0)  # a detail line inside the content
+    if alpha is None:
+        return Image.fromarray(pixels, "RGB")
+    return Image.fromarray(np.dstack([pixels, np.full(pixels.shape[:2], alpha, dtype=np.uint8)]), "RGBA")
+
+
+def png_bytes(im):
+    buf = io.BytesIO()
+    im.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_trim_box_matches_content():
+    rgb = np.asarray(screenshot())
+    assert screenshot_prep.trim_box(rgb) == (20, 10, 250, 180)
+    # Near-border noise below the threshold is still border
+    noisy = rgb.copy()
+    noisy[0:5, 0:5] = 6
+    assert screenshot_prep.trim_box(noisy) == (20, 10, 250, 180)
+    # Nothing but border: keep the whole image
+    assert screenshot_prep.trim_box(np.zeros((40, 50, 3), dtype=np.uint8)) == (0, 0, 50, 40)
+    # Content touching every edge: nothing to trim
+    busy = np.random.default_rng(0).integers(0, 256, (200, 300, 3), dtype=np.uint8)
+    assert screenshot_prep.trim_box(busy) == (0, 0, 300, 200)
+
+
+def test_prepare_trims_flattens_and_resizes():
+    payload = screenshot_prep.prepare(png_bytes(screenshot()), max_side=115)
+    assert payload.box == (20, 10, 250, 180)
+    assert (payload.width, payload.height) == (115, 85)
+    assert payload.jpeg[:2] == b"\xff\xd8"
+    with Image.open(io.BytesIO(payload.jpeg)) as im:
+        assert im.mode == "RGB" and im.size == (115, 85) and not im.info.get("exif")
+
+    # Half-transparent red over white comes out pink
+    flat = screenshot_prep.flatten(np.asarray(screenshot(alpha=128)))
+    assert tuple(flat[100, 100]) == (227, 142, 142)
+
+    part = screenshot_prep.image_part(payload)
+    assert part["type"] == "image_url"
+    assert base64.b64decode(part["image_url"]["url"].split(",", 1)[1]) == payload.jpeg
+
+
+def test_prepare_directory_writes_jpegs():
+    with tempfile.TemporaryDirectory() as tmp:
+        root, out = os.path.join(tmp, "α7RV"), os.path.join(tmp, "prepared")
+        os.makedirs(os.path.join(root, "1 Tab"))
+        screenshot().save(os.path.join(root, "1 Tab", "a.png"))
+        screenshot(box=(10, 10, 100, 100)).save(os.path.join(root, "b.png"))
+        payloads = screenshot_prep.prepare_directory(root, out, workers=1)
+        assert [os.path.relpath(p.source, root) for p in payloads] == ["b.png", os.path.join("1 Tab", "a.png")]
+        assert payloads[0].box == (10, 10, 100, 100)
+        with open(os.path.join(out, "1 Tab", "a.jpg"), "rb") as f:
+            assert f.read() == payloads[1].jpeg
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for serving.py: the thread-pooled and waitress servers and run_blocking().
+"""
+
+import socket
+import threading
+import urllib.error
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import waitress
+
+import serving
+
+
+def slow_app(environ, start_response):
+    time.sleep(0.2)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"ok"]
+
+
+def test_pooled_server_handles_requests_in_parallel():
+    server = serving.make_server(slow_app, "127.0.0.1", 0, workers=8, request_timeout=5)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+    try:
+        started = time.monotonic()
+        with ThreadPoolExecutor(8) as pool:
+            bodies = list(pool.map(lambda _: urllib.request.urlopen(url, timeout=5).read(), range(8)))
+        elapsed = time.monotonic() - started
+        assert bodies == [b"ok"] * 8
+        # Eight 0.2 s requests served concurrently, not one after another
+        assert elapsed < 1.0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_waitress_server_drains_on_stop():
+    server = serving.make_waitress_server(slow_app, "127.0.0.1", 0, workers=4, request_timeout=5)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.effective_port}/"
+    with ThreadPoolExecutor(4) as pool:
+        # Four requests in flight when the stop begins all get their answer
+        pending = [pool.submit(lambda: urllib.request.urlopen(url, timeout=5).read()) for _ in range(4)]
+        time.sleep(0.05)
+        serving.stop_waitress(server, timeout=5)
+        assert [f.result() for f in pending] == [b"ok"] * 4
+    thread.join(5)
+    assert not thread.is_alive()
+    try:
+        urllib.request.urlopen(url, timeout=1)
+    except (urllib.error.URLError, ConnectionError):
+        pass
+    else:
+        assert False, "expected the server to be closed"
+
+
+def test_waitress_internals_used_by_stop_waitress():
+    # stop_waitress() reaches into these; an upgrade that renames them must fail here
+    single = serving.make_waitress_server(slow_app, "127.0.0.1", 0, workers=1, request_timeout=5)
+    multi = waitress.create_server(slow_app, listen="127.0.0.1:0 127.0.0.1:0")
+    try:
+        assert isinstance(single, serving.WaitressListener) and not hasattr(single, "map")
+        assert isinstance(single._map, dict) and single._map[single._fileno] is single
+        assert callable(single.trigger.pull_trigger) and callable(single.task_dispatcher.shutdown)
+        listeners = [d for d in multi.map.values() if isinstance(d, serving.WaitressListener)]
+        assert len(listeners) == 2 and callable(multi.task_dispatcher.shutdown)
+        assert callable(serving.wasyncore.dispatcher.close) and callable(serving.wasyncore.close_all)
+
+        thread = threading.Thread(target=single.run, daemon=True)
+        thread.start()
+        with socket.create_connection(("127.0.0.1", single.effective_port), timeout=5) as client:
+            client.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            deadline = time.monotonic() + 5
+            channels = []
+            while not channels and time.monotonic() < deadline:
+                channels = [c for c in list(single._map.values()) if isinstance(c, serving.HTTPChannel)]
+                time.sleep(0.01)
+            channel, = channels
+            assert isinstance(channel.requests, list) and isinstance(channel.total_outbufs_len, int)
+            assert client.recv(1024).startswith(b"HTTP/1.1 200")
+        serving.stop_waitress(single, timeout=5)
+        thread.join(5)
+        assert not thread.is_alive()
+    finally:
+        multi.close()
+
+
+def test_run_blocking_returns_result():
+    assert serving.run_blocking(sum, [1, 2, 3], timeout=1) == 6
+
+
+def test_run_blocking_times_out():
+    try:
+        serving.run_blocking(time.sleep, 0.5, timeout=0.05)
+    except serving.BlockingTimeout:
+        pass
+    else:
+        assert False, "expected BlockingTimeout"
+
+
+def test_bounded_executor_rejects_when_full():
+    executor = serving.BoundedExecutor(1, max_pending=0)
+    release = threading.Event()
+    executor.submit(release.wait)
+    try:
+        executor.submit(lambda: None, timeout=0.05)
+    except serving.BlockingTimeout:
+        pass
+    else:
+        assert False, "expected BlockingTimeout"
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for snapshot coalescing and caching (snapshot_cache.py) and the
+/api/camera_snapshot route. Uses the synthetic capture source, so no display
+is needed.
+"""
+
+import threading
+
+from screen_capture import SyntheticCaptureSource
+from snapshot_cache import SingleFlight, SnapshotService, TTLCache
+
+BBOX = (-3300, 550, -1825, 1455)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_requests_share_one_capture():
+    source = SyntheticCaptureSource(delay=0.2)
+    service = SnapshotService(source, ttl=5)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get(BBOX))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert source.frames == 1
+    assert len({r.etag for r in results}) == 1
+    assert service.stats["captures"] == 1
+    assert service.stats["coalesced"] + service.stats["cache_hits"] == 7
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    source = SyntheticCaptureSource()
+    service = SnapshotService(source, ttl=0.5, clock=clock)
+    first = service.get(BBOX)
+    clock.now = 0.4
+    assert service.get(BBOX) is first
+    clock.now = 0.6
+    assert service.get(BBOX).etag != first.etag
+    assert source.frames == 2
+
+
+def test_regions_are_cached_separately():
+    source = SyntheticCaptureSource()
+    service = SnapshotService(source, ttl=5)
+    service.get((0, 0, 10, 10))
+    service.get((0, 0, 20, 10))
+    service.get((0, 0, 10, 10))
+    assert source.frames == 2
+
+
+def test_single_flight_propagates_errors():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("capture failed")
+
+    try:
+        flight.do("k", boom)
+    except RuntimeError as e:
+        assert str(e) == "capture failed"
+    else:
+        assert False, "expected RuntimeError"
+    # The failed call is not remembered
+    assert flight.do("k", lambda: 42) == (42, False)
+
+
+def test_ttl_cache_evicts_oldest():
+    cache = TTLCache(ttl=10, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None
+    assert cache.get("c") == 3
+
+
+def test_snapshot_route_etag():
+    import camera_api_server
+
+    camera_api_server.init_snapshots(SyntheticCaptureSource(), ttl=5)
+    try:
+        client = camera_api_server.app.test_client()
+        resp = client.get('/api/camera_snapshot?left=0&top=0&width=64&height=48')
+        assert resp.status_code == 200
+        assert resp.mimetype == 'image/png'
+        etag = resp.headers['ETag']
+
+        resp = client.get('/api/camera_snapshot?left=0&top=0&width=64&height=48',
+                          headers={'If-None-Match': etag})
+        assert resp.status_code == 304
+
+        resp = client.get('/api/camera_snapshot?region=tab_bar')
+        assert resp.status_code == 200
+        resp = client.get('/api/camera_snapshot?region=nope')
+        assert resp.status_code == 400
+    finally:
+        camera_api_server.snapshots = None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for tree_diff.py: pruning by hash, rename/move matching and the
+option-level report for changed menu JSON.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app"))
+import gen_tree_json  # noqa: E402
+import tree_diff  # noqa: E402
+from menu_fixtures import write_menu  # noqa: E402
+
+
+def make_tree(root):
+    write_menu(root, "Stills/1 SteadyShot/1_SteadyShot.json", {
+        "menu": "SteadyShot", "items": [{"label": "On"}, {"label": "Off"}], "modes": ["photo"]})
+    write_menu(root, "Stills/2 Focal Length/2_Focal-Length.json", {"menu": "Focal Length", "items": [{"label": "Auto"}]})
+    write_menu(root, "Stills/3 Color Space/3_Color-Space.json", {"menu": "Color Space", "items": [{"label": "sRGB"}]})
+    write_menu(root, "Setup/1 Format/1_Format.json", {"menu": "Format"})
+    write_menu(root, "Setup/2 Serial Number/2_Serial-Number.json", {"menu": "Write Serial Number"})
+
+
+def kinds(changes):
+    return sorted((c.kind, c.old_path, c.new_path) for c in changes)
+
+
+def test_identical_snapshots_compare_only_the_root():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(os.path.join(tmp, "a"))
+        shutil.copytree(os.path.join(tmp, "a"), os.path.join(tmp, "b"))
+        changes, stats = tree_diff.diff_trees(tree_diff.load_snapshot(os.path.join(tmp, "a")),
+                                              tree_diff.load_snapshot(os.path.join(tmp, "b")))
+        assert changes == [] and stats["compared"] == 1
+        assert tree_diff.format_report(changes) == "No changes."
+
+
+def test_renames_moves_and_option_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        old, new = os.path.join(tmp, "old"), os.path.join(tmp, "new")
+        make_tree(old)
+        make_tree(new)
+        # Option list edited in place
+        write_menu(new, "Stills/1 SteadyShot/1_SteadyShot.json", {
+            "menu": "SteadyShot", "items": [{"label": "On"}, {"label": "Active"}], "modes": ["photo", "video"]})
+        # Renumbered and moved to another tab, unchanged
+        shutil.move(os.path.join(new, "Stills/2 Focal Length"), os.path.join(new, "Setup/3 Focal Length"))
+        # Folder renamed and the setting inside renamed too
+        shutil.move(os.path.join(new, "Stills/3 Color Space"), os.path.join(new, "Stills/3 Colour Space"))
+        write_menu(new, "Stills/3 Colour Space/3_Color-Space.json", {"menu": "Colour Space", "items": [{"label": "sRGB"}]})
+        # Removed and added
+        shutil.rmtree(os.path.join(new, "Setup/2 Serial Number"))
+        write_menu(new, "Setup/4 Touch Panel/4_Touch-Panel.json", {"menu": "Touch Panel"})
+
+        changes, stats = tree_diff.diff_trees(tree_diff.load_snapshot(old), tree_diff.load_snapshot(new))
+        assert kinds(changes) == [
+            ("added", None, "Setup/4 Touch Panel"),
+            ("modified", "Stills/1 SteadyShot/1_SteadyShot.json", "Stills/1 SteadyShot/1_SteadyShot.json"),
+            ("modified", "Stills/3 Color Space/3_Color-Space.json", "Stills/3 Colour Space/3_Color-Space.json"),
+            ("moved", "Stills/2 Focal Length", "Setup/3 Focal Length"),
+            ("removed", "Setup/2 Serial Number", None),
+            ("renamed", "Stills/3 Color Space", "Stills/3 Colour Space"),
+        ]
+        steady = next(c for c in changes if c.old_path and "SteadyShot" in c.old_path)
+        assert steady.detail == ["options added: Active", "options removed: Off", "modes added: video"]
+        colour = next(c for c in changes if c.kind == "modified" and "Colour" in c.new_path)
+        assert colour.detail == ["setting renamed: Color Space -> Colour Space"]
+        # Setup/1 Format is identical and never opened
+        assert stats["compared"] < 10
+        report = tree_diff.format_report(changes)
+        assert "> Stills/2 Focal Length/ -> Setup/3 Focal Length/ (moved)" in report
+        assert report.splitlines()[-1] == "1 added, 2 modified, 1 moved, 1 removed, 1 renamed"
+
+
+def test_tree_data_json_hashes_match_directory_snapshot():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(os.path.join(tmp, "α7RV"))
+        tree_data = os.path.join(tmp, "tree-data.json")
+        gen_tree_json.write_tree(gen_tree_json.build_tree(tmp, hash_cache={}), tree_data)
+        from_json = tree_diff.load_snapshot(tree_data, "α7RV")
+        from_dir = tree_diff.load_snapshot(os.path.join(tmp, "α7RV"))
+        assert from_json["hash"] == from_dir["hash"]
+        assert tree_diff.diff_trees(from_json, from_dir)[0] == []
+
+
+def test_directory_snapshot_skips_excluded_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(os.path.join(tmp, "α7RV"))
+        before = tree_diff.load_snapshot(os.path.join(tmp, "α7RV"))["hash"]
+        # Names in gen_tree_json.EXCLUDE never reach tree-data.json, so they don't count here either
+        os.makedirs(os.path.join(tmp, "α7RV", "Stills", ".git"))
+        with open(os.path.join(tmp, "α7RV", "Setup", "1_Format.json:Zone.Identifier"), "w") as f:
+            f.write("[ZoneTransfer]")
+        assert tree_diff.load_snapshot(os.path.join(tmp, "α7RV"))["hash"] == before
+
+
+def test_normalize_name():
+    assert tree_diff.normalize_name("3_Focal-Length.json") == "focallength"
+    assert tree_diff.normalize_name("4 Focal Length") == "focallength"
+    assert tree_diff.normalize_name("2 Camera Set. Memory") == "camerasetmemory"
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"{name}: ok")
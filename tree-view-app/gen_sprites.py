@@ -0,0 +1,183 @@
+"""
+Pack each menu tab's screenshots into one downscaled sprite atlas.
+
+    python3 tree-view-app/gen_sprites.py            # only tabs whose screenshots changed
+    python3 tree-view-app/gen_sprites.py --force
+
+A tab is a top-level folder of public/α7RV, or each child of one that holds no
+screenshots itself (Stills/1_Shooting, Stills/2_Exposure_Color, ...). For every
+tab, public/sprites/ gets an atlas image and an entry in sprites.json:
+
+    {"version": 1, "tabs": {"Stills/1_Shooting": {
+        "image": "sprites/Stills__1_Shooting.<key>.webp", "width": ..., "height": ...,
+        "key": ..., "members": {"α7RV/Stills/1_Shooting/...png": [x, y, w, h], ...}}}}
+
+so a viewer loads a whole tab with one request and one decode and shows a
+member with CSS background-position. A tab's key hashes its members' paths
+and content hashes (from gen_tree_json's hash cache) and the sprite settings.
+Tabs whose key is unchanged are not redrawn.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, features
+
+from gen_tree_json import file_hash, load_hash_cache, save_hash_cache
+
+PUBLIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public")
+MENU_DIR = os.path.join(PUBLIC_DIR, "α7RV")
+SPRITES_DIR = os.path.join(PUBLIC_DIR, "sprites")
+MANIFEST_NAME = "sprites.json"
+MANIFEST_VERSION = 1
+
+SPRITE_WIDTH = 368        # a quarter of the 1475 px captures
+MAX_ATLAS_WIDTH = 4096
+FORMAT = "webp" if features.check("webp") else "png"
+QUALITY = 80
+
+_NUMBER_RE = re.compile(r"(\d+)")
+
+
+def natural_key(path):
+    return [int(part) if part.isdigit() else part.lower() for part in _NUMBER_RE.split(path)]
+
+
+def list_pngs(path):
+    found = []
+    for root, dirs, files in os.walk(path):
+        found.extend(os.path.join(root, name) for name in files
+                     if name.lower().endswith(".png") and not name.endswith("Zone.Identifier"))
+    return sorted(found, key=lambda p: natural_key(os.path.relpath(p, path)))
+
+
+def find_tabs(menu_dir=MENU_DIR):
+    """{tab name: [screenshot paths]}, e.g. {"1 My Menu": [...], "Stills/1_Shooting": [...]}"""
+    tabs = {}
+    for entry in sorted(os.listdir(menu_dir), key=natural_key):
+        full_path = os.path.join(menu_dir, entry)
+        if not os.path.isdir(full_path):
+            continue
+        has_own = any(name.lower().endswith(".png") for name in os.listdir(full_path))
+        children = [c for c in sorted(os.listdir(full_path), key=natural_key) if os.path.isdir(os.path.join(full_path, c))]
+        if has_own or not children:
+            tabs[entry] = list_pngs(full_path)
+        else:
+            for child in children:
+                tabs[f"{entry}/{child}"] = list_pngs(os.path.join(full_path, child))
+    return {tab: members for tab, members in tabs.items() if members}
+
+
+def tab_key(rels, hashes, width=SPRITE_WIDTH, fmt=FORMAT, quality=QUALITY):
+    h = hashlib.sha256(f"sprites {MANIFEST_VERSION} {width} {MAX_ATLAS_WIDTH} {fmt} {quality}\n".encode("utf-8"))
+    for rel, digest in zip(rels, hashes):
+        h.update(f"{rel}\0{digest}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def image_name(tab, key, fmt=FORMAT):
+    return f"{tab.replace('/', '__')}.{key[:12]}.{fmt}"
+
+
+def render_tab(paths, rels, out_path, width=SPRITE_WIDTH, fmt=FORMAT, quality=QUALITY):
+    """Worker: draw one atlas; returns (atlas width, atlas height, {rel: [x, y, w, h]})"""
+    thumbs = []
+    for path in paths:
+        with Image.open(path) as im:
+            im.thumbnail((width, width * 4), Image.LANCZOS, reducing_gap=2.0)
+            thumbs.append(im.convert("RGB"))
+    # Shelf packing: left to right, a new row when the next one doesn't fit
+    members = {}
+    x = y = row_height = atlas_width = 0
+    for rel, thumb in zip(rels, thumbs):
+        if x and x + thumb.width > MAX_ATLAS_WIDTH:
+            x, y, row_height = 0, y + row_height, 0
+        members[rel] = [x, y, thumb.width, thumb.height]
+        x += thumb.width
+        row_height = max(row_height, thumb.height)
+        atlas_width = max(atlas_width, x)
+    atlas_height = y + row_height
+    atlas = Image.new("RGB", (atlas_width, atlas_height), "white")
+    for (x, y, w, h), thumb in zip(members.values(), thumbs):
+        atlas.paste(thumb, (x, y))
+    tmp = f"{out_path}.tmp"
+    if fmt == "webp":
+        atlas.save(tmp, "WEBP", quality=quality, method=4)
+    else:
+        atlas.save(tmp, "PNG", optimize=True)
+    os.replace(tmp, out_path)
+    return atlas_width, atlas_height, members
+
+
+def load_manifest(sprites_dir=SPRITES_DIR):
+    try:
+        with open(os.path.join(sprites_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "tabs": {}}
+
+
+def build_sprites(menu_dir=MENU_DIR, sprites_dir=SPRITES_DIR, force=False, workers=None, hash_cache=None):
+    """Redraw the atlases of changed tabs; returns (manifest, names of redrawn tabs)"""
+    os.makedirs(sprites_dir, exist_ok=True)
+    public_dir = os.path.dirname(menu_dir)
+    manifest = load_manifest(sprites_dir)
+    old_tabs = manifest["tabs"]
+    cache = hash_cache if hash_cache is not None else {}
+    tabs, jobs = {}, []
+    for tab, paths in find_tabs(menu_dir).items():
+        rels = [os.path.relpath(p, public_dir).replace(os.sep, "/") for p in paths]
+        key = tab_key(rels, [file_hash(p, cache)[0] for p in paths])
+        old = old_tabs.get(tab)
+        if not force and old and old.get("key") == key and os.path.exists(os.path.join(public_dir, old["image"])):
+            tabs[tab] = old
+        else:
+            jobs.append((tab, key, paths, rels))
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    outputs = [os.path.join(sprites_dir, image_name(tab, key)) for tab, key, _, _ in jobs]
+    if workers == 1 or len(jobs) <= 1:
+        results = [render_tab(paths, rels, out) for (_, _, paths, rels), out in zip(jobs, outputs)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_tab, [j[2] for j in jobs], [j[3] for j in jobs], outputs))
+    for (tab, key, _, _), out, (width, height, members) in zip(jobs, outputs, results):
+        tabs[tab] = {"image": os.path.relpath(out, public_dir).replace(os.sep, "/"), "width": width,
+                     "height": height, "key": key, "members": members}
+
+    # Atlases no tab refers to any more (redrawn or removed tabs)
+    current = {os.path.basename(entry["image"]) for entry in tabs.values()}
+    for name in os.listdir(sprites_dir):
+        if name != MANIFEST_NAME and name not in current and not name.endswith(".tmp"):
+            os.remove(os.path.join(sprites_dir, name))
+
+    manifest = {"version": MANIFEST_VERSION, "tabs": dict(sorted(tabs.items(), key=lambda t: natural_key(t[0])))}
+    if jobs or tabs.keys() != old_tabs.keys():
+        tmp = os.path.join(sprites_dir, f"{MANIFEST_NAME}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, os.path.join(sprites_dir, MANIFEST_NAME))
+    return manifest, [job[0] for job in jobs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack each menu tab's screenshots into a sprite atlas")
+    parser.add_argument("--force", action="store_true", help="Redraw every tab")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    cache = load_hash_cache()
+    manifest, redrawn = build_sprites(force=args.force, workers=args.workers, hash_cache=cache)
+    # Keep gen_tree_json's entries: it prunes stale ones itself
+    save_hash_cache(cache, set(cache))
+    print(f"{len(manifest['tabs'])} tabs, redrawn: {', '.join(redrawn) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
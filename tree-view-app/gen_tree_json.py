@@ -1,6 +1,7 @@
 import os
 import json
 import fnmatch
+import hashlib
 
 # List of file or directory names or glob patterns to include (case-sensitive)
 # If INCLUDE is not empty, only files/dirs matching at least one pattern will be included.
@@ -29,6 +30,52 @@ EXCLUDE = [
     "tree-data.json"
 ]
 
+# Content hashes of files, reused while a file's mtime and size are unchanged
+HASH_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tree-hash-cache.json")
+HASH_CACHE_VERSION = 1
+
+def load_hash_cache(path=HASH_CACHE_PATH):
+    """{file path: [mtime_ns, size, sha256]} from a previous run, or {}"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == HASH_CACHE_VERSION:
+            return data.get("files", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+def save_hash_cache(cache, used, path=HASH_CACHE_PATH):
+    """Write the entries seen in this run (`used` paths); stale ones are dropped"""
+    files = {p: cache[p] for p in used if p in cache}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": HASH_CACHE_VERSION, "files": files}, f)
+    os.replace(tmp, path)
+
+def file_hash(path, cache, used=None):
+    """(sha256 hex, size) of a file; read only when mtime or size differ from the cached entry"""
+    st = os.stat(path)
+    key = os.path.abspath(path)
+    if used is not None:
+        used.add(key)
+    cached = cache.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2], st.st_size
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    cache[key] = [st.st_mtime_ns, st.st_size, h.hexdigest()]
+    return cache[key][2], st.st_size
+
+def dir_hash(children):
+    """Merkle hash of a directory: its children's types, names and hashes, by name"""
+    h = hashlib.sha256(b"dir\n")
+    for child in sorted(children, key=lambda c: c["name"]):
+        h.update(f"{child['type']}\0{child['name']}\0{child.get('hash', '')}\n".encode("utf-8"))
+    return h.hexdigest()
+
 def matches_any(entry, patterns):
     return any(fnmatch.fnmatch(entry, pattern) for pattern in patterns)
 
@@ -52,7 +99,10 @@ def has_includable_descendant(full_path, entry_rel_path):
                 return True
     return False
 
-def build_tree(path, rel_path="", in_included_subtree=False):
+def build_tree(path, rel_path="", in_included_subtree=False, hash_cache=None, used=None):
+    """Directory tree under `path`; every node carries a content hash ("hash"), files also their size"""
+    if hash_cache is None:
+        hash_cache = {}
     tree = {"name": os.path.basename(path) or path, "path": path, "type": "directory", "children": []}
     try:
         # Check if this is the top-level MENU directory
@@ -139,7 +189,7 @@ def build_tree(path, rel_path="", in_included_subtree=False):
                 else:
                     continue
 
-            subtree = build_tree(full_path, entry_rel_path, in_this_included_subtree)
+            subtree = build_tree(full_path, entry_rel_path, in_this_included_subtree, hash_cache, used)
             if subtree is not None:
                 tree["children"].append(subtree)
 
@@ -157,19 +207,42 @@ def build_tree(path, rel_path="", in_included_subtree=False):
                 continue
 
             if not INCLUDE or in_this_included_subtree or should_include_path(entry_rel_path):
-                tree["children"].append({
+                node = {
                     "name": entry,
                     "path": full_path,
                     "type": "file"
-                })
+                }
+                try:
+                    node["hash"], node["size"] = file_hash(full_path, hash_cache, used)
+                except OSError:
+                    pass
+                tree["children"].append(node)
     except PermissionError:
         pass
+    tree["hash"] = dir_hash(tree["children"])
     # Always return the tree, even if it has no children (to show empty dirs)
     return tree
 
+def write_tree(tree, out_path):
+    """Write tree-data.json atomically; skipped when the content is unchanged so its mtime stays put"""
+    data = json.dumps(tree, indent=2)
+    try:
+        with open(out_path, "r") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(data)
+    os.replace(tmp, out_path)
+    return True
+
 if __name__ == "__main__":
     # Start from the public directory instead of the root
     root_path = os.path.join(os.path.dirname(__file__), "public")
-    tree = build_tree(root_path)
-    with open(os.path.join(root_path, "tree-data.json"), "w") as f:
-        json.dump(tree, f, indent=2)
+    hash_cache = load_hash_cache()
+    used = set()
+    tree = build_tree(root_path, hash_cache=hash_cache, used=used)
+    write_tree(tree, os.path.join(root_path, "tree-data.json"))
+    save_hash_cache(hash_cache, used)
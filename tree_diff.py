@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Structural diff between two snapshots of the menu tree.
+
+A snapshot is a directory (e.g. a copy of tree-view-app/public/α7RV taken
+before a firmware update) or a tree-data.json written by gen_tree_json.py.
+Both carry the same Merkle hashes, so whole identical subtrees are skipped
+with one comparison. Only the paths that actually changed are walked.
+
+Nodes are paired up in three passes:
+  1. by name within each directory;
+  2. leftovers by content hash anywhere in the tree (moved or renamed
+     without edits);
+  3. remaining leftovers by name: first by a normalized name anywhere in
+     the tree (renumbered "3 Focal Length" -> "4 Focal Length", moved
+     folders), then by name similarity within the same parent folder.
+None of the passes compares every old node with every new one.
+
+For changed menu JSON files the report also says what changed inside. It
+lists renamed settings, added and removed options and submenu entries, and
+changed modes or descriptions.
+
+    python tree_diff.py old_snapshot/ tree-view-app/public/α7RV
+    python tree_diff.py old/tree-data.json new/tree-data.json --subtree α7RV --json
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+from collections import namedtuple
+
+from menu_tree import parse_menu_json
+
+# gen_tree_json.py lives in tree-view-app/, which is not a package
+TREE_VIEW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tree-view-app")
+if TREE_VIEW_DIR not in sys.path:
+    sys.path.insert(0, TREE_VIEW_DIR)
+from gen_tree_json import dir_hash, file_hash, load_hash_cache, should_exclude_path  # noqa: E402
+
+# kind: added, removed, modified, renamed, moved; detail is a list of strings
+Change = namedtuple("Change", ["kind", "type", "old_path", "new_path", "detail"])
+
+SIMILARITY = 0.6
+
+_PREFIX_RE = re.compile(r"^\d+[\s_.-]*")
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+_EXTENSION_RE = re.compile(r"\.[A-Za-z0-9]{1,5}$")
+
+
+def normalize_name(name):
+    """Name without numbering, extension, case or punctuation: "3_Focal-Length.json" -> "focallength\""""
+    return _NON_WORD_RE.sub("", _PREFIX_RE.sub("", _EXTENSION_RE.sub("", name))).lower()
+
+
+def hash_directory(path, name=None, hash_cache=None):
+    """Snapshot node for a directory: {"name", "type", "path", "hash", "children"}, skipping what gen_tree_json skips"""
+    hash_cache = {} if hash_cache is None else hash_cache
+    children = []
+    for entry in sorted(os.listdir(path)):
+        full_path = os.path.join(path, entry)
+        if should_exclude_path(entry):
+            continue
+        if os.path.isdir(full_path):
+            children.append(hash_directory(full_path, entry, hash_cache))
+        else:
+            children.append({"name": entry, "type": "file", "path": full_path,
+                             "hash": file_hash(full_path, hash_cache)[0]})
+    return {"name": name or os.path.basename(path.rstrip("/\\")), "type": "directory", "path": path,
+            "hash": dir_hash(children), "children": children}
+
+
+def load_snapshot(path, subtree=""):
+    """Snapshot from a directory or a tree-data.json file, optionally narrowed to `subtree`"""
+    if os.path.isdir(path):
+        # gen_tree_json's cache: files of the live tree that it already hashed are not read again
+        node = hash_directory(os.path.join(path, subtree) if subtree else path, hash_cache=load_hash_cache())
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            node = json.load(f)
+        for name in [p for p in subtree.replace("\\", "/").split("/") if p]:
+            node = next((c for c in node.get("children", []) if c["name"] == name), None)
+            if node is None:
+                raise ValueError(f"{subtree} not found in {path}")
+    _fill_hashes(node)
+    return node
+
+
+def _fill_hashes(node):
+    # tree-data.json written before hashes were added: hash what can be read
+    for child in node.get("children", []):
+        _fill_hashes(child)
+    if not node.get("hash"):
+        if node["type"] == "directory":
+            # A child of unknown content makes the folder's hash unknown too
+            if all(child.get("hash") for child in node.get("children", [])):
+                node["hash"] = dir_hash(node.get("children", []))
+        elif node.get("path") and os.path.isfile(node["path"]):
+            node["hash"] = file_hash(node["path"], {})[0]
+
+
+def _read_menu(node):
+    try:
+        with open(node["path"], "r", encoding="utf-8") as f:
+            return parse_menu_json(f.read())
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _labels(values):
+    return [v.get("label") or v.get("name") if isinstance(v, dict) else str(v) for v in values or []]
+
+
+def _list_changes(what, old, new):
+    removed = [v for v in old if v not in new]
+    added = [v for v in new if v not in old]
+    detail = []
+    if added:
+        detail.append(f"{what} added: {', '.join(map(str, added))}")
+    if removed:
+        detail.append(f"{what} removed: {', '.join(map(str, removed))}")
+    return detail
+
+
+def menu_changes(old, new):
+    """What changed between two menu JSON objects, as short lines"""
+    detail = []
+    old_name, new_name = old.get("menu") or old.get("name"), new.get("menu") or new.get("name")
+    if old_name != new_name:
+        detail.append(f"setting renamed: {old_name} -> {new_name}")
+    detail += _list_changes("options", _labels(old.get("items")), _labels(new.get("items")))
+    old_settings = (old.get("submenu") or {}).get("settings", [])
+    new_settings = (new.get("submenu") or {}).get("settings", [])
+    detail += _list_changes("submenu settings", _labels(old_settings), _labels(new_settings))
+    for old_setting in old_settings:
+        match = next((s for s in new_settings if s.get("name") == old_setting.get("name")), None)
+        if match is not None:
+            detail += _list_changes(f"{old_setting.get('name')} options", old_setting.get("options") or [],
+                                    match.get("options") or [])
+    detail += _list_changes("modes", old.get("modes") or [], new.get("modes") or [])
+    for key in ("navigation", "description", "condition", "note", "hint"):
+        if old.get(key) != new.get(key):
+            detail.append(f"{key} changed")
+    return detail
+
+
+def _content_detail(old, new):
+    if old["type"] != "file" or not old["name"].lower().endswith(".json"):
+        return []
+    old_menu, new_menu = _read_menu(old), _read_menu(new)
+    if old_menu is None or new_menu is None:
+        return []
+    return menu_changes(old_menu, new_menu)
+
+
+class _Differ:
+    def __init__(self, similarity):
+        self.similarity = similarity
+        self.changes = []
+        self.removed = []   # (node, old path, new parent path) not paired within their directory
+        self.added = []
+        self.compared = 0   # node pairs looked at, for the report
+
+    def walk(self, old, new, old_path, new_path):
+        self.compared += 1
+        if old.get("hash") and old.get("hash") == new.get("hash"):
+            return
+        if old["type"] != "directory" or new["type"] != "directory":
+            if not old.get("hash") or not new.get("hash"):
+                return  # content unknown (tree-data.json without hashes, file not readable here)
+            self.changes.append(Change("modified", new["type"], old_path, new_path, _content_detail(old, new)))
+            return
+        old_children = {c["name"]: c for c in old.get("children", [])}
+        new_children = {c["name"]: c for c in new.get("children", [])}
+        for name, child in old_children.items():
+            other = new_children.get(name)
+            if other is not None and other["type"] == child["type"]:
+                self.walk(child, other, _join(old_path, name), _join(new_path, name))
+            else:
+                # Keyed by the new parent path too, so renames inside a renamed folder count as siblings
+                self.removed.append((child, _join(old_path, name), new_path))
+        for name, child in new_children.items():
+            other = old_children.get(name)
+            if other is None or other["type"] != child["type"]:
+                self.added.append((child, _join(new_path, name), new_path))
+
+    def pair_leftovers(self):
+        # Walking into a renamed folder can leave new leftovers: pair those in another round
+        while self.removed or self.added:
+            removed, added = self.removed, self.added
+            self.removed, self.added = [], []
+            self._pair_round(removed, added)
+
+    def _pair_round(self, removed, added):
+        # 2. identical content anywhere: moved/renamed without edits
+        by_hash = {}
+        for entry in added:
+            by_hash.setdefault((entry[0]["type"], entry[0].get("hash")), []).append(entry)
+        leftover = []
+        for entry in removed:
+            candidates = by_hash.get((entry[0]["type"], entry[0].get("hash")))
+            if entry[0].get("hash") and candidates:
+                self._pair(entry, candidates.pop(0), [])
+            else:
+                leftover.append(entry)
+        added = [e for group in by_hash.values() for e in group]
+
+        # 3a. same normalized name anywhere (renumbered or moved, possibly edited)
+        by_name = {}
+        for entry in added:
+            by_name.setdefault((entry[0]["type"], normalize_name(entry[0]["name"])), []).append(entry)
+        removed, leftover = leftover, []
+        for entry in removed:
+            candidates = by_name.get((entry[0]["type"], normalize_name(entry[0]["name"])))
+            if candidates:
+                self._pair_and_walk(entry, candidates.pop(0))
+            else:
+                leftover.append(entry)
+        added = [e for group in by_name.values() for e in group]
+
+        # 3b. similar names within the same parent (a renamed setting)
+        by_parent = {}
+        for entry in added:
+            by_parent.setdefault(entry[2], []).append(entry)
+        removed = []
+        for entry in leftover:
+            siblings = [e for e in by_parent.get(entry[2], []) if e[0]["type"] == entry[0]["type"]]
+            best, score = None, self.similarity
+            for candidate in siblings:
+                ratio = difflib.SequenceMatcher(None, normalize_name(entry[0]["name"]),
+                                                normalize_name(candidate[0]["name"])).ratio()
+                if ratio >= score:
+                    best, score = candidate, ratio
+            if best is not None:
+                by_parent[entry[2]].remove(best)
+                self._pair_and_walk(entry, best)
+            else:
+                removed.append(entry)
+        added = [e for group in by_parent.values() for e in group]
+
+        for node, path, _ in removed:
+            self.changes.append(Change("removed", node["type"], path, None, _summary(node)))
+        for node, path, _ in added:
+            self.changes.append(Change("added", node["type"], None, path, _summary(node)))
+
+    def _pair(self, old_entry, new_entry, detail):
+        old_node, old_path, old_parent = old_entry
+        new_node, new_path, new_parent = new_entry
+        kind = "renamed" if old_parent == new_parent else "moved"
+        self.changes.append(Change(kind, new_node["type"], old_path, new_path, detail))
+
+    def _pair_and_walk(self, old_entry, new_entry):
+        old_node, new_node = old_entry[0], new_entry[0]
+        detail = []
+        if old_node.get("hash") != new_node.get("hash"):
+            if old_node["type"] == "file":
+                detail = _content_detail(old_node, new_node) or ["content changed"]
+            else:
+                detail = ["contents changed"]
+        self._pair(old_entry, new_entry, detail)
+        if old_node["type"] == "directory" and old_node.get("hash") != new_node.get("hash"):
+            self.walk(old_node, new_node, old_entry[1], new_entry[1])
+
+
+def _join(parent, name):
+    return f"{parent}/{name}" if parent else name
+
+
+def _summary(node):
+    if node["type"] != "directory":
+        return []
+    files = dirs = 0
+    stack = list(node.get("children", []))
+    while stack:
+        child = stack.pop()
+        if child["type"] == "directory":
+            dirs += 1
+            stack.extend(child.get("children", []))
+        else:
+            files += 1
+    return [f"{dirs} folders, {files} files"] if files or dirs else []
+
+
+def diff_trees(old, new, similarity=SIMILARITY):
+    """
+    Changes from snapshot `old` to snapshot `new` (nodes from load_snapshot).
+
+    Returns (changes, stats). Changes are sorted by path, and stats counts
+    the node pairs visited.
+    """
+    differ = _Differ(similarity)
+    differ.walk(old, new, "", "")
+    differ.pair_leftovers()
+    changes = sorted(differ.changes, key=lambda c: (c.new_path or c.old_path or "", c.kind))
+    return changes, {"compared": differ.compared, "changes": len(changes)}
+
+
+SYMBOLS = {"added": "+", "removed": "-", "modified": "~", "renamed": ">", "moved": ">"}
+
+
+def format_report(changes):
+    """Compact text report, one line per change plus indented details"""
+    if not changes:
+        return "No changes."
+    lines = []
+    for change in changes:
+        suffix = "/" if change.type == "directory" else ""
+        if change.kind in ("renamed", "moved"):
+            line = f"{SYMBOLS[change.kind]} {change.old_path}{suffix} -> {change.new_path}{suffix} ({change.kind})"
+        else:
+            line = f"{SYMBOLS[change.kind]} {change.new_path or change.old_path}{suffix}"
+        lines.append(line)
+        lines.extend(f"    {d}" for d in change.detail)
+    counts = {}
+    for change in changes:
+        counts[change.kind] = counts.get(change.kind, 0) + 1
+    lines.append(", ".join(f"{n} {kind}" for kind, n in sorted(counts.items())))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two snapshots of the menu tree (directories or tree-data.json)")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--subtree", default="", help="Compare only this path inside both snapshots (e.g. α7RV)")
+    parser.add_argument("--similarity", type=float, default=SIMILARITY, help="Name similarity for renames (0-1)")
+    parser.add_argument("--json", action="store_true", help="Print the changes as JSON")
+    args = parser.parse_args()
+    try:
+        old = load_snapshot(args.old, args.subtree)
+        new = load_snapshot(args.new, args.subtree)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    changes, _ = diff_trees(old, new, args.similarity)
+    if args.json:
+        print(json.dumps([c._asdict() for c in changes], ensure_ascii=False, indent=2))
+    else:
+        print(format_report(changes))
+    return 1 if changes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -81,7 +81,7 @@ class SnippingToolFrame(wx.Frame):
         wx.Yield()  # Let the window hide before capture
 
         try:
-            from PIL import ImageGrab
+            import screen_capture
         except ImportError:
             wx.MessageBox(
                 "Pillow (PIL) is required for snipping. Install with: pip install pillow",
@@ -90,10 +90,11 @@ class SnippingToolFrame(wx.Frame):
             )
             return
 
-        # PIL expects (left, top, right, bottom)
+        # (left, top, right, bottom) in virtual-desktop coordinates; only the
+        # monitor(s) the selection overlaps are read
         bbox = (left, top, left + width, top + height)
         try:
-            img = ImageGrab.grab(bbox)
+            img = screen_capture.grab(bbox)
             img.save("snip.png")
             wx.MessageBox("Snip saved as snip.png", "Snipping Tool", wx.OK | wx.ICON_INFORMATION)
         except Exception as e: